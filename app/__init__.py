@@ -5,20 +5,31 @@ from app.extensions import db, migrate, login_manager, csrf
 from app.models import (  # noqa: F401 — registers all models with SQLAlchemy
     Usuario, Cliente, Produto, Insumo, CompraInsumo,
     FichaTecnica, FichaTecnicaItem, Pedido, PedidoItem,
-    Pagamento, Despesa, MovimentacaoEstoque
+    Pagamento, Despesa, MovimentacaoEstoque, ResumoMensal, Sequencia, SaldoEstoque,
+    TokenApi, ChaveIdempotencia
 )
+from app.services import custo_service, totais_service, resumo_service, estoque_service  # noqa: F401 — registers session hooks (in this order)
+from app.services import busca_service  # noqa: F401 — installs the search indexes on create_all
 
 
-def create_app(config_name: str | None = None) -> Flask:
+def create_app(config_name: str | None = None, overrides: dict | None = None) -> Flask:
+    """App factory; `overrides` are applied on top of the config class (e.g. another database URL)."""
     if config_name is None:
         config_name = os.environ.get("FLASK_ENV", "default")
 
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config.from_object(config_map[config_name])
+    app.config.update(overrides or {})
     app.jinja_env.add_extension('jinja2.ext.do')
 
-    # Extensions
+    # Extensions (engine options come from the DB profile, see app/banco.py)
+    from app.banco import configurar_engine, instalar_pragmas, instalar_escritor_unico
+    from app.replica import instalar_replica
+    configurar_engine(app)
     db.init_app(app)
+    instalar_pragmas(app)
+    instalar_escritor_unico(app)
+    instalar_replica(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
@@ -33,6 +44,8 @@ def create_app(config_name: str | None = None) -> Flask:
     from app.blueprints.fichas import bp as fichas_bp
     from app.blueprints.compras import bp as compras_bp
     from app.blueprints.financeiro import bp as financeiro_bp
+    from app.blueprints.busca import bp as busca_bp
+    from app.blueprints.api import bp as api_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
@@ -43,6 +56,8 @@ def create_app(config_name: str | None = None) -> Flask:
     app.register_blueprint(fichas_bp)
     app.register_blueprint(compras_bp)
     app.register_blueprint(financeiro_bp)
+    app.register_blueprint(busca_bp)
+    app.register_blueprint(api_bp)
 
     # CLI commands
     from app.cli import register_commands
@@ -52,4 +67,8 @@ def create_app(config_name: str | None = None) -> Flask:
     from app.filters import register_filters
     register_filters(app)
 
+    # Opt-in request profiler
+    from app.profiler import register_profiler
+    register_profiler(app)
+
     return app
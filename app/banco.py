@@ -0,0 +1,298 @@
+"""
+Database engine profiles (DB_PERFIL).
+
+Each deployment gets SQLALCHEMY_ENGINE_OPTIONS tuned to how it runs:
+  servidor    long-lived gunicorn workers on PostgreSQL: a QueuePool per
+              worker (DB_POOL_SIZE + DB_POOL_OVERFLOW), pre-ping and recycle,
+              so requests reuse connections instead of opening new ones.
+  pooler      behind a transaction-mode pooler (Supabase :6543, PgBouncer):
+              a small pool, since the pooler multiplexes, and no
+              server-side prepared statements. A later transaction may run
+              on another backend, which would not have them.
+  serverless  Vercel / Lambda: NullPool. A frozen instance must not keep
+              connections open; point DATABASE_URL at the pooler.
+  sqlite      local file: a busy timeout plus SQLITE_PRAGMAS on each new
+              connection.
+SQLITE_CONCORRENTE=1 (on by default in production) lets several gunicorn
+workers share one SQLite file without "database is locked":
+  - WAL, synchronous=NORMAL, busy_timeout and a larger mmap, so readers
+    never block the writer nor each other;
+  - a single writer: requests that write (unsafe methods, or views marked
+    @escrita) pass a gate — a thread lock plus a lock file shared by
+    every worker — before touching the database, waiting at most
+    SQLITE_ESPERA_ESCRITA seconds (then 503 + Retry-After). A read view
+    that only sometimes writes takes the gate just for that step
+    (`with escrevendo():`);
+  - write transactions open with BEGIN IMMEDIATE, so a writer never has to
+    upgrade a read snapshot another worker already invalidated. Reads
+    (and views marked @leitura) keep plain deferred BEGIN.
+Without DB_PERFIL, the profile is detected from the URL and the environment.
+Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS override the profile's.
+REPLICA_URL adds a read-replica engine with its own profile (app/replica.py).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from werkzeug.exceptions import ServiceUnavailable
+from app.extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: the gate only serializes threads of one process
+    fcntl = None
+
+PERFIS = ("servidor", "pooler", "serverless", "sqlite")
+PORTA_POOLER_TRANSACAO = 6543  # Supabase's transaction-mode pooler
+PRAGMAS_CONCORRENTE = {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 268435456}
+METODOS_LEITURA = ("GET", "HEAD", "OPTIONS")
+OCUPADO = "Sistema ocupado gravando outros dados. Tente novamente."
+
+
+def detectar_perfil(url: str, ambiente=os.environ) -> str:
+    """Profile for a database URL when DB_PERFIL is not set."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return "sqlite"
+    if ambiente.get("VERCEL") or ambiente.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return "serverless"
+    if url.port == PORTA_POOLER_TRANSACAO or "pgbouncer" in (url.host or ""):
+        return "pooler"
+    return "servidor"
+
+
+def _sem_prepared_statements(url) -> dict:
+    # psycopg2 never prepares server-side; psycopg 3 does after a few executions
+    return {"prepare_threshold": None} if url.get_driver_name() == "psycopg" else {}
+
+
+def opcoes_engine(perfil: str, url: str, config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS of a profile (before explicit overrides)."""
+    url = make_url(url)
+    if perfil == "sqlite":
+        return {"connect_args": {"timeout": config["SQLITE_TIMEOUT"]}}
+    conexao = {"connect_timeout": config["DB_CONNECT_TIMEOUT"]}
+    if perfil == "serverless":
+        return {"poolclass": NullPool, "connect_args": {**conexao, **_sem_prepared_statements(url)}}
+    if perfil == "pooler":
+        return {
+            "pool_size": min(config["DB_POOL_SIZE"], 2),
+            "max_overflow": min(config["DB_POOL_OVERFLOW"], 3),
+            "pool_pre_ping": True,
+            "pool_recycle": min(config["DB_POOL_RECYCLE"], 300),
+            "pool_timeout": config["DB_POOL_TIMEOUT"],
+            "connect_args": {**conexao, **_sem_prepared_statements(url)},
+        }
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_POOL_OVERFLOW"],
+        "pool_pre_ping": True,
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_use_lifo": True,  # reuse the warmest connection; idle extras age out
+        "connect_args": {**conexao, "application_name": config["DB_APPLICATION_NAME"]},
+    }
+
+
+def configurar_engine(app: Flask) -> None:
+    """Picks the profile and fills SQLALCHEMY_ENGINE_OPTIONS. Call before db.init_app."""
+    url = app.config["SQLALCHEMY_DATABASE_URI"]
+    perfil = app.config.get("DB_PERFIL") or detectar_perfil(url)
+    if perfil not in PERFIS:
+        raise ValueError(f"DB_PERFIL inválido: {perfil} (válidos: {', '.join(PERFIS)})")
+    if (perfil == "sqlite") != (make_url(url).get_backend_name() == "sqlite"):
+        raise ValueError(f"DB_PERFIL={perfil} não combina com o banco {make_url(url).get_backend_name()}")
+    opcoes = opcoes_engine(perfil, url, app.config)
+    explicitas = app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+    if "connect_args" in explicitas:
+        opcoes["connect_args"] = {**opcoes.get("connect_args", {}), **explicitas["connect_args"]}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**opcoes, **{k: v for k, v in explicitas.items()
+                                                             if k != "connect_args"}}
+    app.extensions["banco_perfil"] = {"perfil": perfil, "detectado": not app.config.get("DB_PERFIL")}
+
+
+def _pragmas(config) -> dict:
+    pragmas = dict(config.get("SQLITE_PRAGMAS") or {})
+    if config.get("SQLITE_CONCORRENTE"):
+        pragmas.update(PRAGMAS_CONCORRENTE, busy_timeout=int(config["SQLITE_TIMEOUT"] * 1000))
+    return pragmas
+
+
+def aplicar_pragmas(engine, config) -> None:
+    """Runs the SQLite pragmas on every new connection of `engine` (no-op elsewhere)."""
+    pragmas = _pragmas(config)
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _aplicar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nome} = {valor}")
+        cursor.close()
+
+
+def instalar_pragmas(app: Flask) -> None:
+    """aplicar_pragmas on the app's engines. Call after db.init_app."""
+    with app.app_context():
+        for engine in db.engines.values():
+            aplicar_pragmas(engine, app.config)
+
+
+class PortaoEscrita:
+    """
+    One writer at a time: a thread lock for this process, then an exclusive
+    flock on `<banco>-escrita.lock` for all workers. Both waits are bounded.
+    """
+
+    def __init__(self, caminho_banco: str | None, espera: float):
+        self.caminho = f"{caminho_banco}-escrita.lock" if caminho_banco and fcntl else None
+        self.espera = espera
+        self.trava = threading.Lock()
+        self._arquivo, self._pid = None, None
+
+    def _descritor(self):
+        # One open file per process: flock locks are shared by a forked copy
+        if self._pid != os.getpid():
+            self._arquivo, self._pid = open(self.caminho, "a+b"), os.getpid()
+        return self._arquivo.fileno()
+
+    def adquirir(self) -> bool:
+        limite = time.monotonic() + self.espera
+        if not self.trava.acquire(timeout=self.espera):
+            return False
+        if self.caminho is None:
+            return True
+        while True:
+            try:
+                fcntl.flock(self._descritor(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    self.trava.release()
+                    return False
+                time.sleep(0.002)
+
+    def liberar(self) -> None:
+        if self.caminho is not None:
+            fcntl.flock(self._descritor(), fcntl.LOCK_UN)
+        self.trava.release()
+
+
+def escrita(f):
+    """Marks a GET view that writes (e.g. refreshes a rollup) as a writer."""
+    f.acesso_banco = "escrita"
+    return f
+
+
+def leitura(f):
+    """Marks a POST view that only reads (e.g. login) so it skips the write gate."""
+    f.acesso_banco = "leitura"
+    return f
+
+
+@contextmanager
+def escrevendo():
+    """
+    Runs the block as a writer inside a request that did not take the gate:
+    ends the current read transaction, takes the gate, and releases it at
+    the end of the block (commit inside it). A no-op without single-writer
+    mode, outside a request, or when the request already holds the gate.
+    """
+    portao = current_app.extensions.get("portao_escrita")
+    if portao is None or not has_request_context() or g.get("_escrita"):
+        yield
+        return
+    db.session.rollback()  # the next BEGIN must be IMMEDIATE
+    if not portao.adquirir():
+        raise ServiceUnavailable(OCUPADO, retry_after=1)
+    g._escrita = True
+    try:
+        yield
+    finally:
+        db.session.rollback()  # end the transaction before the next writer goes
+        g.pop("_escrita", None)
+        portao.liberar()
+
+
+def _escreve(app: Flask) -> bool:
+    visao = app.view_functions.get(request.endpoint)
+    acesso = getattr(visao, "acesso_banco", None)
+    return acesso == "escrita" if acesso else request.method not in METODOS_LEITURA
+
+
+def instalar_escritor_unico(app: Flask) -> None:
+    """Single-writer mode for SQLite (SQLITE_CONCORRENTE). Call after db.init_app."""
+    if not app.config.get("SQLITE_CONCORRENTE"):
+        return
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+    portao = PortaoEscrita(engine.url.database if engine.url.database not in (None, "", ":memory:") else None,
+                           app.config["SQLITE_ESPERA_ESCRITA"])
+    app.extensions["portao_escrita"] = portao
+
+    # pysqlite's own transaction handling would defer BEGIN: emit it ourselves
+    @event.listens_for(engine, "connect")
+    def _sem_begin_implicito(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        imediato = g.get("_escrita", False) if has_request_context() else True  # CLI jobs write
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if imediato else "BEGIN")
+
+    @app.before_request
+    def _abrir_portao():
+        if not _escreve(app):
+            return
+        if not portao.adquirir():
+            raise ServiceUnavailable(OCUPADO, retry_after=1)
+        g._escrita = True
+
+    @app.teardown_request
+    def _fechar_portao(exc):
+        if g.pop("_escrita", False):
+            db.session.remove()  # end the transaction before the next writer goes
+            portao.liberar()
+
+    @app.errorhandler(OperationalError)
+    def _banco_ocupado(e):
+        if "database is locked" not in str(e.orig):
+            raise e
+        db.session.rollback()
+        return ServiceUnavailable(OCUPADO, retry_after=1).get_response()
+
+
+def relatorio(app: Flask) -> str:
+    """One-line summary of the active profile (printed by wsgi.py at startup)."""
+    info = app.extensions["banco_perfil"]
+    with app.app_context():
+        engine = db.engine
+        pool = engine.pool
+        partes = [
+            f"perfil={info['perfil']}{' (detectado)' if info['detectado'] else ''}",
+            f"url={engine.url.render_as_string(hide_password=True)}",
+            f"pool={type(pool).__name__}",
+        ]
+        opcoes = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        if "pool_size" in opcoes:
+            partes.append(f"tamanho={opcoes['pool_size']}+{opcoes.get('max_overflow', 0)}")
+        for chave, rotulo in (("pool_pre_ping", "pre_ping"), ("pool_recycle", "recycle_s")):
+            if chave in opcoes:
+                partes.append(f"{rotulo}={opcoes[chave]}")
+        if app.extensions.get("replica") is not None:
+            partes.append(f"replica={app.extensions['replica'].url.render_as_string(hide_password=True)}")
+        if engine.dialect.name == "sqlite":
+            if app.config.get("SQLITE_CONCORRENTE"):
+                partes.append(f"modo=concorrente espera_escrita_s={app.config['SQLITE_ESPERA_ESCRITA']}")
+            if _pragmas(app.config):
+                partes.append("pragmas=" + ",".join(f"{k}={v}" for k, v in _pragmas(app.config).items()))
+    return f"[pid {os.getpid()}] Banco: " + " ".join(partes)
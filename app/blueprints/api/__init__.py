@@ -0,0 +1,7 @@
+from flask import Blueprint
+from app.extensions import csrf
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+csrf.exempt(bp)  # bearer tokens, no cookies: nothing for CSRF to protect
+
+from app.blueprints.api import routes  # noqa: F401, E402
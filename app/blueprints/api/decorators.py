@@ -0,0 +1,16 @@
+from functools import wraps
+from flask import abort, g, request
+from app.services.api_service import usuario_do_token
+
+
+def token_required(f):
+    """Decorator: requires 'Authorization: Bearer <token>'; sets g.usuario_api."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        esquema, _, token = request.headers.get("Authorization", "").partition(" ")
+        usuario = usuario_do_token(token.strip()) if esquema.lower() == "bearer" else None
+        if usuario is None:
+            abort(401, description="Token de API ausente ou inválido.")
+        g.usuario_api = usuario
+        return f(*args, **kwargs)
+    return decorated
@@ -0,0 +1,82 @@
+from datetime import date
+from flask import jsonify, request, abort, g
+from werkzeug.exceptions import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from app.blueprints.api import bp
+from app.blueprints.api.decorators import token_required
+from app.blueprints.auth.decorators import idempotente
+from app.extensions import db
+from app.models.pedido import Pedido
+from app.services.api_service import (
+    DadosInvalidos, criar_pedidos_lote, pedido_json, pagamento_json, listar_pagamentos_pagina
+)
+from app.services.pedido_service import listar_pedidos_pagina, PAGINA_PADRAO
+
+
+@bp.errorhandler(HTTPException)
+def erro_http(e: HTTPException):
+    return jsonify({"erro": e.description}), e.code
+
+
+def _data_arg(nome: str) -> date | None:
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        abort(400, description=f"{nome} deve ser AAAA-MM-DD.")
+
+
+@bp.route("/pedidos/lote", methods=["POST"])
+@token_required
+@idempotente
+def criar_pedidos():
+    """Creates all orders of {"pedidos": [...]} in one transaction, or none (422)."""
+    corpo = request.get_json(silent=True)
+    if not isinstance(corpo, dict):
+        abort(400, description="Corpo JSON inválido.")
+    try:
+        criados = criar_pedidos_lote(corpo.get("pedidos"), usuario_id=g.usuario_api.id)
+    except DadosInvalidos as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e), "erros": e.erros}), 422
+    db.session.commit()
+    return jsonify({"pedidos": criados}), 201
+
+
+@bp.route("/pedidos")
+@token_required
+def listar_pedidos():
+    pedidos, proximo = listar_pedidos_pagina(
+        status=request.args.get("status", ""),
+        cursor=request.args.get("cursor"),
+        limite=request.args.get("limite", PAGINA_PADRAO, type=int),
+    )
+    return jsonify({"pedidos": [pedido_json(p) for p in pedidos], "proximo": proximo})
+
+
+@bp.route("/pedidos/<int:pedido_id>")
+@token_required
+def detalhe_pedido(pedido_id: int):
+    pedido = db.session.execute(
+        select(Pedido)
+        .options(joinedload(Pedido.cliente), selectinload(Pedido.itens), selectinload(Pedido.pagamentos))
+        .where(Pedido.id == pedido_id)
+    ).scalar_one_or_none()
+    if pedido is None:
+        abort(404, description="Pedido não encontrado.")
+    return jsonify(pedido_json(pedido, completo=True))
+
+
+@bp.route("/pagamentos")
+@token_required
+def listar_pagamentos():
+    pagamentos, proximo = listar_pagamentos_pagina(
+        de=_data_arg("de"),
+        ate=_data_arg("ate"),
+        cursor=request.args.get("cursor"),
+        limite=request.args.get("limite", PAGINA_PADRAO, type=int),
+    )
+    return jsonify({"pagamentos": [pagamento_json(pg) for pg in pagamentos], "proximo": proximo})
@@ -1,6 +1,8 @@
 from functools import wraps
-from flask import abort
+from urllib.parse import urlencode
+from flask import abort, flash, g, make_response, request, Response
 from flask_login import current_user
+from app.services import idempotencia_service
 
 
 def admin_required(f):
@@ -25,3 +27,56 @@ def login_and_role_required(role: str):
             return f(*args, **kwargs)
         return decorated
     return decorator
+
+
+def _dados_requisicao() -> bytes:
+    """Payload that identifies the request: JSON body, or the form minus per-render tokens."""
+    if request.is_json:
+        return request.get_data()
+    campos = sorted((k, v) for k, v in request.form.items(multi=True)
+                    if k not in ("csrf_token", "idempotency_key"))
+    return urlencode(campos).encode()
+
+
+def idempotente(f):
+    """
+    Decorator for POST handlers: a repeated Idempotency-Key (header, or the
+    `idempotency_key` form field) gets the first response back instead of
+    running the handler twice. Requests without a key are not affected.
+    Apply it after the authentication decorator. See idempotencia_service.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        chave = request.headers.get("Idempotency-Key") or request.form.get("idempotency_key")
+        usuario = g.get("usuario_api") or current_user
+        if request.method != "POST" or not chave or not usuario.is_authenticated:
+            return f(*args, **kwargs)
+
+        impressao_req = idempotencia_service.impressao(request.method, request.path, _dados_requisicao())
+        # Never wait here for the first request: this may run under the SQLite
+        # write gate, which the first request needs in order to finish.
+        estado, registro = idempotencia_service.reservar(usuario.id, chave[:100], impressao_req)
+
+        if estado == idempotencia_service.CONFLITO:
+            abort(422, description="Idempotency-Key já usada com outra requisição.")
+        if estado == idempotencia_service.EM_ANDAMENTO:
+            abort(409, description="Requisição com esta Idempotency-Key ainda em andamento.")
+        if estado == idempotencia_service.REPETIDA:
+            if not request.is_json:
+                flash("Esta operação já havia sido registrada.", "info")
+            resposta = Response(registro.corpo, status=registro.status_http, headers=registro.cabecalhos or {})
+            resposta.headers["Idempotent-Replayed"] = "true"
+            return resposta
+
+        try:
+            resposta = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotencia_service.liberar(registro)
+            raise
+        if resposta.status_code >= 500:
+            idempotencia_service.liberar(registro)
+        else:
+            idempotencia_service.concluir(registro, resposta.status_code, resposta.get_data(),
+                                          dict(resposta.headers))
+        return resposta
+    return decorated
@@ -6,6 +6,7 @@ from sqlalchemy import select
 from app.extensions import db
 from app.models.usuario import Usuario
 from app.blueprints.auth.forms import LoginForm, ProfileForm
+from app.banco import leitura
 
 from . import bp
 
@@ -27,6 +28,7 @@ def save_foto(form_foto):
 
 
 @bp.route("/login", methods=["GET", "POST"])
+@leitura  # the password check must not hold the write gate
 def login():
     if current_user.is_authenticated:
         return redirect(url_for("main.dashboard"))
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+bp = Blueprint("busca", __name__, url_prefix="/busca")
+
+from app.blueprints.busca import routes  # noqa: F401, E402
@@ -0,0 +1,18 @@
+from flask import jsonify, request, abort
+from flask_login import login_required
+from app.blueprints.busca import bp
+from app.services.busca_service import BUSCAS, LIMITE_PADRAO, buscar
+
+
+@bp.route("/<entidade>")
+@login_required
+def buscar_json(entidade: str):
+    """Typeahead: /busca/clientes?q=jo → best matches as JSON."""
+    if entidade not in BUSCAS:
+        abort(404)
+    limite = request.args.get("limite", LIMITE_PADRAO, type=int)
+    resultados = buscar(entidade, request.args.get("q", ""), limite,
+                        somente_ativos=request.args.get("inativos") != "1")
+    resposta = jsonify(resultados)
+    resposta.headers["Cache-Control"] = "private, max-age=30"
+    return resposta
@@ -1,3 +1,4 @@
+import io
 from datetime import date
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required
@@ -7,6 +8,8 @@ from app.extensions import db
 from app.models.compra_insumo import CompraInsumo
 from app.models.insumo import Insumo
 from app.services.pedido_service import registrar_entrada_estoque
+from app.services.estoque_service import estornar_compra
+from app.services.importacao_service import importar_compras_csv
 from app.blueprints.auth.decorators import admin_required
 
 
@@ -43,17 +46,38 @@ def nova():
     return render_template("compras/form.html", insumos=insumos)
 
 
+@bp.route("/importar", methods=["GET", "POST"])
+@login_required
+def importar():
+    """Bulk CSV import of a supplier invoice (all-or-nothing)."""
+    if request.method == "POST":
+        arquivo = request.files.get("arquivo")
+        if not arquivo or not arquivo.filename:
+            flash("Selecione um arquivo CSV.", "danger")
+            return redirect(url_for("compras.importar"))
+        try:
+            resultado = importar_compras_csv(io.TextIOWrapper(arquivo.stream, encoding="utf-8-sig", newline=""))
+        except (ValueError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            flash(f"Arquivo inválido: {e}", "danger")
+            return redirect(url_for("compras.importar"))
+        if resultado["erros"]:
+            db.session.rollback()
+            return render_template("compras/importar.html", erros=resultado["erros"])
+        db.session.commit()
+        flash(f"{resultado['importadas']} compra(s) importada(s); estoque de "
+              f"{resultado['insumos']} insumo(s) atualizado.", "success")
+        return redirect(url_for("compras.listar"))
+    return render_template("compras/importar.html", erros=None)
+
+
 @bp.route("/<int:compra_id>/deletar", methods=["POST"])
 @login_required
 @admin_required
 def deletar(compra_id: int):
     compra = db.session.get(CompraInsumo, compra_id)
     if compra:
-        # Reverse stock
-        from decimal import Decimal
-        compra.insumo.estoque_atual = (
-            Decimal(str(compra.insumo.estoque_atual)) - Decimal(str(compra.quantidade_comprada))
-        )
+        estornar_compra(compra)  # reverses stock through the ledger
         db.session.delete(compra)
         db.session.commit()
         flash("Compra removida e estoque revertido.", "warning")
@@ -1,19 +1,27 @@
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required
 from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
 from app.blueprints.fichas import bp
 from app.extensions import db
 from app.models.produto import Produto
 from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
 from app.models.insumo import Insumo
-from app.services.ficha_service import resumo_ficha
+from app.services.ficha_service import resumo_ficha, resumo_lista_fichas
 
 
 @bp.route("/")
 @login_required
 def listar():
-    produtos = db.session.execute(select(Produto).where(Produto.ativo == True).order_by(Produto.nome)).scalars().all()
-    return render_template("fichas/list.html", produtos=produtos)
+    produtos = db.session.execute(
+        select(Produto)
+        .outerjoin(Produto.ficha_tecnica)
+        .options(contains_eager(Produto.ficha_tecnica))
+        .where(Produto.ativo == True)
+        .order_by(Produto.nome)
+    ).scalars().all()
+    custos = resumo_lista_fichas([p.ficha_tecnica for p in produtos if p.ficha_tecnica])
+    return render_template("fichas/list.html", produtos=produtos, custos=custos)
 
 
 @bp.route("/<int:produto_id>", methods=["GET", "POST"])
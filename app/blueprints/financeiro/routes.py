@@ -1,12 +1,14 @@
 from datetime import date, datetime, timezone
-from flask import render_template, redirect, url_for, flash, request, abort
+from flask import render_template, redirect, url_for, flash, request, abort, Response, stream_with_context
 from flask_login import login_required
 from sqlalchemy import select
 from app.blueprints.financeiro import bp
 from app.extensions import db
 from app.models.despesa import Despesa
 from app.models.pagamento import Pagamento
-from app.services.relatorio_service import dashboard_mes
+from app.services.relatorio_service import intervalo_mes
+from app.services.resumo_service import kpis_painel
+from app.services.exportacao_service import exportar, EXPORTACOES, FORMATOS
 from app.blueprints.auth.decorators import admin_required
 
 
@@ -17,7 +19,7 @@ def index():
     ano = int(request.args.get("ano", now.year))
     mes = int(request.args.get("mes", now.month))
 
-    kpis = dashboard_mes(ano, mes)
+    kpis = kpis_painel(ano, mes)
 
     # Last 30 payments
     pagamentos = db.session.execute(
@@ -25,11 +27,11 @@ def index():
     ).scalars().all()
 
     # Despesas of selected month
+    inicio, fim = intervalo_mes(ano, mes)
     despesas = db.session.execute(
         select(Despesa).where(
-            Despesa.data >= date(ano, mes, 1),
-            Despesa.data <= (date(ano, mes, 28) if mes == 2 else
-                             date(ano, mes, 30) if mes in [4, 6, 9, 11] else date(ano, mes, 31)),
+            Despesa.data >= inicio,
+            Despesa.data < fim,
         ).order_by(Despesa.data.desc())
     ).scalars().all()
 
@@ -70,3 +72,26 @@ def deletar_despesa(despesa_id: int):
         db.session.commit()
         flash("Despesa removida.", "success")
     return redirect(url_for("financeiro.index"))
+
+
+@bp.route("/exportar")
+@login_required
+@admin_required
+def exportar_dados():
+    """Streams a full CSV/JSONL dump: ?nome=&formato=, optional de/ate (AAAA-MM-DD, inclusive)."""
+    nome = request.args.get("nome", "")
+    formato = request.args.get("formato", "csv")
+    if nome not in EXPORTACOES or formato not in FORMATOS:
+        abort(404)
+    try:
+        de = date.fromisoformat(request.args["de"]) if request.args.get("de") else None
+        ate = date.fromisoformat(request.args["ate"]) if request.args.get("ate") else None
+    except ValueError:
+        abort(400)
+    partes = exportar(nome, formato, de, ate)
+    mimetype = "text/csv" if formato == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(partes),
+        mimetype=f"{mimetype}; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'},
+    )
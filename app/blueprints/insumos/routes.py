@@ -1,3 +1,4 @@
+from datetime import date
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required
 from sqlalchemy import select
@@ -5,6 +6,8 @@ from app.blueprints.insumos import bp
 from app.extensions import db
 from app.models.insumo import Insumo
 from app.blueprints.auth.decorators import admin_required
+from app.services.mrp_service import plano_necessidades, HORIZONTE_PADRAO
+from app.services.estoque_service import registrar_saldo_inicial
 
 
 @bp.route("/")
@@ -14,6 +17,18 @@ def listar():
     return render_template("insumos/list.html", insumos=insumos)
 
 
+@bp.route("/planejamento")
+@login_required
+def planejamento():
+    """MRP: ingredient consumption of the scheduled orders in the horizon."""
+    try:
+        inicio = date.fromisoformat(request.args.get("inicio", ""))
+    except ValueError:
+        inicio = date.today()
+    dias = request.args.get("dias", HORIZONTE_PADRAO, type=int)
+    return render_template("insumos/planejamento.html", plano=plano_necessidades(inicio, dias))
+
+
 @bp.route("/novo", methods=["GET", "POST"])
 @login_required
 def novo():
@@ -29,6 +44,8 @@ def novo():
             minimo_em_embalagem=request.form.get("minimo_em_embalagem") == "true",
         )
         db.session.add(i)
+        db.session.flush()
+        registrar_saldo_inicial(i)
         db.session.commit()
         flash(f"Insumo '{i.nome}' criado.", "success")
         return redirect(url_for("insumos.listar"))
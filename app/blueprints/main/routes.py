@@ -1,18 +1,26 @@
-from datetime import datetime, timezone
-from flask import render_template
+from datetime import date, datetime, timedelta, timezone
+from flask import render_template, jsonify, request, current_app, flash, redirect, url_for
 from flask_login import login_required
 from sqlalchemy import select
 from . import bp
+from app.extensions import db
 from app.services.relatorio_service import (
-    dashboard_mes, pedidos_proximas_entregas, insumos_estoque_baixo
+    pedidos_proximas_entregas, insumos_estoque_baixo, contar_insumos_estoque_baixo
 )
+from app.services.resumo_service import kpis_painel
+from app.services.agenda_service import (
+    VISOES, intervalo_agenda, navegacao, pedidos_agenda, feed_agenda
+)
+from app.filters import CORES_STATUS
+from app.blueprints.auth.decorators import admin_required
+from app import profiler
 
 
 @bp.route("/")
 @login_required
 def dashboard():
     now = datetime.now(timezone.utc)
-    kpis = dashboard_mes(now.year, now.month)
+    kpis = kpis_painel(now.year, now.month)
     proximas = pedidos_proximas_entregas(10)
     alertas = insumos_estoque_baixo()
 
@@ -31,36 +39,66 @@ def dashboard():
     )
 
 
+@bp.route("/alertas/estoque-baixo")
+@login_required
+def contagem_estoque_baixo():
+    """Low-stock count for the sidebar badge (polled by every page)."""
+    resposta = jsonify(total=contar_insumos_estoque_baixo())
+    resposta.headers["Cache-Control"] = "private, max-age=60"
+    return resposta
+
+
 @bp.route("/agenda")
 @login_required
 def agenda():
-    from sqlalchemy import select
-    from app.models.pedido import Pedido
-    from app.extensions import db
-
-    status_filter = None
-    from flask import request
+    status_filter = request.args.get("status") or None
     data_filter = request.args.get("data")
-    status_filter = request.args.get("status")
+    visao = request.args.get("visao") or ("dia" if data_filter else "semana")
+    if visao not in VISOES:
+        visao = "semana"
+    try:
+        referencia = date.fromisoformat(data_filter) if data_filter else date.today()
+    except ValueError:
+        referencia = date.today()
 
-    query = select(Pedido).where(
-        Pedido.status_pedido.notin_(["Cancelado"])
-    ).order_by(Pedido.data_hora_agendada)
+    inicio, fim = intervalo_agenda(referencia, visao)
+    anterior, proxima = navegacao(referencia, visao)
+    pedidos = pedidos_agenda(inicio, fim, status_filter)
+    return render_template("main/agenda.html", pedidos=pedidos, visao=visao,
+                           inicio=inicio, ultimo_dia=fim - timedelta(days=1),
+                           anterior=anterior, proxima=proxima,
+                           referencia=referencia, status_filter=status_filter,
+                           cores_status=CORES_STATUS)
 
-    if data_filter:
-        from datetime import date
-        try:
-            d = date.fromisoformat(data_filter)
-            query = query.where(
-                Pedido.data_hora_agendada >= datetime(d.year, d.month, d.day, 0, 0, tzinfo=timezone.utc),
-                Pedido.data_hora_agendada < datetime(d.year, d.month, d.day, 23, 59, 59, tzinfo=timezone.utc),
-            )
-        except ValueError:
-            pass
 
-    if status_filter:
-        query = query.where(Pedido.status_pedido == status_filter)
+@bp.route("/agenda/feed")
+@login_required
+def agenda_feed():
+    """JSON events for the calendar widget: ?inicio=&fim= (AAAA-MM-DD, fim exclusive)."""
+    try:
+        inicio = date.fromisoformat(request.args.get("inicio", ""))
+        fim = date.fromisoformat(request.args.get("fim", ""))
+        eventos = feed_agenda(inicio, fim, request.args.get("status") or None)
+    except ValueError as e:
+        return jsonify(erro=str(e)), 400
+    return jsonify(inicio=inicio.isoformat(), fim=fim.isoformat(), eventos=eventos)
 
-    pedidos = db.session.execute(query).scalars().all()
-    return render_template("main/agenda.html", pedidos=pedidos,
-                           data_filter=data_filter, status_filter=status_filter)
+
+@bp.route("/admin/perfil")
+@login_required
+@admin_required
+def perfil_requisicoes():
+    """Request profiler ranking (this worker's ring buffer)."""
+    amostras = profiler.amostras()
+    return render_template("main/perfil.html", ranking=profiler.ranking(), total=len(amostras),
+                           ativo=current_app.config.get("PROFILER_ATIVO"),
+                           amostragem=current_app.config.get("PROFILER_AMOSTRAGEM"))
+
+
+@bp.route("/admin/perfil/limpar", methods=["POST"])
+@login_required
+@admin_required
+def limpar_perfil():
+    profiler.limpar()
+    flash("Amostras do profiler descartadas.", "info")
+    return redirect(url_for("main.perfil_requisicoes"))
@@ -6,11 +6,12 @@ from . import bp
 from app.extensions import db
 from app.models.pedido import Pedido, PedidoItem
 from app.models.cliente import Cliente
-from app.models.produto import Produto
 from app.models.pagamento import Pagamento
-from app.blueprints.auth.decorators import admin_required
+from app.blueprints.auth.decorators import admin_required, idempotente
 from app.services.pedido_service import (
-    gerar_numero_pedido, atualizar_status_pagamento, mudar_status_pedido
+    gerar_numero_pedido, atualizar_status_pagamento, mudar_status_pedido,
+    listar_pedidos_pagina, PAGINA_PADRAO, pedidos_para_producao, previa_producao,
+    iniciar_producao_lote
 )
 
 
@@ -18,20 +19,64 @@ from app.services.pedido_service import (
 @login_required
 def listar():
     status = request.args.get("status", "")
-    query = select(Pedido).order_by(Pedido.data_hora_agendada.desc().nullslast(), Pedido.id.desc())
-    if status:
-        query = query.where(Pedido.status_pedido == status)
-    pedidos = db.session.execute(query).scalars().all()
-    return render_template("pedidos/list.html", pedidos=pedidos, status_filter=status)
+    cursor = request.args.get("cursor") or None
+    limite = request.args.get("limite", PAGINA_PADRAO, type=int)
+    pedidos, proximo_cursor = listar_pedidos_pagina(status, cursor, limite)
+    return render_template("pedidos/list.html", pedidos=pedidos, status_filter=status,
+                           cursor=cursor, proximo_cursor=proximo_cursor,
+                           limite=limite if limite != PAGINA_PADRAO else None)
+
+
+@bp.route("/producao", methods=["GET", "POST"])
+@login_required
+def producao():
+    """Daily production run: preview the batch requirement, then start it at once."""
+    try:
+        dia = date.fromisoformat(request.values.get("data", ""))
+    except ValueError:
+        dia = date.today()
+
+    if request.method == "POST":
+        valores = [i for i in request.form.getlist("pedido_id[]") if i]
+        if not all(i.isdigit() for i in valores):
+            flash("Seleção de pedidos inválida.", "danger")
+            return redirect(url_for("pedidos.producao", data=dia.isoformat()))
+        ids = [int(i) for i in valores]
+        pedidos = db.session.execute(
+            select(Pedido).where(Pedido.id.in_(ids)).order_by(Pedido.id)
+        ).scalars().all()
+        resultado = iniciar_producao_lote(pedidos, usuario_is_admin=current_user.is_admin)
+        if resultado["faltas"]:
+            db.session.rollback()
+            flash("Estoque insuficiente para o lote — nenhum pedido foi iniciado.", "danger")
+            return render_template("pedidos/producao.html", dia=dia,
+                                   pedidos=pedidos_para_producao(dia), selecionados=set(ids),
+                                   previa=previa_producao(pedidos), faltas=resultado["faltas"])
+        db.session.commit()
+        for w in resultado["warnings"]:
+            flash(w, "warning")
+        for numero, motivo in resultado["ignorados"]:
+            flash(f"{numero} ignorado ({motivo}).", "secondary")
+        if resultado["iniciados"]:
+            flash(f"Produção iniciada: {', '.join(resultado['iniciados'])}.", "success")
+        return redirect(url_for("pedidos.producao", data=dia.isoformat()))
+
+    pedidos = pedidos_para_producao(dia)
+    return render_template("pedidos/producao.html", dia=dia, pedidos=pedidos,
+                           selecionados={p.id for p in pedidos},
+                           previa=previa_producao(pedidos), faltas=None)
 
 
 @bp.route("/novo", methods=["GET", "POST"])
 @login_required
+@idempotente
 def novo():
-    clientes = db.session.execute(select(Cliente).where(Cliente.ativo == True)).scalars().all()
-    produtos = db.session.execute(select(Produto).where(Produto.ativo == True)).scalars().all()
+    # Clientes and produtos are picked through /busca (typeahead), not preloaded
     if request.method == "POST":
-        cliente_id = request.form.get("cliente_id")
+        cliente_id = request.form.get("cliente_id", "")
+        if not cliente_id.isdigit() or not db.session.get(Cliente, int(cliente_id)):
+            flash("Selecione um cliente da busca.", "danger")
+            return render_template("pedidos/novo.html")
         data_agendada_str = request.form.get("data_hora_agendada")
         tipo_entrega = request.form.get("tipo_entrega", "Retirada")
         endereco_entrega = request.form.get("endereco_entrega", "")
@@ -84,7 +129,7 @@ def novo():
         flash(f"Pedido {pedido.numero_pedido} criado com sucesso!", "success")
         return redirect(url_for("pedidos.detalhe", pedido_id=pedido.id))
 
-    return render_template("pedidos/novo.html", clientes=clientes, produtos=produtos)
+    return render_template("pedidos/novo.html")
 
 
 @bp.route("/<int:pedido_id>")
@@ -112,12 +157,14 @@ def mudar_status(pedido_id: int):
             flash(w, "warning")
         flash(f"Status atualizado para '{novo_status}'.", "success")
     except ValueError as e:
+        db.session.rollback()
         flash(str(e), "danger")
     return redirect(url_for("pedidos.detalhe", pedido_id=pedido_id))
 
 
 @bp.route("/<int:pedido_id>/pagamento", methods=["POST"])
 @login_required
+@idempotente
 def adicionar_pagamento(pedido_id: int):
     pedido = db.session.get(Pedido, pedido_id)
     if not pedido:
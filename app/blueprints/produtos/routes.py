@@ -1,8 +1,8 @@
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required
-from sqlalchemy import select
 from app.blueprints.produtos import bp
 from app.extensions import db
+from app.services import busca_service
 from app.models.produto import Produto
 from app.blueprints.auth.decorators import admin_required
 
@@ -10,8 +10,15 @@ from app.blueprints.auth.decorators import admin_required
 @bp.route("/")
 @login_required
 def listar():
-    produtos = db.session.execute(select(Produto).order_by(Produto.nome)).scalars().all()
-    return render_template("produtos/list.html", produtos=produtos)
+    q = request.args.get("q", "").strip()
+    cursor = request.args.get("cursor") or None
+    proximo_cursor = None
+    if q:
+        produtos = busca_service.filtrar("produtos", q)
+    else:
+        produtos, proximo_cursor = busca_service.listar_pagina("produtos", cursor)
+    return render_template("produtos/list.html", produtos=produtos, q=q, cursor=cursor,
+                           proximo_cursor=proximo_cursor, limite_busca=busca_service.LIMITE_MAXIMO)
 
 
 @bp.route("/novo", methods=["GET", "POST"])
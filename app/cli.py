@@ -2,6 +2,17 @@
 CLI commands registered on the Flask app:
   flask seed         — populate DB with test data
   flask create-admin — create admin user interactively
+  flask recalcular-totais — rebuild persisted order totals
+  flask recalcular-resumos — rebuild monthly financial rollups
+  flask estoque-snapshots — rebuild stock ledger snapshots
+  flask estoque-em   — stock of an insumo at a past date
+  flask importar-compras — stream a CSV of purchases into stock
+  flask exportar     — stream CSV/JSONL dumps for the accountant
+  flask reindexar-busca — build the clientes/produtos search indexes
+  flask criar-token  — issue a bearer token for the JSON API
+  flask limpar-idempotencia — purge expired idempotency keys
+  flask seed-scale   — bulk-load a deterministic synthetic dataset
+  flask perfil-banco — show the active database engine profile
 """
 import click
 from datetime import date, datetime, timezone
@@ -25,6 +36,7 @@ def register_commands(app: Flask) -> None:
         from app.services.pedido_service import (
             gerar_numero_pedido, atualizar_status_pagamento, registrar_entrada_estoque
         )
+        from app.services.estoque_service import registrar_saldo_inicial
 
         click.echo("🌱 Seeding database...")
 
@@ -89,6 +101,7 @@ def register_commands(app: Flask) -> None:
                 ins = Insumo(**idata)
                 db.session.add(ins)
                 db.session.flush()
+                registrar_saldo_inicial(ins)
                 insumos[idata["nome"]] = ins
             else:
                 insumos[idata["nome"]] = existing
@@ -224,3 +237,209 @@ def register_commands(app: Flask) -> None:
         db.session.add(u)
         db.session.commit()
         click.echo(f"✓ Admin '{nome}' ({email}) criado com sucesso.")
+
+    @app.cli.command("recalcular-totais")
+    @click.option("--lote", default=500, show_default=True, help="Pedidos por transação.")
+    @click.option("--recustear", is_flag=True, help="Reprecifica também o custo_estimado com as fichas atuais.")
+    def recalcular_totais_cmd(lote, recustear):
+        """Rebuild the persisted totals of every Pedido, fixing any drift.
+
+        custo_estimado is a snapshot of the order's last change and is kept
+        unless --recustear is given.
+        """
+        from app.extensions import db
+        from app.models.pedido import Pedido
+        from app.services.totais_service import recalcular_totais
+
+        corrigidos = 0
+        ultimo_id = 0
+        while True:
+            ids = db.session.execute(
+                db.select(Pedido.id).where(Pedido.id > ultimo_id).order_by(Pedido.id).limit(lote)
+            ).scalars().all()
+            if not ids:
+                break
+            corrigidos += recalcular_totais(db.session, ids, recustear=recustear)
+            db.session.commit()
+            ultimo_id = ids[-1]
+        click.echo(f"✓ Totais recalculados — {corrigidos} pedido(s) corrigido(s).")
+
+    @app.cli.command("recalcular-resumos")
+    @click.option("--de", "de", default=None, help="Primeiro mês (AAAA-MM). Padrão: mês mais antigo com dados.")
+    @click.option("--ate", "ate", default=None, help="Último mês (AAAA-MM). Padrão: mês atual.")
+    def recalcular_resumos_cmd(de, ate):
+        """Rebuild the monthly financial rollups for a range of months."""
+        from app.extensions import db
+        from app.models.pagamento import Pagamento
+        from app.models.despesa import Despesa
+        from app.services.resumo_service import recalcular_resumos
+
+        def _mes(valor: str) -> tuple[int, int]:
+            ano, mes = valor.split("-")
+            return int(ano), int(mes)
+
+        hoje = date.today()
+        fim = _mes(ate) if ate else (hoje.year, hoje.month)
+        if de:
+            inicio = _mes(de)
+        else:
+            datas = [d for d in (
+                db.session.execute(db.select(db.func.min(Pagamento.data_recebimento))).scalar(),
+                db.session.execute(db.select(db.func.min(Despesa.data))).scalar(),
+            ) if d]
+            primeira = min(datas) if datas else hoje
+            inicio = (primeira.year, primeira.month)
+
+        total, pendentes = recalcular_resumos(inicio, fim)
+        db.session.commit()
+        if pendentes:  # rows just created are filled once committed
+            total, pendentes = recalcular_resumos(inicio, fim)
+            db.session.commit()
+        click.echo(f"✓ {total} resumo(s) mensal(is) recalculado(s) "
+                   f"({inicio[1]:02d}/{inicio[0]} → {fim[1]:02d}/{fim[0]}).")
+
+    @app.cli.command("estoque-snapshots")
+    @click.option("--desde", default=None, help="Reconstrói a partir deste mês (AAAA-MM). Padrão: só completa os que faltam.")
+    @click.option("--conciliar", is_flag=True, help="Lança ajustes para igualar o razão ao estoque atual.")
+    def estoque_snapshots_cmd(desde, conciliar):
+        """Rebuild the monthly stock ledger snapshots."""
+        from app.extensions import db
+        from app.services.estoque_service import gerar_snapshots, divergencias, conciliar as conciliar_razao
+
+        if conciliar:
+            click.echo(f"✓ {conciliar_razao()} insumo(s) conciliado(s) com o razão.")
+            db.session.flush()
+        inicio = None
+        if desde:
+            ano, mes = desde.split("-")
+            inicio = date(int(ano), int(mes), 1)
+        total = gerar_snapshots(desde=inicio)
+        db.session.commit()
+        click.echo(f"✓ {total} snapshot(s) de saldo gravado(s).")
+        for insumo, soma in divergencias():
+            click.echo(f"  ⚠ {insumo.nome}: estoque {insumo.estoque_atual} ≠ razão {soma} "
+                       "(use --conciliar)")
+
+    @app.cli.command("estoque-em")
+    @click.argument("insumo_id", type=int)
+    @click.argument("data")
+    def estoque_em_cmd(insumo_id, data):
+        """Show an insumo's stock at the end of a date (AAAA-MM-DD)."""
+        from app.extensions import db
+        from app.models.insumo import Insumo
+        from app.services.estoque_service import estoque_em
+
+        insumo = db.session.get(Insumo, insumo_id)
+        if not insumo:
+            raise click.ClickException(f"Insumo {insumo_id} não encontrado.")
+        saldo = estoque_em(insumo_id, date.fromisoformat(data))
+        click.echo(f"{insumo.nome} em {data}: {saldo} {insumo.unidade}")
+
+    @app.cli.command("importar-compras")
+    @click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--lote", default=1000, show_default=True, help="Linhas por INSERT em lote.")
+    @click.option("--ignorar-invalidas", is_flag=True, help="Importa as linhas válidas e só relata as inválidas.")
+    def importar_compras_cmd(arquivo, lote, ignorar_invalidas):
+        """Stream a CSV of compras de insumos into the database."""
+        from app.extensions import db
+        from app.services.importacao_service import importar_compras_csv
+
+        with open(arquivo, encoding="utf-8-sig", newline="") as f:
+            try:
+                resultado = importar_compras_csv(f, tamanho_lote=lote, ignorar_invalidas=ignorar_invalidas)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        for linha, mensagem in resultado["erros"]:
+            click.echo(f"  ⚠ linha {linha}: {mensagem}")
+        if resultado["erros"] and not ignorar_invalidas:
+            db.session.rollback()
+            raise click.ClickException("Nada foi importado (use --ignorar-invalidas para importar o restante).")
+        db.session.commit()
+        click.echo(f"✓ {resultado['importadas']} de {resultado['linhas']} linha(s) importada(s); "
+                   f"estoque de {resultado['insumos']} insumo(s) atualizado.")
+
+    @app.cli.command("exportar")
+    @click.argument("nome", type=click.Choice(["pedidos", "pagamentos", "despesas", "movimentacoes"]))
+    @click.option("--formato", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+    @click.option("--de", default=None, help="Primeiro dia (AAAA-MM-DD).")
+    @click.option("--ate", default=None, help="Último dia (AAAA-MM-DD), inclusive.")
+    @click.option("--saida", type=click.File("w", encoding="utf-8"), default="-",
+                  help="Arquivo de saída (padrão: stdout).")
+    def exportar_cmd(nome, formato, de, ate, saida):
+        """Stream a full CSV/JSONL dump of one table."""
+        from app.services.exportacao_service import exportar
+
+        for parte in exportar(nome, formato,
+                              date.fromisoformat(de) if de else None,
+                              date.fromisoformat(ate) if ate else None):
+            saida.write(parte)
+
+    @app.cli.command("reindexar-busca")
+    def reindexar_busca_cmd():
+        """Install (if missing) and rebuild the clientes/produtos search indexes."""
+        from app.extensions import db
+        from app.services.busca_service import instalar
+
+        instalar(db.session.connection(), reconstruir=True)
+        db.session.commit()
+        click.echo("✓ Índices de busca atualizados.")
+
+    @app.cli.command("criar-token")
+    @click.argument("email")
+    @click.option("--nome", required=True, help="Identificação da integração (ex.: ERP do cliente).")
+    def criar_token_cmd(email, nome):
+        """Create a bearer token for the JSON API (shown only once)."""
+        from app.extensions import db
+        from app.models.usuario import Usuario
+        from app.services.api_service import criar_token
+
+        usuario = db.session.execute(db.select(Usuario).where(Usuario.email == email)).scalar_one_or_none()
+        if not usuario:
+            raise click.ClickException(f"Usuário {email} não encontrado.")
+        token = criar_token(usuario, nome)
+        db.session.commit()
+        click.echo(f"✓ Token '{nome}' criado para {email} — guarde-o, ele não será exibido de novo:")
+        click.echo(token)
+
+    @app.cli.command("limpar-idempotencia")
+    def limpar_idempotencia_cmd():
+        """Delete expired idempotency keys (run daily, e.g. from cron)."""
+        from app.extensions import db
+        from app.services.idempotencia_service import limpar_expiradas
+
+        total = limpar_expiradas()
+        db.session.commit()
+        click.echo(f"✓ {total} chave(s) de idempotência expirada(s) removida(s).")
+
+    @app.cli.command("seed-scale")
+    @click.option("--semente", default=42, show_default=True, help="Semente do gerador (mesma semente → mesmos dados).")
+    @click.option("--escala", default=1, show_default=True, help="Fator de escala (~8 mil linhas por unidade).")
+    @click.option("--referencia", default=None, help="Data de referência do histórico (AAAA-MM-DD). Padrão: hoje.")
+    def seed_scale_cmd(semente, escala, referencia):
+        """Bulk-load a deterministic synthetic dataset for load testing."""
+        import time
+        from app.extensions import db
+        from app.services.dados_sinteticos_service import gerar_dados
+
+        inicio = time.perf_counter()
+        try:
+            contagem = gerar_dados(semente, escala,
+                                   date.fromisoformat(referencia) if referencia else None)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        db.session.commit()
+        segundos = time.perf_counter() - inicio
+        for tabela, linhas in contagem.items():
+            click.echo(f"  {tabela:<24} {linhas:>12,}")
+        total = sum(contagem.values())
+        click.echo(f"✓ {total:,} linhas em {segundos:.1f}s ({total / segundos:,.0f} linhas/s).")
+
+    @app.cli.command("perfil-banco")
+    def perfil_banco_cmd():
+        """Show the active database engine profile and pool state."""
+        from app.extensions import db
+        from app.banco import relatorio
+
+        click.echo(relatorio(app))
+        db.session.execute(db.text("SELECT 1"))
+        click.echo(f"  pool: {db.engine.pool.status()}")
@@ -12,6 +12,28 @@ class Config:
     SQLALCHEMY_DATABASE_URI = db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
+    # Request profiler (app/profiler.py): off unless PROFILER=1
+    PROFILER_ATIVO = os.environ.get("PROFILER") == "1"
+    PROFILER_AMOSTRAGEM = float(os.environ.get("PROFILER_AMOSTRAGEM", "0.1"))  # fraction of requests
+    PROFILER_CAPACIDADE = 500       # samples kept per process
+    PROFILER_N_MAIS_1 = 5           # repeats of one statement that flag an N+1
+    # Engine profile (app/banco.py): servidor / pooler / serverless / sqlite — detected when unset
+    DB_PERFIL = os.environ.get("DB_PERFIL") or None
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))          # per gunicorn worker
+    DB_POOL_OVERFLOW = int(os.environ.get("DB_POOL_OVERFLOW", "5"))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))  # seconds
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "10"))    # wait for a free connection
+    DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))
+    DB_APPLICATION_NAME = "gestorbdd"
+    SQLITE_TIMEOUT = 30             # seconds to wait on a locked database
+    SQLITE_PRAGMAS = {"cache_size": -20000, "temp_store": "MEMORY", "mmap_size": 134217728}
+    # WAL + single writer so several workers can share one SQLite file (app/banco.py)
+    SQLITE_CONCORRENTE = os.environ.get("SQLITE_CONCORRENTE") == "1"
+    SQLITE_ESPERA_ESCRITA = float(os.environ.get("SQLITE_ESPERA_ESCRITA", "15"))  # seconds
+    # Read replica for GET views and reporting services (app/replica.py); off when unset
+    REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL") or None
+    REPLICA_JANELA_PRIMARIO = 5     # seconds a browser reads the primary after writing
+    REPLICA_PAUSA = 30              # seconds an unreachable replica is skipped
 
 
 class DevelopmentConfig(Config):
@@ -21,6 +43,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     WTF_CSRF_ENABLED = True
+    SQLITE_CONCORRENTE = os.environ.get("SQLITE_CONCORRENTE", "1") == "1"
 
 
 config_map = {
@@ -2,8 +2,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
+from app.replica import SessaoRoteada
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})  # read-replica routing, see app/replica.py
 migrate = Migrate()
 login_manager = LoginManager()
 csrf = CSRFProtect()
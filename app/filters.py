@@ -1,7 +1,27 @@
+import uuid
 from flask import Flask
 
+# Bootstrap color of each order/payment status badge (also used by the agenda's JS)
+CORES_STATUS = {
+    "Rascunho": "secondary",
+    "Agendado": "primary",
+    "Em produção": "warning",
+    "Pronto": "info",
+    "Entregue": "success",
+    "Cancelado": "danger",
+    "Não pago": "danger",
+    "Parcial": "warning",
+    "Pago": "success",
+    "Estornado": "dark",
+}
+
 
 def register_filters(app: Flask) -> None:
+    @app.template_global("chave_idempotencia")
+    def chave_idempotencia() -> str:
+        """Fresh Idempotency-Key for a form render (see auth.decorators.idempotente)."""
+        return uuid.uuid4().hex
+
     @app.template_filter("brl")
     def brl(value) -> str:
         """Format a number as Brazilian currency: R$ 1.234,56"""
@@ -63,19 +83,7 @@ def register_filters(app: Flask) -> None:
 
     @app.template_filter("status_badge")
     def status_badge(status: str) -> str:
-        classes = {
-            "Rascunho": "secondary",
-            "Agendado": "primary",
-            "Em produção": "warning",
-            "Pronto": "info",
-            "Entregue": "success",
-            "Cancelado": "danger",
-            "Não pago": "danger",
-            "Parcial": "warning",
-            "Pago": "success",
-            "Estornado": "dark",
-        }
-        cls = classes.get(status, "secondary")
+        cls = CORES_STATUS.get(status, "secondary")
         return f'<span class="badge bg-{cls}">{status}</span>'
     @app.template_filter("mes_extenso")
     def mes_extenso(mes_num) -> str:
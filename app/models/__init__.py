@@ -8,9 +8,15 @@ from app.models.pedido import Pedido, PedidoItem
 from app.models.pagamento import Pagamento
 from app.models.despesa import Despesa
 from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.models.resumo_mensal import ResumoMensal
+from app.models.sequencia import Sequencia
+from app.models.saldo_estoque import SaldoEstoque
+from app.models.token_api import TokenApi
+from app.models.chave_idempotencia import ChaveIdempotencia
 
 __all__ = [
     "Usuario", "Cliente", "Produto", "Insumo", "CompraInsumo",
     "FichaTecnica", "FichaTecnicaItem", "Pedido", "PedidoItem",
-    "Pagamento", "Despesa", "MovimentacaoEstoque",
+    "Pagamento", "Despesa", "MovimentacaoEstoque", "ResumoMensal",
+    "Sequencia", "SaldoEstoque", "TokenApi", "ChaveIdempotencia",
 ]
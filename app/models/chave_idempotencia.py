@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class ChaveIdempotencia(db.Model):
+    """
+    One Idempotency-Key per user: the request it was first used with
+    (`impressao`) and, once handled, the response to replay. `status_http`
+    is NULL while the first request is still running; `em_andamento_ate`
+    is the lease of that claim — once it passes, a retry may take the key
+    over (the first worker died). See idempotencia_service.
+    """
+    __tablename__ = "chaves_idempotencia"
+    __table_args__ = (db.UniqueConstraint("usuario_id", "chave", name="uq_chaves_idempotencia_usuario_chave"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
+    chave = db.Column(db.String(100), nullable=False)
+    impressao = db.Column(db.String(64), nullable=False)          # SHA-256 of method, path and payload
+    status_http = db.Column(db.Integer)
+    corpo = db.Column(db.LargeBinary)
+    cabecalhos = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expira_em = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    em_andamento_ate = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<ChaveIdempotencia {self.chave} usuario={self.usuario_id} [{self.status_http}]>"
@@ -4,6 +4,7 @@ from app.extensions import db
 
 class Cliente(db.Model):
     __tablename__ = "clientes"
+    __table_args__ = (db.Index("ix_clientes_nome_id", "nome", "id"),)  # list page order
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
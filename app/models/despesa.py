@@ -6,7 +6,7 @@ class Despesa(db.Model):
     __tablename__ = "despesas"
 
     id = db.Column(db.Integer, primary_key=True)
-    data = db.Column(db.Date, nullable=False)
+    data = db.Column(db.Date, nullable=False, index=True)
     categoria = db.Column(db.String(30), nullable=False)
     # Insumos / Embalagens / Entregas / Marketing / Aluguel / Água / Luz / Outros
     descricao = db.Column(db.String(255), nullable=False)
@@ -12,6 +12,8 @@ class FichaTecnica(db.Model):
     mao_de_obra_total = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     perdas_percentual = db.Column(db.Numeric(5, 2), nullable=False, default=0)   # e.g. 10 = 10%
     margem_desejada_percentual = db.Column(db.Numeric(5, 2), nullable=False, default=60)
+    # Bumped by app.services.custo_service whenever a cost input changes
+    versao_custo = db.Column(db.Integer, nullable=False, default=0)
     ultima_atualizacao = db.Column(db.DateTime(timezone=True),
                                    default=lambda: datetime.now(timezone.utc),
                                    onupdate=lambda: datetime.now(timezone.utc))
@@ -22,27 +24,33 @@ class FichaTecnica(db.Model):
                             cascade="all, delete-orphan", lazy="select")
 
     # ---- Computed properties (Business Rule 2) ----
+    def calcular_custos(self) -> dict:
+        """Walks itens → insumo directly; the cost engine uses it for unsaved fichas."""
+        from app.services.custo_service import montar_custos
+        total_insumos = sum((Decimal(str(i.custo_item)) for i in self.itens), Decimal("0"))
+        return montar_custos(total_insumos, self.mao_de_obra_total,
+                             self.perdas_percentual, self.rendimento_unidades)
+
+    def _custos(self) -> dict:
+        from app.services.custo_service import custos_ficha
+        return custos_ficha(self)
+
     @property
     def custo_total_insumos(self) -> Decimal:
-        return sum((Decimal(str(i.custo_item)) for i in self.itens), Decimal("0"))
+        return self._custos()["custo_total_insumos"]
 
     @property
     def custo_total_receita(self) -> Decimal:
-        base = self.custo_total_insumos + Decimal(str(self.mao_de_obra_total))
-        return base * (1 + Decimal(str(self.perdas_percentual)) / 100)
+        return self._custos()["custo_total_receita"]
 
     @property
     def custo_unitario(self) -> Decimal:
-        if self.rendimento_unidades and Decimal(str(self.rendimento_unidades)) != 0:
-            return self.custo_total_receita / Decimal(str(self.rendimento_unidades))
-        return Decimal("0")
+        return self._custos()["custo_unitario"]
 
     @property
     def preco_sugerido(self) -> Decimal:
-        margem = Decimal(str(self.margem_desejada_percentual)) / 100
-        if margem >= 1:
-            return Decimal("0")
-        return self.custo_unitario / (1 - margem)
+        from app.services.custo_service import preco_sugerido
+        return preco_sugerido(self.custo_unitario, self.margem_desejada_percentual)
 
     @property
     def lucro_unitario_atual(self) -> Decimal:
@@ -5,6 +5,7 @@ from app.extensions import db
 
 class Insumo(db.Model):
     __tablename__ = "insumos"
+    __table_args__ = (db.Index("ix_insumos_ativo_folga_estoque", "ativo", "folga_estoque"),)
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
@@ -16,6 +17,13 @@ class Insumo(db.Model):
     estoque_minimo = db.Column(db.Numeric(12, 2), nullable=False, default=0)
     minimo_em_embalagem = db.Column(db.Boolean, nullable=False, default=True)
     ativo = db.Column(db.Boolean, nullable=False, default=True)
+    # estoque_atual - estoque_minimo_valor_base, kept by the database; <= 0 means low stock,
+    # so the low-stock query is an index range scan instead of a Python filter
+    folga_estoque = db.Column(db.Numeric(14, 4), db.Computed(
+        "estoque_atual - CASE WHEN minimo_em_embalagem "
+        "THEN estoque_minimo * peso_por_embalagem ELSE estoque_minimo END",
+        persisted=True,
+    ))
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True),
                            default=lambda: datetime.now(timezone.utc),
@@ -24,6 +32,7 @@ class Insumo(db.Model):
     # Relationships - Added cascades for hard delete
     compras = db.relationship("CompraInsumo", backref="insumo", lazy="dynamic", cascade="all, delete-orphan")
     movimentacoes = db.relationship("MovimentacaoEstoque", backref="insumo", lazy="dynamic", cascade="all, delete-orphan")
+    saldos = db.relationship("SaldoEstoque", backref="insumo", lazy="dynamic", cascade="all, delete-orphan")
     ficha_itens = db.relationship("FichaTecnicaItem", backref="insumo", lazy="dynamic", cascade="all, delete-orphan")
 
     @property
@@ -33,9 +42,8 @@ class Insumo(db.Model):
         Formula: (qty_packs * price_per_pack) / (qty_packs * weight_per_pack)
         Simplified: price_per_pack / weight_per_pack
         """
-        if self.peso_por_embalagem and self.peso_por_embalagem != 0:
-            return Decimal(str(self.preco_compra_embalagem)) / Decimal(str(self.peso_por_embalagem))
-        return Decimal("0")
+        from app.services.custo_service import custo_unitario_insumo
+        return custo_unitario_insumo(self.preco_compra_embalagem, self.peso_por_embalagem)
 
     @property
     def estoque_embalagens(self) -> Decimal:
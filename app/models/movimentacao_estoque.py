@@ -3,10 +3,12 @@ from app.extensions import db
 
 
 class MovimentacaoEstoque(db.Model):
+    """Stock ledger: every change to Insumo.estoque_atual has a row here (see estoque_service)."""
     __tablename__ = "movimentacoes_estoque"
+    __table_args__ = (db.Index("ix_movimentacoes_estoque_insumo_data", "insumo_id", "data"),)
 
     id = db.Column(db.Integer, primary_key=True)
-    data = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    data = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
     tipo = db.Column(db.String(20), nullable=False)       # Entrada / Saida / Ajuste
     origem = db.Column(db.String(20), nullable=False)     # Compra / Producao / Manual
     insumo_id = db.Column(db.Integer, db.ForeignKey("insumos.id"), nullable=False, index=True)
@@ -7,7 +7,7 @@ class Pagamento(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey("pedidos.id"), nullable=False, index=True)
-    data_recebimento = db.Column(db.Date, nullable=False)
+    data_recebimento = db.Column(db.Date, nullable=False, index=True)
     forma_pagamento = db.Column(db.String(20), nullable=False)
     # PIX / Dinheiro / Cartão / Transferência
     valor_recebido = db.Column(db.Numeric(10, 2), nullable=False)
@@ -11,7 +11,7 @@ class Pedido(db.Model):
     cliente_id = db.Column(db.Integer, db.ForeignKey("clientes.id"), nullable=False, index=True)
     created_by = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=True)
     canal = db.Column(db.String(10), nullable=False, default="B2C")   # B2C / B2B
-    data_pedido = db.Column(db.Date, nullable=False)
+    data_pedido = db.Column(db.Date, nullable=False, index=True)
     data_hora_agendada = db.Column(db.DateTime(timezone=True), index=True)
     tipo_entrega = db.Column(db.String(20), nullable=False, default="Retirada")  # Retirada / Entrega
     endereco_entrega = db.Column(db.Text)
@@ -22,6 +22,15 @@ class Pedido(db.Model):
     desconto = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     taxa_entrega = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     observacoes = db.Column(db.Text)
+    # ---- Persisted totals (Business Rules 3 & 4) ----
+    # Maintained by app.services.totais_service on every flush that touches
+    # the order, its itens or its pagamentos; `flask recalcular-totais` fixes drift.
+    # custo_estimado snapshots the ficha costs at the time of the order's last
+    # change; later cost changes and the rebuild (without --recustear) keep it.
+    subtotal = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    total_pedido = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    soma_recebida = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    custo_estimado = db.Column(db.Numeric(14, 4), nullable=False, default=0)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True),
                            default=lambda: datetime.now(timezone.utc),
@@ -35,28 +44,9 @@ class Pedido(db.Model):
     movimentacoes = db.relationship("MovimentacaoEstoque", backref="pedido", lazy="dynamic",
                                     foreign_keys="MovimentacaoEstoque.pedido_id")
 
-    # ---- Computed properties (Business Rules 3 & 4) ----
-    @property
-    def subtotal(self) -> Decimal:
-        return sum((Decimal(str(i.total_item)) for i in self.itens), Decimal("0"))
-
-    @property
-    def total_pedido(self) -> Decimal:
-        return self.subtotal - Decimal(str(self.desconto)) + Decimal(str(self.taxa_entrega))
-
-    @property
-    def custo_estimado(self) -> Decimal:
-        custo_itens = sum((Decimal(str(i.custo_item)) for i in self.itens), Decimal("0"))
-        taxa_cartao = sum((Decimal(str(p.taxa_cartao)) for p in self.pagamentos), Decimal("0"))
-        return custo_itens + taxa_cartao
-
     @property
     def lucro_estimado(self) -> Decimal:
-        return self.total_pedido - self.custo_estimado
-
-    @property
-    def soma_recebida(self) -> Decimal:
-        return sum((Decimal(str(p.valor_recebido)) for p in self.pagamentos), Decimal("0"))
+        return Decimal(str(self.total_pedido or 0)) - Decimal(str(self.custo_estimado or 0))
 
     def __repr__(self) -> str:
         return f"<Pedido {self.numero_pedido} [{self.status_pedido}]>"
@@ -4,6 +4,7 @@ from app.extensions import db
 
 class Produto(db.Model):
     __tablename__ = "produtos"
+    __table_args__ = (db.Index("ix_produtos_nome_id", "nome", "id"),)  # list page order
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
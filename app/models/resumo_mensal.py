@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class ResumoMensal(db.Model):
+    """Per-month cash-basis rollup maintained by app.services.resumo_service."""
+    __tablename__ = "resumos_mensais"
+    __table_args__ = (db.UniqueConstraint("ano", "mes", name="uq_resumos_mensais_ano_mes"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    ano = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+    recebido = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    faturamento = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    lucro = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    despesas = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    resultado = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    fechado = db.Column(db.Boolean, nullable=False, default=False)  # month ended → frozen
+    sujo = db.Column(db.Boolean, nullable=False, default=False)     # needs recompute
+    geracao = db.Column(db.Integer, nullable=False, default=0)      # bumped on every sujo mark
+    atualizado_em = db.Column(db.DateTime(timezone=True),
+                              default=lambda: datetime.now(timezone.utc),
+                              onupdate=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self) -> str:
+        return f"<ResumoMensal {self.mes:02d}/{self.ano}{' fechado' if self.fechado else ''}>"
@@ -0,0 +1,19 @@
+from decimal import Decimal
+from app.extensions import db
+
+
+class SaldoEstoque(db.Model):
+    """
+    Ledger snapshot: balance of one insumo at the start (00:00 UTC) of `data`,
+    i.e. the sum of its movements dated before it. See estoque_service.
+    """
+    __tablename__ = "saldos_estoque"
+    __table_args__ = (db.UniqueConstraint("insumo_id", "data", name="uq_saldos_estoque_insumo_data"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    insumo_id = db.Column(db.Integer, db.ForeignKey("insumos.id", ondelete="CASCADE"), nullable=False)
+    data = db.Column(db.Date, nullable=False, index=True)
+    saldo = db.Column(db.Numeric(14, 4), nullable=False, default=Decimal("0"))
+
+    def __repr__(self) -> str:
+        return f"<SaldoEstoque insumo={self.insumo_id} {self.data} = {self.saldo}>"
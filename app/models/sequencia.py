@@ -0,0 +1,12 @@
+from app.extensions import db
+
+
+class Sequencia(db.Model):
+    """Named gap-free counter (e.g. 'pedido' → BD-000123), see sequencia_service."""
+    __tablename__ = "sequencias"
+
+    nome = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<Sequencia {self.nome}={self.valor}>"
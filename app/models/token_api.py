@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class TokenApi(db.Model):
+    """
+    Bearer token for the JSON API (/api/v1). Only the SHA-256 of the token
+    is stored; the token itself is shown once, when created (see api_service).
+    """
+    __tablename__ = "tokens_api"
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=False, index=True)
+    nome = db.Column(db.String(80), nullable=False)                 # e.g. the B2B customer's ERP
+    token_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    ativo = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    usuario = db.relationship("Usuario")
+
+    def __repr__(self) -> str:
+        return f"<TokenApi {self.nome} usuario={self.usuario_id}>"
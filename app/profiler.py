@@ -0,0 +1,156 @@
+"""
+Opt-in request profiler (PROFILER=1).
+
+For a sampled fraction of requests (PROFILER_AMOSTRAGEM, 0–1) it records
+the wall time, the number of SQL statements and the time spent in them
+(SQLAlchemy engine events), the template render time (Flask signals) and
+the statements repeated within the request — an N+1 signature is a
+normalized statement executed at least PROFILER_N_MAIS_1 times.
+
+Samples go into a bounded, per-process ring buffer (PROFILER_CAPACIDADE);
+the admin page /admin/perfil ranks endpoints by total time. Nothing is
+hooked when the profiler is off, and an unsampled request costs one
+random() call plus a `g` lookup per statement.
+
+Note: DB time spent inside templates (lazy loads) counts in both db and render.
+"""
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from flask import Flask, g, request, template_rendered, before_render_template
+from sqlalchemy import event
+from app.extensions import db
+from app.replica import REPLICA
+
+# Collapse literals and expanded IN lists so "same statement, other ids" match
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\([^)]*\)s|%s|:\w+))*\s*\)")
+_NUMERO = re.compile(r"\b\d+\b")
+_ESPACOS = re.compile(r"\s+")
+
+_amostras: deque = deque()
+_trava = threading.Lock()
+
+
+def assinatura(statement: str) -> str:
+    """Normalized form of a SQL statement, used to spot repeats (N+1)."""
+    sql = _LISTA_PARAMETROS.sub("(?)", statement)
+    sql = _NUMERO.sub("N", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+def amostras() -> list[dict]:
+    with _trava:
+        return list(_amostras)
+
+
+def limpar() -> None:
+    with _trava:
+        _amostras.clear()
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def ranking() -> list[dict]:
+    """Per-endpoint aggregates of the buffered samples, most expensive (total ms) first."""
+    por_rota: dict[str, list[dict]] = {}
+    for a in amostras():
+        por_rota.setdefault(f"{a['metodo']} {a['rota']}", []).append(a)
+    linhas = []
+    for rota, lista in por_rota.items():
+        tempos = [a["ms_total"] for a in lista]
+        repetidos: Counter = Counter()
+        for a in lista:
+            for sql, vezes in a["n_mais_1"]:
+                repetidos[sql] = max(repetidos[sql], vezes)
+        linhas.append({
+            "rota": rota,
+            "requisicoes": len(lista),
+            "ms_total": sum(tempos),
+            "ms_medio": sum(tempos) / len(lista),
+            "ms_p95": _percentil(tempos, 0.95),
+            "ms_db_medio": sum(a["ms_db"] for a in lista) / len(lista),
+            "ms_render_medio": sum(a["ms_render"] for a in lista) / len(lista),
+            "queries_media": sum(a["queries"] for a in lista) / len(lista),
+            "queries_max": max(a["queries"] for a in lista),
+            "n_mais_1": repetidos.most_common(3),
+        })
+    return sorted(linhas, key=lambda ln: ln["ms_total"], reverse=True)
+
+
+def register_profiler(app: Flask) -> None:
+    """Hooks the profiler into `app` when PROFILER_ATIVO is set."""
+    if not app.config.get("PROFILER_ATIVO"):
+        return
+    taxa = float(app.config.get("PROFILER_AMOSTRAGEM", 1.0))
+    limiar = int(app.config.get("PROFILER_N_MAIS_1", 5))
+    with _trava:
+        global _amostras
+        _amostras = deque(_amostras, maxlen=int(app.config.get("PROFILER_CAPACIDADE", 500)))
+
+    @app.before_request
+    def _iniciar():
+        if random.random() < taxa:
+            g._perfil = {"inicio": time.perf_counter(), "queries": 0, "db": 0.0,
+                         "render": 0.0, "statements": Counter()}
+
+    @app.after_request
+    def _registrar(resposta):
+        perfil = g.pop("_perfil", None)
+        if perfil is None:
+            return resposta
+        repetidos = [(sql, n) for sql, n in perfil["statements"].most_common(5) if n >= limiar]
+        amostra = {
+            "quando": datetime.now(timezone.utc),
+            "metodo": request.method,
+            "rota": request.url_rule.rule if request.url_rule else request.path,
+            "status": resposta.status_code,
+            "ms_total": (time.perf_counter() - perfil["inicio"]) * 1000,
+            "ms_db": perfil["db"] * 1000,
+            "ms_render": perfil["render"] * 1000,
+            "queries": perfil["queries"],
+            "n_mais_1": repetidos,
+        }
+        with _trava:
+            _amostras.append(amostra)
+        return resposta
+
+    def _inicio_render(sender, template, context, **extra):
+        perfil = g.get("_perfil")
+        if perfil is not None:
+            perfil.setdefault("_renders", []).append(time.perf_counter())
+
+    def _fim_render(sender, template, context, **extra):
+        perfil = g.get("_perfil")
+        if perfil is not None and perfil.get("_renders"):
+            perfil["render"] += time.perf_counter() - perfil["_renders"].pop()
+
+    before_render_template.connect(_inicio_render, app, weak=False)
+    template_rendered.connect(_fim_render, app, weak=False)
+
+    def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+        if g and g.get("_perfil") is not None:
+            conn.info.setdefault("_perfil_inicio", []).append(time.perf_counter())
+
+    def _depois_sql(conn, cursor, statement, parameters, context, executemany):
+        perfil = g.get("_perfil") if g else None
+        inicios = conn.info.get("_perfil_inicio")
+        if perfil is None or not inicios:
+            return
+        perfil["db"] += time.perf_counter() - inicios.pop()
+        perfil["queries"] += 1
+        perfil["statements"][assinatura(statement)] += 1
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    if app.extensions.get(REPLICA) is not None:
+        engines.append(app.extensions[REPLICA])  # kept out of db.engines (app/replica.py)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _antes_sql)
+        event.listen(engine, "after_cursor_execute", _depois_sql)
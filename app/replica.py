@@ -0,0 +1,145 @@
+"""
+Read-replica routing (DATABASE_REPLICA_URL).
+
+`db.session` is a SessaoRoteada, which picks the primary or the replica
+for each statement in get_bind:
+  - Writes always go to the primary. That covers INSERT/UPDATE/DELETE,
+    flushes and explicit session.connection(). From the first write on,
+    the rest of the request reads the primary too (read-your-writes).
+    After a request that wrote, the browser keeps reading the primary for
+    REPLICA_JANELA_PRIMARIO seconds, so the redirect after a POST shows
+    the new data despite replication lag.
+  - SELECTs go to the replica in GET views and inside functions marked
+    @somente_leitura (the reporting services); elsewhere to the primary.
+    @usa_primario pins reads that feed a write, such as a rollup refresh.
+  - When a statement fails on the replica (connection lost, failover,
+    query cancelled for lag), it is re-run on the primary, and the replica
+    is skipped for REPLICA_PAUSA seconds. Stale pooled connections are
+    caught earlier by the profile's pool_pre_ping.
+The replica engine lives in app.extensions["replica"], not in
+SQLALCHEMY_BINDS, so create_all, drop_all and migrations never touch it.
+Without a replica URL, nothing changes.
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import Flask, current_app, g, has_request_context, request, session as cookie
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.elements import TextClause
+
+REPLICA = "replica"
+_modo: ContextVar[str | None] = ContextVar("modo_replica", default=None)
+_estado = {"pausa_ate": 0.0}
+
+
+def _fixar(modo: str, f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if _modo.get() == "primario":  # a pinned caller wins over what it calls
+            return f(*args, **kwargs)
+        token = _modo.set(modo)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _modo.reset(token)
+    return decorated
+
+
+def somente_leitura(f):
+    """Read-only service call: its SELECTs may use the replica, even outside GET views."""
+    return _fixar(REPLICA, f)
+
+
+def usa_primario(f):
+    """Reads that feed a write: always on the primary, including the calls it makes."""
+    return _fixar("primario", f)
+
+
+def _eh_leitura(clause) -> bool:
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == "SELECT"
+    return bool(getattr(clause, "is_select", False))
+
+
+def _pausar(erro: DBAPIError) -> None:
+    pausa = current_app.config["REPLICA_PAUSA"]
+    _estado["pausa_ate"] = time.monotonic() + pausa
+    current_app.logger.warning("Réplica indisponível (%s); usando o primário por %ss.", erro.orig, pausa)
+
+
+class SessaoRoteada(Session):
+    """Flask-SQLAlchemy session that sends eligible SELECTs to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = current_app.extensions.get(REPLICA)
+            if (engine is not None and self._le_da_replica(clause) and not self.info.get("sem_replica")
+                    and time.monotonic() >= _estado["pausa_ate"]):
+                self.info["na_replica"] = True
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _le_da_replica(self, clause) -> bool:
+        if clause is None or not _eh_leitura(clause):
+            self.info["escreveu"] = True  # flush, DML or a raw connection: primary from now on
+            return False
+        if self.info.get("escreveu"):
+            return False
+        modo = _modo.get()
+        if modo is not None:
+            return modo == REPLICA
+        return has_request_context() and g.get("_ler_replica", False)
+
+    def _ou_no_primario(self, executar, *args, **kwargs):
+        self.info["na_replica"] = False
+        try:
+            return executar(*args, **kwargs)
+        except DBAPIError as e:
+            # Replica reads only happen before the first write, so unless
+            # objects are pending the transaction holds nothing to lose
+            if not self.info.pop("na_replica", False) or self.new or self.dirty or self.deleted:
+                raise
+            _pausar(e)
+            self.info["sem_replica"] = True
+            self.rollback()  # drops the failed replica connection from the transaction
+            return executar(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._ou_no_primario(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._ou_no_primario(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._ou_no_primario(super().scalars, *args, **kwargs)
+
+
+def instalar_replica(app: Flask) -> None:
+    """Creates the replica engine and the per-request routing state. Call after db.init_app."""
+    url = app.config.get("REPLICA_URL")
+    if not url:
+        return
+    from app.extensions import db
+    from app.banco import detectar_perfil, opcoes_engine, aplicar_pragmas
+
+    perfil = app.extensions["banco_perfil"]["perfil"]
+    perfil = perfil if perfil == "serverless" else detectar_perfil(url)
+    engine = create_engine(url, **opcoes_engine(perfil, url, app.config))
+    aplicar_pragmas(engine, app.config)
+    app.extensions[REPLICA] = engine
+
+    @app.before_request
+    def _rotear():
+        db.session.info.pop("escreveu", None)
+        db.session.info.pop("sem_replica", None)
+        g._ler_replica = (request.method in ("GET", "HEAD")
+                          and time.time() >= cookie.get("_primario_ate", 0))
+
+    @app.after_request
+    def _grudar_no_primario(resposta):
+        if db.session.info.get("escreveu"):
+            cookie["_primario_ate"] = time.time() + app.config["REPLICA_JANELA_PRIMARIO"]
+        return resposta
@@ -0,0 +1,91 @@
+"""
+agenda_service.py
+=================
+Delivery agenda by day / week / month.
+
+  - Views are half-open ranges [inicio, fim) of UTC days on the indexed
+    `data_hora_agendada`, so a day includes its last second and the query
+    never scans history outside the window.
+  - `pedidos_agenda` returns Pedido objects with the cliente joined in
+    (one query) for the HTML page; `feed_agenda` returns compact dicts
+    built from plain columns for the calendar widget's JSON feed.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models.pedido import Pedido
+from app.models.cliente import Cliente
+from app.services.relatorio_service import intervalo_mes
+
+VISOES = ("dia", "semana", "mes")
+MAX_DIAS_FEED = 62
+
+
+def intervalo_agenda(referencia: date, visao: str) -> tuple[date, date]:
+    """[inicio, fim) days of the view containing `referencia`; weeks start on Monday."""
+    if visao == "dia":
+        return referencia, referencia + timedelta(days=1)
+    if visao == "mes":
+        return intervalo_mes(referencia.year, referencia.month)
+    inicio = referencia - timedelta(days=referencia.weekday())
+    return inicio, inicio + timedelta(days=7)
+
+
+def navegacao(referencia: date, visao: str) -> tuple[date, date]:
+    """Reference dates of the previous and next view."""
+    inicio, fim = intervalo_agenda(referencia, visao)
+    return intervalo_agenda(inicio - timedelta(days=1), visao)[0], fim
+
+
+def _filtros(inicio: date, fim: date, status: str | None) -> list:
+    filtros = [
+        Pedido.data_hora_agendada >= datetime.combine(inicio, time.min, tzinfo=timezone.utc),
+        Pedido.data_hora_agendada < datetime.combine(fim, time.min, tzinfo=timezone.utc),
+        Pedido.status_pedido != "Cancelado",
+    ]
+    if status:
+        filtros.append(Pedido.status_pedido == status)
+    return filtros
+
+
+def pedidos_agenda(inicio: date, fim: date, status: str | None = None) -> list[Pedido]:
+    """Non-cancelled orders scheduled in [inicio, fim), cliente eager-loaded."""
+    return db.session.execute(
+        select(Pedido)
+        .options(joinedload(Pedido.cliente))
+        .where(*_filtros(inicio, fim, status))
+        .order_by(Pedido.data_hora_agendada, Pedido.id)
+    ).scalars().all()
+
+
+def feed_agenda(inicio: date, fim: date, status: str | None = None) -> list[dict]:
+    """
+    Compact calendar events for [inicio, fim); at most MAX_DIAS_FEED days.
+    Raises ValueError for an empty or oversized range.
+    """
+    if fim <= inicio or (fim - inicio).days > MAX_DIAS_FEED:
+        raise ValueError(f"Intervalo deve ter entre 1 e {MAX_DIAS_FEED} dias.")
+    linhas = db.session.execute(
+        select(
+            Pedido.id, Pedido.numero_pedido, Cliente.nome, Pedido.data_hora_agendada,
+            Pedido.tipo_entrega, Pedido.status_pedido, Pedido.status_pagamento, Pedido.total_pedido,
+        )
+        .join(Cliente, Cliente.id == Pedido.cliente_id)
+        .where(*_filtros(inicio, fim, status))
+        .order_by(Pedido.data_hora_agendada, Pedido.id)
+    ).all()
+    return [
+        {
+            "id": ln.id,
+            "numero": ln.numero_pedido,
+            "cliente": ln.nome,
+            "inicio": ln.data_hora_agendada.replace(tzinfo=ln.data_hora_agendada.tzinfo or timezone.utc).isoformat(),
+            "entrega": ln.tipo_entrega,
+            "status": ln.status_pedido,
+            "pagamento": ln.status_pagamento,
+            "total": str(ln.total_pedido),
+        }
+        for ln in linhas
+    ]
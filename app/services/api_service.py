@@ -0,0 +1,288 @@
+"""
+api_service.py
+==============
+Business side of the token-authenticated JSON API (/api/v1) used by B2B
+integrations.
+
+  - Tokens: random bearer tokens, stored as SHA-256 only (see TokenApi).
+  - `criar_pedidos_lote` creates many orders in one transaction with a
+    constant number of statements: clientes and produtos are validated
+    with one query each, the order numbers are reserved as one block
+    (sequencia_service), pedidos are bulk-inserted with RETURNING ids and
+    their itens with one executemany. Bulk inserts skip the ORM flush
+    hooks, so the persisted totals are computed explicitly afterwards.
+    New orders have no pagamentos yet, so no monthly rollup changes.
+  - Serializers turn orders/payments into JSON-safe dicts (Decimal as
+    string, dates as ISO 8601).
+Nothing here commits: the caller does.
+"""
+import hashlib
+import secrets
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import select, insert
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.token_api import TokenApi
+from app.models.usuario import Usuario
+from app.services.sequencia_service import reservar_numeros_pedido
+from app.services.totais_service import recalcular_totais
+from app.services.importacao_service import cabe_na_coluna
+from app.services.pedido_service import PAGINA_PADRAO, PAGINA_MAXIMA
+
+MAX_PEDIDOS_LOTE = 1000
+TIPOS_ENTREGA = ("Retirada", "Entrega")
+CANAIS = ("B2C", "B2B")
+MAX_ENDERECO = 500
+MAX_OBSERVACOES = 2000
+
+
+# ---------------------------------------------------------------------------
+# Tokens
+# ---------------------------------------------------------------------------
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def criar_token(usuario: Usuario, nome: str) -> str:
+    """Creates a token for `usuario` and returns it — the only time it is visible."""
+    token = secrets.token_urlsafe(32)
+    db.session.add(TokenApi(usuario_id=usuario.id, nome=nome, token_hash=_hash_token(token)))
+    return token
+
+
+def usuario_do_token(token: str) -> Usuario | None:
+    """The active user owning an active token, or None."""
+    if not token:
+        return None
+    registro = db.session.execute(
+        select(TokenApi).options(joinedload(TokenApi.usuario))
+        .where(TokenApi.token_hash == _hash_token(token), TokenApi.ativo.is_(True))
+    ).scalar_one_or_none()
+    if registro is None or not registro.usuario.ativo:
+        return None
+    return registro.usuario
+
+
+# ---------------------------------------------------------------------------
+# Bulk order creation
+# ---------------------------------------------------------------------------
+
+class DadosInvalidos(ValueError):
+    """Rejected payload; `erros` lists {"pedido": index, "erro": message}."""
+
+    def __init__(self, erros: list[dict]):
+        self.erros = erros
+        super().__init__(f"{len(erros)} erro(s) de validação")
+
+
+def _id(valor) -> int | None:
+    return valor if isinstance(valor, int) and not isinstance(valor, bool) and valor > 0 else None
+
+
+def _decimal(valor, coluna, minimo: Decimal = Decimal("0")) -> Decimal:
+    """Parses a JSON number/string and checks it is >= `minimo` and fits `coluna`."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ValueError(f"{coluna.name} inválido: {valor!r}")
+    try:
+        numero = cabe_na_coluna(Decimal(str(valor)), coluna, repr(valor))
+    except InvalidOperation:
+        raise ValueError(f"{coluna.name} inválido: {valor!r}")
+    if numero < minimo:
+        raise ValueError(f"{coluna.name} deve ser >= {minimo}")
+    return numero
+
+
+def _texto(dados: dict, campo: str, maximo: int) -> str | None:
+    """Optional string field, at most `maximo` characters; None when absent or empty."""
+    valor = dados.get(campo)
+    if valor is None:
+        return None
+    if not isinstance(valor, str):
+        raise ValueError(f"{campo} deve ser texto")
+    if len(valor) > maximo:
+        raise ValueError(f"{campo} deve ter no máximo {maximo} caracteres")
+    return valor or None
+
+
+def _agendamento(valor) -> datetime | None:
+    if not valor:
+        return None
+    try:
+        agendado = datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise ValueError(f"data_hora_agendada inválida: {valor!r}")
+    return agendado if agendado.tzinfo else agendado.replace(tzinfo=timezone.utc)
+
+
+def _validar_pedido(dados, clientes: dict, produtos: dict, hoje: date) -> tuple[dict, list[dict]]:
+    """Header row and item rows for one order of the payload; ValueError on bad data."""
+    pedidos_c, itens_c = Pedido.__table__.c, PedidoItem.__table__.c
+    if not isinstance(dados, dict):
+        raise ValueError("cada pedido deve ser um objeto")
+    cliente = clientes.get(_id(dados.get("cliente_id")))
+    if cliente is None:
+        raise ValueError(f"cliente_id inexistente ou inativo: {dados.get('cliente_id')!r}")
+    itens = dados.get("itens")
+    if not isinstance(itens, list) or not itens:
+        raise ValueError("itens deve ser uma lista não vazia")
+    tipo_entrega = dados.get("tipo_entrega", "Retirada")
+    if tipo_entrega not in TIPOS_ENTREGA:
+        raise ValueError(f"tipo_entrega deve ser {' ou '.join(TIPOS_ENTREGA)}")
+    agendado = _agendamento(dados.get("data_hora_agendada"))
+    canal = _texto(dados, "canal", pedidos_c.canal.type.length)
+    if canal is not None and canal not in CANAIS:
+        raise ValueError(f"canal deve ser {' ou '.join(CANAIS)}")
+    endereco = _texto(dados, "endereco_entrega", MAX_ENDERECO)
+    observacoes = _texto(dados, "observacoes", MAX_OBSERVACOES)
+
+    linhas_itens = []
+    for item in itens:
+        produto = produtos.get(_id(item.get("produto_id")) if isinstance(item, dict) else None)
+        if produto is None:
+            raise ValueError(f"produto_id inexistente ou inativo: {item!r}")
+        quantidade = _decimal(item.get("quantidade"), itens_c.quantidade)
+        if quantidade == 0:
+            raise ValueError("quantidade deve ser > 0")
+        if item.get("preco_unitario") is not None:
+            preco = _decimal(item["preco_unitario"], itens_c.preco_unitario)
+        else:
+            preco = produto.preco_atacado if cliente.tabela_preco == "Atacado" else produto.preco_varejo
+        linhas_itens.append({"produto_id": produto.id, "quantidade": quantidade, "preco_unitario": preco})
+
+    cabecalho = {
+        "cliente_id": cliente.id,
+        "canal": canal or cliente.canal_preferencial,
+        "data_pedido": hoje,
+        "data_hora_agendada": agendado,
+        "tipo_entrega": tipo_entrega,
+        "endereco_entrega": endereco or cliente.endereco,
+        "desconto": _decimal(dados.get("desconto", 0), pedidos_c.desconto),
+        "taxa_entrega": _decimal(dados.get("taxa_entrega", 0), pedidos_c.taxa_entrega),
+        "status_pedido": "Agendado" if agendado else "Rascunho",
+        "status_pagamento": "Não pago",
+        "observacoes": observacoes or "",
+    }
+    return cabecalho, linhas_itens
+
+
+def criar_pedidos_lote(pedidos: list, usuario_id: int | None = None) -> list[dict]:
+    """
+    Creates every order of `pedidos` (API payload dicts) or none: raises
+    DadosInvalidos listing all bad orders. Returns id, numero_pedido and
+    total_pedido per created order, in payload order.
+    """
+    if not isinstance(pedidos, list) or not pedidos:
+        raise DadosInvalidos([{"pedido": None, "erro": "envie uma lista 'pedidos' não vazia"}])
+    if len(pedidos) > MAX_PEDIDOS_LOTE:
+        raise DadosInvalidos([{"pedido": None, "erro": f"no máximo {MAX_PEDIDOS_LOTE} pedidos por requisição"}])
+
+    cliente_ids, produto_ids = set(), set()
+    for dados in pedidos:
+        if isinstance(dados, dict):
+            cliente_ids.add(_id(dados.get("cliente_id")))
+            for item in dados.get("itens") or ():
+                if isinstance(item, dict):
+                    produto_ids.add(_id(item.get("produto_id")))
+    clientes = {c.id: c for c in db.session.execute(
+        select(Cliente.id, Cliente.canal_preferencial, Cliente.tabela_preco, Cliente.endereco)
+        .where(Cliente.id.in_(cliente_ids - {None}), Cliente.ativo.is_(True))
+    )}
+    produtos = {p.id: p for p in db.session.execute(
+        select(Produto.id, Produto.preco_varejo, Produto.preco_atacado)
+        .where(Produto.id.in_(produto_ids - {None}), Produto.ativo.is_(True))
+    )}
+
+    hoje = date.today()
+    validos, erros = [], []
+    for indice, dados in enumerate(pedidos):
+        try:
+            validos.append(_validar_pedido(dados, clientes, produtos, hoje))
+        except ValueError as e:
+            erros.append({"pedido": indice, "erro": str(e)})
+    if erros:
+        raise DadosInvalidos(erros)
+
+    numeros = reservar_numeros_pedido(len(validos))
+    ids = db.session.execute(
+        insert(Pedido).returning(Pedido.id, sort_by_parameter_order=True),
+        [dict(cabecalho, numero_pedido=numero, created_by=usuario_id)
+         for (cabecalho, _), numero in zip(validos, numeros)],
+    ).scalars().all()
+    db.session.execute(insert(PedidoItem), [
+        dict(item, pedido_id=pedido_id)
+        for (_, itens), pedido_id in zip(validos, ids)
+        for item in itens
+    ])
+    recalcular_totais(db.session, ids)
+
+    totais = dict(db.session.execute(
+        select(Pedido.id, Pedido.total_pedido).where(Pedido.id.in_(ids))
+    ).all())
+    return [
+        {"id": pedido_id, "numero_pedido": numero, "total_pedido": str(totais[pedido_id])}
+        for pedido_id, numero in zip(ids, numeros)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Serializers and reads
+# ---------------------------------------------------------------------------
+
+def _valor(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def pedido_json(pedido: Pedido, completo: bool = False) -> dict:
+    """Order as a JSON-safe dict; `completo` adds itens and pagamentos."""
+    campos = ("id", "numero_pedido", "cliente_id", "canal", "data_pedido", "data_hora_agendada",
+              "tipo_entrega", "status_pedido", "status_pagamento", "desconto", "taxa_entrega",
+              "subtotal", "total_pedido", "soma_recebida")
+    resultado = {c: _valor(getattr(pedido, c)) for c in campos}
+    resultado["cliente"] = pedido.cliente.nome
+    if completo:
+        resultado["endereco_entrega"] = pedido.endereco_entrega
+        resultado["observacoes"] = pedido.observacoes
+        resultado["itens"] = [
+            {"produto_id": i.produto_id, "quantidade": _valor(i.quantidade),
+             "preco_unitario": _valor(i.preco_unitario)}
+            for i in pedido.itens
+        ]
+        resultado["pagamentos"] = [pagamento_json(pg) for pg in pedido.pagamentos]
+    return resultado
+
+
+def pagamento_json(pagamento: Pagamento) -> dict:
+    campos = ("id", "pedido_id", "data_recebimento", "forma_pagamento",
+              "valor_recebido", "taxa_cartao", "observacoes")
+    return {c: _valor(getattr(pagamento, c)) for c in campos}
+
+
+def listar_pagamentos_pagina(de: date | None = None, ate: date | None = None,
+                             cursor: str | None = None,
+                             limite: int = PAGINA_PADRAO) -> tuple[list[Pagamento], str | None]:
+    """
+    Keyset pagination over pagamentos by id DESC, optionally within
+    [de, ate] (inclusive) by data_recebimento. Returns (page, next_cursor).
+    """
+    limite = max(1, min(int(limite), PAGINA_MAXIMA))
+    query = select(Pagamento).order_by(Pagamento.id.desc())
+    if de:
+        query = query.where(Pagamento.data_recebimento >= de)
+    if ate:
+        query = query.where(Pagamento.data_recebimento <= ate)
+    if cursor and cursor.isdigit():
+        query = query.where(Pagamento.id < int(cursor))
+    pagamentos = db.session.execute(query.limit(limite + 1)).scalars().all()
+    proximo = str(pagamentos[limite - 1].id) if len(pagamentos) > limite else None
+    return list(pagamentos[:limite]), proximo
@@ -0,0 +1,284 @@
+"""
+busca_service.py
+================
+Indexed search / typeahead over clientes, produtos and pedidos.
+
+One interface (`buscar(entidade, termo)`), two index backends:
+  - SQLite: FTS5 tables (`busca_clientes`, `busca_produtos`) kept in sync
+    by triggers; accents are folded (unicode61 remove_diacritics) and
+    every word of the term is a prefix query, ranked by bm25.
+  - PostgreSQL: pg_trgm GIN indexes on a lower-cased, accent-folded
+    (unaccent) search expression; each word must be a substring, ranked by
+    trigram similarity. Terms are folded the same way, so "joao" and
+    "João" find the same rows on both backends.
+  - Any other database falls back to a LIKE scan.
+Telefone and documento are indexed as digits only, so "123.456" finds
+"12.345.6..." as well as "123456...". Pedidos are found by number through
+the existing unique index (prefix range or exact number).
+
+Without a term, list pages walk (nome, id) one page at a time
+(`listar_pagina`) instead of loading the whole table.
+
+The indexes are created with the tables (metadata `after_create`);
+`flask reindexar-busca` installs and fills them on an existing database.
+"""
+import re
+import unicodedata
+
+from sqlalchemy import event, select, text, and_, or_
+from app.extensions import db
+from app.models.pedido import Pedido
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.services.sequencia_service import formatar_numero_pedido, PREFIXO_PEDIDO
+
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 50
+
+
+def _so_digitos_sqlite(coluna: str) -> str:
+    expr = f"coalesce({coluna}, '')"
+    for ch in ".-/() ":
+        expr = f"replace({expr}, '{ch}', '')"
+    return expr
+
+
+def _telefone_sqlite(coluna: str) -> str:
+    """Digits with and without the area code, so a local number is a prefix match too."""
+    digitos = _so_digitos_sqlite(coluna)
+    return f"{digitos} || ' ' || substr({digitos}, 3)"
+
+
+def _ddl_sqlite() -> list[str]:
+    tel, doc = _telefone_sqlite("new.telefone"), _so_digitos_sqlite("new.documento")
+    ddl = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS busca_clientes USING fts5("
+        "nome, telefone, documento, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS busca_produtos USING fts5("
+        "nome, sku, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ]
+    inserir = {
+        "clientes": f"INSERT INTO busca_clientes (rowid, nome, telefone, documento) "
+                    f"VALUES (new.id, new.nome, {tel}, {doc});",
+        "produtos": "INSERT INTO busca_produtos (rowid, nome, sku) VALUES (new.id, new.nome, new.sku);",
+    }
+    for tabela, insert in inserir.items():
+        apagar = f"DELETE FROM busca_{tabela} WHERE rowid = old.id;"
+        ddl += [
+            f"CREATE TRIGGER IF NOT EXISTS busca_{tabela}_ai AFTER INSERT ON {tabela} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS busca_{tabela}_au AFTER UPDATE ON {tabela} BEGIN {apagar} {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS busca_{tabela}_ad AFTER DELETE ON {tabela} BEGIN {apagar} END",
+        ]
+    return ddl
+
+
+# Search expressions (must match the index expressions exactly)
+_EXPR_PG = {
+    "clientes": "(busca_sem_acento(lower(nome)) || ' ' || regexp_replace(coalesce(telefone, ''), '\\D', '', 'g')"
+                " || ' ' || regexp_replace(coalesce(documento, ''), '\\D', '', 'g'))",
+    "produtos": "(busca_sem_acento(lower(nome)) || ' ' || lower(sku))",
+}
+
+
+def _ddl_postgresql(esquema_unaccent: str) -> list[str]:
+    # unaccent() is only STABLE (its dictionary could change), so indexes
+    # need an IMMUTABLE wrapper pinned to the extension's default dictionary
+    unaccent = f"{esquema_unaccent}.unaccent"
+    ddl = [
+        "CREATE OR REPLACE FUNCTION busca_sem_acento(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        f"AS $$ SELECT {unaccent}('{unaccent}'::regdictionary, $1) $$",
+    ]
+    for tabela, expr in _EXPR_PG.items():
+        ddl += [
+            f"DROP INDEX IF EXISTS ix_{tabela}_busca_trgm",  # pre-unaccent expression
+            f"CREATE INDEX IF NOT EXISTS ix_{tabela}_busca_trgm_sem_acento ON {tabela} "
+            f"USING gin ({expr} gin_trgm_ops)",
+        ]
+    return ddl
+
+
+def instalar(conn, reconstruir: bool = False) -> None:
+    """Creates the search indexes for conn's dialect (idempotent); optionally refills them."""
+    dialeto = conn.dialect.name
+    if dialeto == "sqlite":
+        for ddl in _ddl_sqlite():
+            conn.execute(text(ddl))
+        if reconstruir:
+            tel, doc = _telefone_sqlite("telefone"), _so_digitos_sqlite("documento")
+            conn.execute(text("DELETE FROM busca_clientes"))
+            conn.execute(text(f"INSERT INTO busca_clientes (rowid, nome, telefone, documento) "
+                              f"SELECT id, nome, {tel}, {doc} FROM clientes"))
+            conn.execute(text("DELETE FROM busca_produtos"))
+            conn.execute(text("INSERT INTO busca_produtos (rowid, nome, sku) SELECT id, nome, sku FROM produtos"))
+    elif dialeto == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        # Supabase keeps extensions in their own schema, not in public
+        esquema = conn.execute(text(
+            "SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace "
+            "WHERE e.extname = 'unaccent'"
+        )).scalar_one()
+        for ddl in _ddl_postgresql(esquema):
+            conn.execute(text(ddl))
+
+
+@event.listens_for(db.metadata, "after_create")
+def _instalar_apos_create_all(metadata, conn, **kw) -> None:
+    instalar(conn)
+
+
+@event.listens_for(db.metadata, "after_drop")
+def _remover_apos_drop_all(metadata, conn, **kw) -> None:
+    if conn.dialect.name == "sqlite":  # the triggers went with their tables
+        conn.execute(text("DROP TABLE IF EXISTS busca_clientes"))
+        conn.execute(text("DROP TABLE IF EXISTS busca_produtos"))
+
+
+def _sem_acento(palavra: str) -> str:
+    """Python side of busca_sem_acento: 'joão' -> 'joao'."""
+    return "".join(c for c in unicodedata.normalize("NFKD", palavra) if not unicodedata.combining(c))
+
+
+def _palavras(termo: str) -> list[str]:
+    """Words of the term; a phone/document-looking term becomes one digits-only word."""
+    termo = (termo or "").strip()
+    if re.fullmatch(r"[\d\s.\-/()]+", termo):
+        digitos = re.sub(r"\D", "", termo)
+        return [digitos] if digitos else []
+    return [p.lower() for p in re.findall(r"\w+", termo)]
+
+
+def _limite(limite: int) -> int:
+    return max(1, min(int(limite or LIMITE_PADRAO), LIMITE_MAXIMO))
+
+
+def _ids_por_indice(tabela: str, colunas: list[str], palavras: list[str], filtro: str, limite: int) -> list[int]:
+    """Matching ids, best first, through the dialect's search index."""
+    dialeto = db.engine.dialect.name  # get_bind() would count as a write (app/replica.py)
+    params = {"limite": limite}
+    if dialeto == "sqlite":
+        params["q"] = " ".join('"' + p.replace('"', '""') + '"*' for p in palavras)
+        sql = (f"SELECT t.id FROM busca_{tabela} f JOIN {tabela} t ON t.id = f.rowid "
+               f"WHERE busca_{tabela} MATCH :q {filtro} ORDER BY f.rank LIMIT :limite")
+    elif dialeto == "postgresql":
+        expr = _EXPR_PG[tabela]
+        palavras = [_sem_acento(p) for p in palavras]
+        condicoes = []
+        for n, p in enumerate(palavras):
+            params[f"p{n}"] = f"%{p}%"
+            condicoes.append(f"{expr} LIKE :p{n}")
+        params["q"] = " ".join(palavras)
+        sql = (f"SELECT id FROM {tabela} t WHERE {' AND '.join(condicoes)} {filtro} "
+               f"ORDER BY similarity({expr}, :q) DESC, id LIMIT :limite")
+    else:
+        condicoes = []
+        for n, p in enumerate(palavras):
+            params[f"p{n}"] = f"%{p}%"
+            condicoes.append("(" + " OR ".join(f"lower({c}) LIKE :p{n}" for c in colunas) + ")")
+        sql = f"SELECT id FROM {tabela} t WHERE {' AND '.join(condicoes)} {filtro} ORDER BY id LIMIT :limite"
+    return list(db.session.execute(text(sql), params).scalars())
+
+
+def _por_ids(consulta, modelo, ids: list[int]) -> list:
+    """Rows of `consulta` for `ids`, in the order of `ids`."""
+    linhas = {ln.id: ln for ln in db.session.execute(consulta.where(modelo.id.in_(ids)))} if ids else {}
+    return [linhas[i] for i in ids if i in linhas]
+
+
+def buscar_clientes(termo: str, limite: int = LIMITE_PADRAO, somente_ativos: bool = True) -> list[dict]:
+    palavras = _palavras(termo)
+    if not palavras:
+        return []
+    ids = _ids_por_indice("clientes", ["nome", "telefone", "documento"], palavras,
+                          "AND t.ativo" if somente_ativos else "", _limite(limite))
+    linhas = _por_ids(select(Cliente.id, Cliente.nome, Cliente.telefone, Cliente.documento,
+                             Cliente.canal_preferencial, Cliente.tabela_preco), Cliente, ids)
+    return [
+        {"id": ln.id, "texto": ln.nome, "telefone": ln.telefone, "documento": ln.documento,
+         "canal": ln.canal_preferencial, "tabela_preco": ln.tabela_preco}
+        for ln in linhas
+    ]
+
+
+def buscar_produtos(termo: str, limite: int = LIMITE_PADRAO, somente_ativos: bool = True) -> list[dict]:
+    palavras = _palavras(termo)
+    if not palavras:
+        return []
+    ids = _ids_por_indice("produtos", ["nome", "sku"], palavras,
+                          "AND t.ativo" if somente_ativos else "", _limite(limite))
+    linhas = _por_ids(select(Produto.id, Produto.nome, Produto.sku,
+                             Produto.preco_varejo, Produto.preco_atacado), Produto, ids)
+    return [
+        {"id": ln.id, "texto": ln.nome, "sku": ln.sku,
+         "preco_varejo": str(ln.preco_varejo), "preco_atacado": str(ln.preco_atacado)}
+        for ln in linhas
+    ]
+
+
+def buscar_pedidos(termo: str, limite: int = LIMITE_PADRAO, **_) -> list[dict]:
+    """By order number: 'BD-0001' is a prefix, a bare number is that order (BD-000123)."""
+    termo = (termo or "").strip().upper()
+    if not termo:
+        return []
+    if termo.isdigit():
+        filtro = Pedido.numero_pedido == formatar_numero_pedido(int(termo))
+    else:
+        # Prefix as a range, served by the unique index on numero_pedido
+        if not (PREFIXO_PEDIDO.startswith(termo) or termo.startswith(PREFIXO_PEDIDO)):
+            return []
+        filtro = (Pedido.numero_pedido >= termo) & (Pedido.numero_pedido < termo + "\uffff")
+    linhas = db.session.execute(
+        select(Pedido.id, Pedido.numero_pedido, Cliente.nome, Pedido.status_pedido)
+        .join(Cliente, Cliente.id == Pedido.cliente_id)
+        .where(filtro)
+        .order_by(Pedido.numero_pedido.desc())
+        .limit(_limite(limite))
+    ).all()
+    return [{"id": ln.id, "texto": ln.numero_pedido, "cliente": ln.nome, "status": ln.status_pedido}
+            for ln in linhas]
+
+
+BUSCAS = {
+    "clientes": buscar_clientes,
+    "produtos": buscar_produtos,
+    "pedidos": buscar_pedidos,
+}
+
+
+def buscar(entidade: str, termo: str, limite: int = LIMITE_PADRAO, somente_ativos: bool = True) -> list[dict]:
+    """Best matches of `termo` for `entidade` ('clientes', 'produtos' or 'pedidos')."""
+    if entidade not in BUSCAS:
+        raise ValueError(f"Busca desconhecida: {entidade}")
+    return BUSCAS[entidade](termo, limite, somente_ativos=somente_ativos)
+
+
+MODELOS = {"clientes": Cliente, "produtos": Produto}
+
+
+def filtrar(entidade: str, termo: str, limite: int = LIMITE_MAXIMO) -> list:
+    """Model objects matching `termo` (active or not), best first — for list pages."""
+    modelo = MODELOS[entidade]
+    ids = [r["id"] for r in buscar(entidade, termo, limite, somente_ativos=False)]
+    objetos = {o.id: o for o in db.session.execute(
+        select(modelo).where(modelo.id.in_(ids))).scalars()} if ids else {}
+    return [objetos[i] for i in ids if i in objetos]
+
+
+def listar_pagina(entidade: str, cursor: str | None = None,
+                  limite: int = LIMITE_MAXIMO) -> tuple[list, str | None]:
+    """
+    Unfiltered list page: keyset pagination over (nome, id) ascending.
+    Returns (objetos, next_cursor); next_cursor is None on the last page.
+    """
+    modelo = MODELOS[entidade]
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    query = select(modelo).order_by(modelo.nome, modelo.id)
+    if cursor:
+        nome, _, ultimo_id = cursor.rpartition("|")  # '<nome>|<id>' of the last row shown
+        if ultimo_id.isdigit():
+            query = query.where(or_(modelo.nome > nome,
+                                    and_(modelo.nome == nome, modelo.id > int(ultimo_id))))
+    objetos = db.session.execute(query.limit(limite + 1)).scalars().all()
+    proximo = f"{objetos[limite - 1].nome}|{objetos[limite - 1].id}" if len(objetos) > limite else None
+    return list(objetos[:limite]), proximo
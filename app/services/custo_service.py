@@ -0,0 +1,229 @@
+"""
+custo_service.py
+================
+Recipe cost engine (Business Rules 1 & 2) — the single source of ficha costs.
+
+  - Costs are computed with the exact Decimal arithmetic of the original
+    FichaTecnica properties and cached per engine and ficha in this process,
+    keyed by `fichas_tecnicas.versao_custo`. Two databases served by one
+    process never share entries, and creating or dropping the schema clears
+    the cache (a recreated database restarts ids and versions at the same
+    values).
+  - Dependency graph insumo → ficha → produto: a session `after_flush` hook
+    bumps `versao_custo` only for the fichas affected by a change — an
+    Insumo price/pack-size change, a FichaTecnicaItem add/edit/delete or a
+    ficha header change. Because the version lives in the database, other
+    workers see the invalidation on their next read.
+  - PedidoItem/Pedido costs resolve produto → ficha through the same cache.
+"""
+from decimal import Decimal
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+from app.models.insumo import Insumo
+
+CAMPOS_INSUMO = ("preco_compra_embalagem", "peso_por_embalagem")
+CAMPOS_FICHA = ("rendimento_unidades", "mao_de_obra_total", "perdas_percentual")
+CAMPOS_ITEM = ("insumo_id", "quantidade_por_receita", "ficha_tecnica_id")
+
+# engine -> {ficha_id: (versao_custo, breakdown)}
+_caches: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def _cache(conn) -> dict[int, tuple[int, dict]]:
+    """Entries of the database behind `conn` (a Session or Connection)."""
+    if isinstance(conn, Connection):
+        engine = conn.engine
+    else:
+        engine = conn.bind if conn.bind is not None else db.engine
+    return _caches.setdefault(engine, {})
+
+
+def custo_unitario_insumo(preco_compra_embalagem, peso_por_embalagem) -> Decimal:
+    """Business Rule 1 — price_per_pack / weight_per_pack."""
+    if peso_por_embalagem and peso_por_embalagem != 0:
+        return Decimal(str(preco_compra_embalagem)) / Decimal(str(peso_por_embalagem))
+    return Decimal("0")
+
+
+def montar_custos(custo_total_insumos: Decimal, mao_de_obra_total,
+                  perdas_percentual, rendimento_unidades) -> dict:
+    """Business Rule 2 — recipe totals from the summed ingredient cost."""
+    base = custo_total_insumos + Decimal(str(mao_de_obra_total))
+    custo_total_receita = base * (1 + Decimal(str(perdas_percentual)) / 100)
+    if rendimento_unidades and Decimal(str(rendimento_unidades)) != 0:
+        custo_unitario = custo_total_receita / Decimal(str(rendimento_unidades))
+    else:
+        custo_unitario = Decimal("0")
+    return {
+        "custo_total_insumos": custo_total_insumos,
+        "custo_total_receita": custo_total_receita,
+        "custo_unitario": custo_unitario,
+    }
+
+
+def preco_sugerido(custo_unitario: Decimal, margem_desejada_percentual) -> Decimal:
+    """Business Rule 2 — custo_unitario / (1 - margem)."""
+    margem = Decimal(str(margem_desejada_percentual)) / 100
+    if margem >= 1:
+        return Decimal("0")
+    return custo_unitario / (1 - margem)
+
+
+def _calcular(conn, fichas) -> dict[int, dict]:
+    """Computes breakdowns for ficha header rows with one query over their itens."""
+    fichas = list(fichas)
+    insumos_por_ficha: dict[int, Decimal] = {f.id: Decimal("0") for f in fichas}
+    if not insumos_por_ficha:
+        return {}
+    linhas = conn.execute(
+        select(
+            FichaTecnicaItem.ficha_tecnica_id, FichaTecnicaItem.quantidade_por_receita,
+            Insumo.preco_compra_embalagem, Insumo.peso_por_embalagem,
+        )
+        .join(Insumo, Insumo.id == FichaTecnicaItem.insumo_id)
+        .where(FichaTecnicaItem.ficha_tecnica_id.in_(list(insumos_por_ficha)))
+    ).all()
+    for ln in linhas:
+        custo_item = (custo_unitario_insumo(ln.preco_compra_embalagem, ln.peso_por_embalagem)
+                      * Decimal(str(ln.quantidade_por_receita)))
+        insumos_por_ficha[ln.ficha_tecnica_id] += Decimal(str(custo_item))
+    return {
+        f.id: montar_custos(insumos_por_ficha[f.id], f.mao_de_obra_total,
+                            f.perdas_percentual, f.rendimento_unidades)
+        for f in fichas
+    }
+
+
+def custos_por_produto(conn, produto_ids) -> dict[int, dict]:
+    """
+    Cost breakdown per produto for many products: one header query, plus
+    one itens query for the fichas missing from (or stale in) the cache.
+    Products without a ficha are omitted. `conn` is a Session or Connection.
+    """
+    produto_ids = list(set(produto_ids))
+    if not produto_ids:
+        return {}
+    fichas = conn.execute(
+        select(
+            FichaTecnica.id, FichaTecnica.produto_id, FichaTecnica.versao_custo,
+            FichaTecnica.rendimento_unidades, FichaTecnica.mao_de_obra_total,
+            FichaTecnica.perdas_percentual,
+        ).where(FichaTecnica.produto_id.in_(produto_ids))
+    ).all()
+
+    cache = _cache(conn)
+    faltando = {f.id: f for f in fichas if cache.get(f.id, (None,))[0] != f.versao_custo}
+    for ficha_id, custos in _calcular(conn, faltando.values()).items():
+        cache[ficha_id] = (faltando[ficha_id].versao_custo, custos)
+    return {f.produto_id: cache[f.id][1] for f in fichas}
+
+
+def custos_unitarios_por_produto(conn, produto_ids) -> dict[int, Decimal]:
+    """Unit cost per produto (see custos_por_produto)."""
+    return {pid: c["custo_unitario"] for pid, c in custos_por_produto(conn, produto_ids).items()}
+
+
+def custos_fichas(session: Session, fichas) -> dict[int, dict]:
+    """
+    Cost breakdown per ficha id for already-loaded FichaTecnica objects:
+    no query when every cached version is current, otherwise one itens
+    query for the misses.
+    """
+    if session.autoflush and (session.new or session.dirty or session.deleted):
+        session.flush()  # pending edits bump versao_custo, as a query would
+    cache = _cache(session)
+    resultado: dict[int, dict] = {}
+    faltando: dict[int, FichaTecnica] = {}
+    for ficha in fichas:
+        cached = cache.get(ficha.id)
+        if cached and cached[0] == ficha.versao_custo:
+            resultado[ficha.id] = cached[1]
+        else:
+            faltando[ficha.id] = ficha
+    for ficha_id, custos in _calcular(session, faltando.values()).items():
+        cache[ficha_id] = (faltando[ficha_id].versao_custo, custos)
+        resultado[ficha_id] = custos
+    return resultado
+
+
+def custos_ficha(ficha: FichaTecnica) -> dict:
+    """Cost breakdown of one ficha; no query when the cached version is current."""
+    session = object_session(ficha)
+    if session is None or ficha.id is None or ficha in session.new:
+        return ficha.calcular_custos()  # not persisted yet: walk the recipe
+    return custos_fichas(session, [ficha])[ficha.id]
+
+
+def invalidar(ficha_ids=None) -> None:
+    """Drops local cache entries of every database (all when ficha_ids is None)."""
+    for cache in list(_caches.values()):
+        if ficha_ids is None:
+            cache.clear()
+        for ficha_id in ficha_ids or ():
+            cache.pop(ficha_id, None)
+
+
+def _fichas_afetadas(session: Session) -> set[int]:
+    fichas: set[int] = set()
+    insumos: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        estado = inspect(obj)
+        if isinstance(obj, Insumo):
+            if obj in session.deleted or any(estado.attrs[c].history.has_changes() for c in CAMPOS_INSUMO):
+                insumos.add(obj.id)
+        elif isinstance(obj, FichaTecnicaItem):
+            if (obj in session.new or obj in session.deleted
+                    or any(estado.attrs[c].history.has_changes() for c in CAMPOS_ITEM)):
+                hist = estado.attrs.ficha_tecnica_id.history
+                fichas.update(v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v)
+        elif isinstance(obj, FichaTecnica) and obj not in session.new and obj not in session.deleted:
+            if any(estado.attrs[c].history.has_changes() for c in CAMPOS_FICHA):
+                fichas.add(obj.id)
+    if insumos:
+        fichas.update(session.connection().execute(
+            select(FichaTecnicaItem.ficha_tecnica_id).distinct()
+            .where(FichaTecnicaItem.insumo_id.in_(insumos))
+        ).scalars())
+    return fichas
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidar_custos(session: Session, flush_context) -> None:
+    fichas = _fichas_afetadas(session)
+    if not fichas:
+        return
+    session.connection().execute(
+        update(FichaTecnica.__table__)
+        .where(FichaTecnica.__table__.c.id.in_(fichas))
+        .values(versao_custo=FichaTecnica.__table__.c.versao_custo + 1)
+    )
+    invalidar(fichas)
+    session.info.setdefault("_custos_expirar", set()).update(fichas)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expirar_versoes(session: Session, flush_context) -> None:
+    for ficha_id in session.info.pop("_custos_expirar", ()):
+        ficha = session.identity_map.get(identity_key(FichaTecnica, ficha_id))
+        if ficha is not None:
+            session.expire(ficha, ["versao_custo", "ultima_atualizacao"])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_cache(session: Session, previous_transaction) -> None:
+    # Entries may have been computed from rows that were just rolled back
+    # (and whose ids/versions can be reused), so start over.
+    if previous_transaction.parent is None:
+        invalidar()
+
+
+@event.listens_for(db.metadata, "after_create")
+@event.listens_for(db.metadata, "after_drop")
+def _esquecer_banco(target, connection, **kw) -> None:
+    _caches.pop(connection.engine, None)
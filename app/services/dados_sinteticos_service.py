@@ -0,0 +1,324 @@
+"""
+dados_sinteticos_service.py
+===========================
+Deterministic synthetic dataset for capacity and load testing
+(`flask seed-scale`).
+
+  - Everything comes from one `random.Random(semente)` and a reference
+    date, so the same (semente, escala, referencia) always yields the same
+    rows. Primary keys are assigned here (after the current max id), which
+    keeps the data reproducible and lets rows be written without a
+    RETURNING round trip.
+  - Rows are generated and written in chunks, never held all at once:
+    COPY ... FROM STDIN on PostgreSQL (psycopg2), executemany INSERT elsewhere.
+  - The writes bypass the ORM, so every derived value is computed here with
+    the same rules as the services: order totals and custo_estimado
+    (totais_service / custo_service), status_pagamento (Business Rule 4),
+    production deductions through the fichas (pedido_service) and an
+    Insumo.estoque_atual equal to the sum of its ledger movements.
+  - Roughly 11 000 rows per unit of scale (most of them stock movements);
+    escala 900 ≈ 10 million rows.
+Nothing here commits: the caller does.
+"""
+import csv
+import io
+import math
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text, update, delete, bindparam
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.insumo import Insumo
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+from app.models.compra_insumo import CompraInsumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.despesa import Despesa
+from app.models.resumo_mensal import ResumoMensal
+from app.models.saldo_estoque import SaldoEstoque
+from app.services.custo_service import custos_unitarios_por_produto
+from app.services.sequencia_service import reservar, formatar_numero_pedido, SEQUENCIA_PEDIDO
+
+# Rows per unit of scale (catalog tables grow with the square root)
+CLIENTES_POR_ESCALA = 20
+PEDIDOS_POR_ESCALA = 1000
+COMPRAS_POR_ESCALA = 100
+DESPESAS_POR_ESCALA = 50
+DIAS_HISTORICO = 365
+PEDIDOS_POR_LOTE = 5000
+
+NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela",
+         "João", "Larissa", "Marcos", "Natália", "Otávio", "Patrícia", "Rafael", "Sofia", "Tiago"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Rodrigues",
+              "Almeida", "Nascimento", "Araújo", "Ribeiro", "Carvalho", "Gomes", "Martins"]
+SABORES = ["Tradicional", "Meio Amargo", "Nutella", "Doce de Leite", "Pistache", "Ninho",
+           "Oreo", "Maracujá", "Café", "Caramelo Salgado", "Frutas Vermelhas", "Coco"]
+INSUMOS = ["Chocolate 70%", "Chocolate ao Leite", "Manteiga", "Açúcar", "Farinha", "Ovos",
+           "Cacau em Pó", "Leite Condensado", "Creme de Leite", "Nozes", "Embalagem", "Etiqueta"]
+STATUS_PEDIDO = ["Rascunho", "Agendado", "Em produção", "Pronto",
+                 "Entregue", "Entregue", "Entregue", "Entregue", "Cancelado"]
+PRODUZIDOS = {"Em produção", "Pronto", "Entregue"}
+FORMAS_PAGAMENTO = ["PIX", "PIX", "PIX", "Dinheiro", "Cartão", "Transferência"]
+CATEGORIAS_DESPESA = ["Insumos", "Embalagens", "Entregas", "Marketing", "Aluguel", "Água", "Luz", "Outros"]
+CENTAVO = Decimal("0.01")
+
+
+def _dinheiro(rnd: random.Random, minimo: float, maximo: float) -> Decimal:
+    return Decimal(rnd.randint(int(minimo * 100), int(maximo * 100))) / 100
+
+
+class _Gravador:
+    """Bulk writer: COPY on PostgreSQL, executemany INSERT elsewhere."""
+
+    def __init__(self, session):
+        self.conn = session.connection()
+        self.copy = self.conn.dialect.name == "postgresql"
+        self.linhas = 0
+
+    def gravar(self, modelo, colunas: tuple[str, ...], linhas: list[tuple]) -> None:
+        if not linhas:
+            return
+        self.linhas += len(linhas)
+        tabela = modelo.__table__
+        if not self.copy:
+            self.conn.execute(insert(tabela), [dict(zip(colunas, ln)) for ln in linhas])
+            return
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for ln in linhas:
+            escritor.writerow(["" if v is None else v.isoformat() if isinstance(v, (date, datetime)) else v
+                               for v in ln])
+        buffer.seek(0)
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+    def ajustar_sequencias(self, modelos) -> None:
+        """Moves PostgreSQL serial sequences past the explicit ids."""
+        if not self.copy:
+            return
+        for modelo in modelos:
+            nome = modelo.__table__.name
+            self.conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{nome}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {nome}))"
+            ))
+
+
+def _proximo_id(modelo) -> int:
+    return (db.session.execute(select(func.max(modelo.id))).scalar() or 0) + 1
+
+
+def gerar_dados(semente: int, escala: int, referencia: date | None = None) -> dict[str, int]:
+    """
+    Appends a synthetic dataset of size `escala` (>= 1) with history up to
+    `referencia` (default today, orders up to two weeks after it).
+    Returns the number of rows written per table.
+    """
+    if escala < 1:
+        raise ValueError("escala deve ser >= 1")
+    rnd = random.Random(semente)
+    referencia = referencia or date.today()
+    agora = datetime.combine(referencia, time(12), tzinfo=timezone.utc)
+    gravador = _Gravador(db.session)
+    contagem: dict[str, int] = {}
+    catalogo = max(1, round(math.sqrt(escala)))
+
+    # ---- Catalog: clientes, insumos, produtos, fichas ----
+    primeiro = _proximo_id(Cliente)
+    clientes = []
+    for n in range(CLIENTES_POR_ESCALA * escala):
+        b2b = rnd.random() < 0.2
+        nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+        clientes.append((
+            primeiro + n, f"{nome} Ltda" if b2b else nome, "Empresa" if b2b else "Pessoa",
+            "B2B" if b2b else "B2C", f"(11) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}",
+            f"Rua {rnd.choice(SOBRENOMES)}, {rnd.randint(1, 2000)}", f"{rnd.randint(0, 99999999999):011d}",
+            "Atacado" if b2b else "Varejo", 30 if b2b else 0, True, agora, agora,
+        ))
+    gravador.gravar(Cliente, ("id", "nome", "tipo", "canal_preferencial", "telefone", "endereco",
+                              "documento", "tabela_preco", "prazo_pagamento_dias", "ativo",
+                              "created_at", "updated_at"), clientes)
+    contagem["clientes"] = len(clientes)
+
+    primeiro = _proximo_id(Insumo)
+    insumos = [
+        (primeiro + n, f"{INSUMOS[n % len(INSUMOS)]} #{n // len(INSUMOS) + 1}", "g", 1,
+         1000, _dinheiro(rnd, 8, 90), 0, 2, True, True, agora, agora)
+        for n in range(len(INSUMOS) * catalogo)
+    ]
+    gravador.gravar(Insumo, ("id", "nome", "unidade", "quantidade_embalagem_compra", "peso_por_embalagem",
+                             "preco_compra_embalagem", "estoque_atual", "estoque_minimo",
+                             "minimo_em_embalagem", "ativo", "created_at", "updated_at"), insumos)
+    insumo_ids = [i[0] for i in insumos]
+    contagem["insumos"] = len(insumos)
+
+    primeiro = _proximo_id(Produto)
+    sufixo = _proximo_id(Produto)  # keeps SKUs unique across repeated loads
+    produtos = []
+    for n in range(len(SABORES) * catalogo):
+        varejo = _dinheiro(rnd, 9, 25)
+        produtos.append((primeiro + n, f"Brownie {SABORES[n % len(SABORES)]} #{n // len(SABORES) + 1}",
+                         f"SC-{sufixo + n:06d}", "Brownie", "un", varejo,
+                         (varejo * Decimal("0.75")).quantize(CENTAVO), True, agora, agora))
+    gravador.gravar(Produto, ("id", "nome", "sku", "categoria", "unidade_venda", "preco_varejo",
+                              "preco_atacado", "ativo", "created_at", "updated_at"), produtos)
+    contagem["produtos"] = len(produtos)
+
+    primeira_ficha, primeiro_item = _proximo_id(FichaTecnica), _proximo_id(FichaTecnicaItem)
+    fichas, itens_ficha = [], []
+    receitas: dict[int, list[tuple[int, Decimal]]] = {}  # produto_id -> [(insumo_id, qtd por unidade)]
+    for n, produto in enumerate(produtos):
+        ficha_id, rendimento = primeira_ficha + n, Decimal(rnd.choice([12, 16, 20, 24]))
+        fichas.append((ficha_id, produto[0], rendimento, _dinheiro(rnd, 5, 30), Decimal(rnd.randint(0, 8)),
+                       60, 0, agora))
+        receitas[produto[0]] = []
+        for insumo_id in rnd.sample(insumo_ids, min(len(insumo_ids), rnd.randint(3, 6))):
+            por_receita = Decimal(rnd.randint(20, 600))
+            itens_ficha.append((primeiro_item + len(itens_ficha), ficha_id, insumo_id, por_receita, "Insumo"))
+            receitas[produto[0]].append((insumo_id, por_receita / rendimento))
+    gravador.gravar(FichaTecnica, ("id", "produto_id", "rendimento_unidades", "mao_de_obra_total",
+                                   "perdas_percentual", "margem_desejada_percentual", "versao_custo",
+                                   "ultima_atualizacao"), fichas)
+    gravador.gravar(FichaTecnicaItem, ("id", "ficha_tecnica_id", "insumo_id", "quantidade_por_receita",
+                                       "tipo_item"), itens_ficha)
+    contagem["fichas_tecnicas"], contagem["ficha_itens"] = len(fichas), len(itens_ficha)
+    custos = custos_unitarios_por_produto(db.session, [p[0] for p in produtos])
+
+    # ---- Orders, itens, pagamentos and production movements, in chunks ----
+    total_pedidos = PEDIDOS_POR_ESCALA * escala
+    numeros = reservar(SEQUENCIA_PEDIDO, total_pedidos)
+    ids = {m: _proximo_id(m) for m in (Pedido, PedidoItem, Pagamento, MovimentacaoEstoque)}
+    saidas: dict[int, Decimal] = {i: Decimal("0") for i in insumo_ids}
+    for campo in ("pedidos", "pedido_itens", "pagamentos", "movimentacoes_estoque"):
+        contagem[campo] = 0
+
+    for inicio_lote in range(0, total_pedidos, PEDIDOS_POR_LOTE):
+        pedidos, itens, pagamentos, movimentos = [], [], [], []
+        for n in range(inicio_lote, min(inicio_lote + PEDIDOS_POR_LOTE, total_pedidos)):
+            cliente = rnd.choice(clientes)
+            atacado = cliente[7] == "Atacado"
+            agendado = referencia - timedelta(days=rnd.randint(-14, DIAS_HISTORICO))
+            status = rnd.choice(STATUS_PEDIDO) if agendado <= referencia else rnd.choice(["Rascunho", "Agendado"])
+            pedido_id = ids[Pedido] + n
+            entrega = rnd.random() < 0.4
+            taxa_entrega = Decimal(rnd.choice([8, 10, 15])) if entrega else Decimal("0")
+            desconto = Decimal(rnd.choice([0, 0, 0, 5, 10]))
+
+            subtotal, custo, consumo = Decimal("0"), Decimal("0"), {}
+            for _ in range(rnd.randint(1, 4)):
+                produto = rnd.choice(produtos)
+                quantidade = Decimal(rnd.randint(20, 200) if atacado else rnd.randint(1, 12))
+                preco = produto[6] if atacado else produto[5]
+                itens.append((ids[PedidoItem] + len(itens) + contagem["pedido_itens"], pedido_id,
+                              produto[0], quantidade, preco))
+                subtotal += quantidade * preco
+                custo += custos.get(produto[0], Decimal("0")) * quantidade
+                for insumo_id, por_unidade in receitas[produto[0]]:
+                    consumo[insumo_id] = consumo.get(insumo_id, Decimal("0")) + por_unidade * quantidade
+            total = subtotal - desconto + taxa_entrega
+
+            recebido, taxa_cartao = Decimal("0"), Decimal("0")
+            if status in PRODUZIDOS and rnd.random() < 0.9:
+                valor = total if rnd.random() < 0.85 else (total / 2).quantize(CENTAVO)
+                forma = rnd.choice(FORMAS_PAGAMENTO)
+                taxa = (valor * Decimal("0.0299")).quantize(CENTAVO) if forma == "Cartão" else Decimal("0")
+                pagamentos.append((ids[Pagamento] + len(pagamentos) + contagem["pagamentos"], pedido_id,
+                                   agendado, forma, valor, taxa, None, agora))
+                recebido, taxa_cartao = valor, taxa
+            status_pagamento = ("Não pago" if recebido <= 0 else "Parcial" if recebido < total else "Pago")
+
+            if status in PRODUZIDOS:
+                instante = datetime.combine(agendado, time(7), tzinfo=timezone.utc)
+                for insumo_id, quantidade in sorted(consumo.items()):
+                    quantidade = quantidade.quantize(CENTAVO)
+                    saidas[insumo_id] += quantidade
+                    movimentos.append((ids[MovimentacaoEstoque] + len(movimentos) + contagem["movimentacoes_estoque"],
+                                       instante, "Saida", "Producao", insumo_id, -quantidade, pedido_id, None,
+                                       f"Produção {formatar_numero_pedido(numeros[n])}"))
+
+            pedidos.append((
+                pedido_id, formatar_numero_pedido(numeros[n]), cliente[0], None, cliente[3],
+                min(agendado, referencia), datetime.combine(agendado, time(rnd.randint(9, 19)), tzinfo=timezone.utc),
+                "Entrega" if entrega else "Retirada", cliente[5] if entrega else None, status, status_pagamento,
+                desconto, taxa_entrega, None, subtotal, total, recebido, custo + taxa_cartao, agora, agora,
+            ))
+
+        gravador.gravar(Pedido, ("id", "numero_pedido", "cliente_id", "created_by", "canal", "data_pedido",
+                                 "data_hora_agendada", "tipo_entrega", "endereco_entrega", "status_pedido",
+                                 "status_pagamento", "desconto", "taxa_entrega", "observacoes", "subtotal",
+                                 "total_pedido", "soma_recebida", "custo_estimado", "created_at",
+                                 "updated_at"), pedidos)
+        gravador.gravar(PedidoItem, ("id", "pedido_id", "produto_id", "quantidade", "preco_unitario"), itens)
+        gravador.gravar(Pagamento, ("id", "pedido_id", "data_recebimento", "forma_pagamento", "valor_recebido",
+                                    "taxa_cartao", "observacoes", "created_at"), pagamentos)
+        gravador.gravar(MovimentacaoEstoque, ("id", "data", "tipo", "origem", "insumo_id", "quantidade",
+                                              "pedido_id", "compra_id", "observacoes"), movimentos)
+        contagem["pedidos"] += len(pedidos)
+        contagem["pedido_itens"] += len(itens)
+        contagem["pagamentos"] += len(pagamentos)
+        contagem["movimentacoes_estoque"] += len(movimentos)
+
+    # ---- Purchases sized to cover production, with their 'Entrada' movements ----
+    primeira_compra = _proximo_id(CompraInsumo)
+    total_compras = max(COMPRAS_POR_ESCALA * escala, len(insumo_ids))
+    compras, movimentos = [], []
+    entradas: dict[int, Decimal] = {i: Decimal("0") for i in insumo_ids}
+    por_insumo = {i: 0 for i in insumo_ids}
+    for n in range(total_compras):
+        por_insumo[insumo_ids[n % len(insumo_ids)]] += 1
+    for n in range(total_compras):
+        insumo = insumos[n % len(insumos)]
+        quantidade = ((saidas[insumo[0]] * Decimal("1.2") + 5000) / por_insumo[insumo[0]]).quantize(CENTAVO)
+        dia = referencia - timedelta(days=rnd.randint(0, DIAS_HISTORICO))
+        compra_id = primeira_compra + n
+        compras.append((compra_id, dia, f"Fornecedor {rnd.choice(SOBRENOMES)}", insumo[0], quantidade,
+                        (quantidade / 1000 * insumo[5]).quantize(CENTAVO), None, agora))
+        movimentos.append((ids[MovimentacaoEstoque] + contagem["movimentacoes_estoque"] + n,
+                           datetime.combine(dia, time(8), tzinfo=timezone.utc), "Entrada", "Compra",
+                           insumo[0], quantidade, None, compra_id, "Compra (carga sintética)"))
+        entradas[insumo[0]] += quantidade
+    gravador.gravar(CompraInsumo, ("id", "data_compra", "fornecedor", "insumo_id", "quantidade_comprada",
+                                   "custo_total", "observacoes", "created_at"), compras)
+    gravador.gravar(MovimentacaoEstoque, ("id", "data", "tipo", "origem", "insumo_id", "quantidade",
+                                          "pedido_id", "compra_id", "observacoes"), movimentos)
+    contagem["compras_insumos"] = len(compras)
+    contagem["movimentacoes_estoque"] += len(movimentos)
+
+    # Stock = ledger sum
+    db.session.execute(
+        update(Insumo.__table__).where(Insumo.__table__.c.id == bindparam("b_id"))
+        .values(estoque_atual=bindparam("estoque")),
+        [{"b_id": i, "estoque": entradas[i] - saidas[i]} for i in insumo_ids],
+    )
+
+    primeira_despesa = _proximo_id(Despesa)
+    despesas = [
+        (primeira_despesa + n, referencia - timedelta(days=rnd.randint(0, DIAS_HISTORICO)),
+         rnd.choice(CATEGORIAS_DESPESA), f"Despesa sintética {n + 1}", _dinheiro(rnd, 20, 900),
+         rnd.choice(FORMAS_PAGAMENTO), False, None, agora)
+        for n in range(DESPESAS_POR_ESCALA * escala)
+    ]
+    gravador.gravar(Despesa, ("id", "data", "categoria", "descricao", "valor", "forma_pagamento",
+                              "recorrente", "observacoes", "created_at"), despesas)
+    contagem["despesas"] = len(despesas)
+
+    gravador.ajustar_sequencias([Cliente, Insumo, Produto, FichaTecnica, FichaTecnicaItem, CompraInsumo,
+                                 MovimentacaoEstoque, Pedido, PedidoItem, Pagamento, Despesa])
+    # Core inserts skip estoque_service's hook: drop the stock snapshots the
+    # backdated movements invalidate, as it would
+    primeiro = db.session.execute(
+        select(func.min(MovimentacaoEstoque.data)).where(MovimentacaoEstoque.id >= ids[MovimentacaoEstoque])
+    ).scalar()
+    if primeiro is not None:
+        db.session.execute(delete(SaldoEstoque).where(SaldoEstoque.data > primeiro.date()))
+    # Monthly rollups of the loaded history are stale
+    tabela = ResumoMensal.__table__
+    db.session.execute(update(tabela).values(sujo=True, geracao=tabela.c.geracao + 1))
+    return contagem
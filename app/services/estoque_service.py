@@ -0,0 +1,191 @@
+"""
+estoque_service.py
+==================
+Stock ledger (`movimentacoes_estoque`) with periodic balance snapshots.
+
+  - Every change to Insumo.estoque_atual goes through `movimentar` (or the
+    set-based production deduction), so the ledger sum equals the stock.
+  - `saldos_estoque` holds one balance per insumo at the start of each
+    month; `estoque_em` answers "stock of X at D" from the nearest snapshot
+    plus a range scan of at most one month of movements
+    (index on insumo_id, data).
+  - A movement dated before an existing snapshot drops the snapshots after
+    it (session `after_flush` hook); `flask estoque-snapshots` rebuilds them
+    and `--conciliar` books opening balances for pre-ledger stock.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import event, select, update, delete, insert, func
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.insumo import Insumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.models.saldo_estoque import SaldoEstoque
+
+
+def _instante(dia: date) -> datetime:
+    return datetime.combine(dia, time.min, tzinfo=timezone.utc)
+
+
+def _inicio_mes(dia: date) -> date:
+    return dia.replace(day=1)
+
+
+def _proximo_mes(dia: date) -> date:
+    return date(dia.year + 1, 1, 1) if dia.month == 12 else date(dia.year, dia.month + 1, 1)
+
+
+def movimentar(insumo: Insumo, quantidade, tipo: str, origem: str, **campos) -> MovimentacaoEstoque:
+    """
+    Applies `quantidade` (positive = in, negative = out) to the insumo's
+    stock and records the ledger row. Extra fields (pedido_id, compra_id,
+    observacoes, data) go to the MovimentacaoEstoque.
+    """
+    quantidade = Decimal(str(quantidade))
+    insumo.estoque_atual = Decimal(str(insumo.estoque_atual or 0)) + quantidade
+    mov = MovimentacaoEstoque(tipo=tipo, origem=origem, insumo_id=insumo.id,
+                              quantidade=quantidade, **campos)
+    db.session.add(mov)
+    return mov
+
+
+def registrar_saldo_inicial(insumo: Insumo) -> MovimentacaoEstoque | None:
+    """Opening-balance movement for an insumo created with stock (needs insumo.id)."""
+    saldo = Decimal(str(insumo.estoque_atual or 0))
+    if saldo == 0:
+        return None
+    insumo.estoque_atual = Decimal("0")
+    return movimentar(insumo, saldo, "Ajuste", "Manual", observacoes="Saldo inicial")
+
+
+def estornar_compra(compra) -> MovimentacaoEstoque:
+    """
+    Reverses a purchase's stock before it is deleted. The original entry
+    stays in the ledger (unlinked from the compra, which is going away).
+    """
+    db.session.execute(
+        update(MovimentacaoEstoque)
+        .where(MovimentacaoEstoque.compra_id == compra.id)
+        .values(compra_id=None)
+    )
+    return movimentar(
+        compra.insumo, -Decimal(str(compra.quantidade_comprada)), "Saida", "Compra",
+        observacoes=f"Estorno da compra #{compra.id} de {compra.data_compra:%d/%m/%Y}"
+                    f" ({compra.fornecedor or 'fornecedor desconhecido'})",
+    )
+
+
+def estoque_em(insumo_id: int, momento: date | datetime) -> Decimal:
+    """
+    Ledger balance of an insumo at `momento` (a date means end of that day):
+    nearest snapshot at or before it plus the movements since.
+    """
+    if not isinstance(momento, datetime):
+        momento = _instante(momento + timedelta(days=1))
+    snapshot = db.session.execute(
+        select(SaldoEstoque.data, SaldoEstoque.saldo)
+        .where(SaldoEstoque.insumo_id == insumo_id, SaldoEstoque.data <= momento.date())
+        .order_by(SaldoEstoque.data.desc())
+        .limit(1)
+    ).first()
+    filtro = [MovimentacaoEstoque.insumo_id == insumo_id, MovimentacaoEstoque.data < momento]
+    if snapshot:
+        filtro.append(MovimentacaoEstoque.data >= _instante(snapshot.data))
+    movido = db.session.execute(select(func.sum(MovimentacaoEstoque.quantidade)).where(*filtro)).scalar()
+    base = Decimal(str(snapshot.saldo)) if snapshot else Decimal("0")
+    return base + Decimal(str(movido or 0))
+
+
+def gerar_snapshots(desde: date | None = None, ate: date | None = None) -> int:
+    """
+    Writes month-start snapshots up to `ate` (default: this month),
+    continuing from the latest one; with `desde`, snapshots from that month
+    on are dropped and rebuilt. One range-scan aggregate per month.
+    Returns the number of snapshot rows written. The caller commits.
+    """
+    ate = _inicio_mes(ate or date.today())
+    if desde:
+        db.session.execute(delete(SaldoEstoque).where(SaldoEstoque.data >= _inicio_mes(desde)))
+
+    ultimo = db.session.execute(select(func.max(SaldoEstoque.data))).scalar()
+    if ultimo:
+        saldos = {
+            ln.insumo_id: Decimal(str(ln.saldo))
+            for ln in db.session.execute(
+                select(SaldoEstoque.insumo_id, SaldoEstoque.saldo).where(SaldoEstoque.data == ultimo)
+            )
+        }
+        mes = _proximo_mes(ultimo)
+    else:
+        primeira = db.session.execute(select(func.min(MovimentacaoEstoque.data))).scalar()
+        if primeira is None:
+            return 0
+        saldos = {}
+        mes = _proximo_mes(primeira.date())
+
+    escritos = 0
+    anterior = ultimo
+    while mes <= ate:
+        filtro = [MovimentacaoEstoque.data < _instante(mes)]
+        if anterior:
+            filtro.append(MovimentacaoEstoque.data >= _instante(anterior))
+        for insumo_id, soma in db.session.execute(
+            select(MovimentacaoEstoque.insumo_id, func.sum(MovimentacaoEstoque.quantidade))
+            .where(*filtro).group_by(MovimentacaoEstoque.insumo_id)
+        ):
+            saldos[insumo_id] = saldos.get(insumo_id, Decimal("0")) + Decimal(str(soma))
+        if saldos:
+            db.session.execute(insert(SaldoEstoque), [
+                {"insumo_id": insumo_id, "data": mes, "saldo": saldo}
+                for insumo_id, saldo in saldos.items()
+            ])
+            escritos += len(saldos)
+        anterior, mes = mes, _proximo_mes(mes)
+    return escritos
+
+
+def divergencias() -> list[tuple[Insumo, Decimal]]:
+    """Insumos whose estoque_atual differs from their ledger sum → (insumo, ledger sum)."""
+    soma = (
+        select(MovimentacaoEstoque.insumo_id, func.sum(MovimentacaoEstoque.quantidade).label("soma"))
+        .group_by(MovimentacaoEstoque.insumo_id).subquery()
+    )
+    linhas = db.session.execute(
+        select(Insumo, func.coalesce(soma.c.soma, 0))
+        .outerjoin(soma, soma.c.insumo_id == Insumo.id)
+        .order_by(Insumo.nome)
+    ).all()
+    return [(ins, Decimal(str(s))) for ins, s in linhas
+            if Decimal(str(ins.estoque_atual)) != Decimal(str(s))]
+
+
+def conciliar() -> int:
+    """
+    Brings the ledger in line with estoque_atual (stock set before the
+    ledger was complete) with one 'Ajuste' movement per divergent insumo.
+    """
+    ajustes = divergencias()
+    for insumo, soma in ajustes:
+        db.session.add(MovimentacaoEstoque(
+            tipo="Ajuste", origem="Manual", insumo_id=insumo.id,
+            quantidade=Decimal(str(insumo.estoque_atual)) - soma,
+            observacoes="Conciliação do razão de estoque",
+        ))
+    return len(ajustes)
+
+
+@event.listens_for(Session, "after_flush")
+def _descartar_snapshots(session: Session, flush_context) -> None:
+    # Snapshots only exist up to today's 00:00, so only backdated movements
+    # matter. Later snapshots are dropped for every insumo, which keeps the
+    # latest snapshot month complete for gerar_snapshots to continue from.
+    limite = _instante(date.today())
+    dias = []
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, MovimentacaoEstoque) and obj.data is not None:
+            data = obj.data if obj.data.tzinfo else obj.data.replace(tzinfo=timezone.utc)
+            if data < limite:
+                dias.append(data.date())
+    if dias:
+        session.connection().execute(delete(SaldoEstoque).where(SaldoEstoque.data > min(dias)))
@@ -0,0 +1,147 @@
+"""
+exportacao_service.py
+=====================
+Streaming CSV / JSONL dumps of pedidos, pagamentos, despesas and
+movimentações de estoque (for the accountant).
+
+  - Each export is a single Core SELECT of plain columns — no ORM objects —
+    executed with `yield_per`, which uses a server-side cursor on
+    PostgreSQL; rows are encoded and handed out in small batches, so
+    memory stays flat whatever the row count.
+  - Date-range filters are half-open [de, ate + 1 day) on an indexed
+    column of each table.
+  - Pedido totals come from the persisted columns (totais_service).
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import select
+from app.extensions import db
+from app.models.pedido import Pedido
+from app.models.cliente import Cliente
+from app.models.pagamento import Pagamento
+from app.models.despesa import Despesa
+from app.models.insumo import Insumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+
+LINHAS_POR_LOTE = 1000
+FORMATOS = ("csv", "jsonl")
+
+
+def _consulta_pedidos():
+    return select(
+        Pedido.id, Pedido.numero_pedido, Cliente.nome.label("cliente"), Pedido.canal,
+        Pedido.data_pedido, Pedido.data_hora_agendada, Pedido.tipo_entrega,
+        Pedido.status_pedido, Pedido.status_pagamento, Pedido.subtotal, Pedido.desconto,
+        Pedido.taxa_entrega, Pedido.total_pedido, Pedido.soma_recebida, Pedido.custo_estimado,
+        (Pedido.total_pedido - Pedido.custo_estimado).label("lucro_estimado"),
+    ).join(Cliente, Cliente.id == Pedido.cliente_id), Pedido.data_pedido, Pedido.id
+
+
+def _consulta_pagamentos():
+    return select(
+        Pagamento.id, Pedido.numero_pedido, Pagamento.data_recebimento, Pagamento.forma_pagamento,
+        Pagamento.valor_recebido, Pagamento.taxa_cartao, Pagamento.observacoes,
+    ).join(Pedido, Pedido.id == Pagamento.pedido_id), Pagamento.data_recebimento, Pagamento.id
+
+
+def _consulta_despesas():
+    return select(
+        Despesa.id, Despesa.data, Despesa.categoria, Despesa.descricao, Despesa.valor,
+        Despesa.forma_pagamento, Despesa.recorrente, Despesa.observacoes,
+    ), Despesa.data, Despesa.id
+
+
+def _consulta_movimentacoes():
+    return select(
+        MovimentacaoEstoque.id, MovimentacaoEstoque.data, MovimentacaoEstoque.tipo,
+        MovimentacaoEstoque.origem, Insumo.nome.label("insumo"), Insumo.unidade,
+        MovimentacaoEstoque.quantidade, Pedido.numero_pedido, MovimentacaoEstoque.compra_id,
+        MovimentacaoEstoque.observacoes,
+    ).join(Insumo, Insumo.id == MovimentacaoEstoque.insumo_id).outerjoin(
+        Pedido, Pedido.id == MovimentacaoEstoque.pedido_id
+    ), MovimentacaoEstoque.data, MovimentacaoEstoque.id
+
+
+# nome → builder returning (select, indexed date column, tiebreak column)
+EXPORTACOES = {
+    "pedidos": _consulta_pedidos,
+    "pagamentos": _consulta_pagamentos,
+    "despesas": _consulta_despesas,
+    "movimentacoes": _consulta_movimentacoes,
+}
+
+
+def _limite(coluna, dia: date):
+    """Bound for `coluna`: a date, or 00:00 UTC of that day for timestamp columns."""
+    if isinstance(coluna.type, db.DateTime):
+        return datetime.combine(dia, time.min, tzinfo=timezone.utc)
+    return dia
+
+
+def linhas_exportacao(nome: str, de: date | None = None, ate: date | None = None):
+    """
+    Returns (cabecalho, rows) for export `nome`; rows is a lazy iterator
+    of tuples streamed from the database. `de`/`ate` are inclusive days.
+    """
+    if nome not in EXPORTACOES:
+        raise ValueError(f"Exportação desconhecida: {nome}")
+    consulta, coluna_data, desempate = EXPORTACOES[nome]()
+    if de:
+        consulta = consulta.where(coluna_data >= _limite(coluna_data, de))
+    if ate:
+        consulta = consulta.where(coluna_data < _limite(coluna_data, ate + timedelta(days=1)))
+    consulta = consulta.order_by(coluna_data, desempate)
+    resultado = db.session.execute(consulta.execution_options(yield_per=LINHAS_POR_LOTE))
+    return list(resultado.keys()), (tuple(r) for r in resultado)
+
+
+def _texto(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def _json(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)  # exact; money must not go through float
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} não serializável")
+
+
+def gerar_csv(cabecalho: list[str], linhas, lote: int = 500):
+    """Yields CSV text in batches of `lote` rows (header first)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalho)
+    for n, linha in enumerate(linhas, start=1):
+        escritor.writerow([_texto(v) for v in linha])
+        if n % lote == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gerar_jsonl(cabecalho: list[str], linhas, lote: int = 500):
+    """Yields JSON Lines text (one object per row) in batches of `lote` rows."""
+    partes = []
+    for linha in linhas:
+        partes.append(json.dumps(dict(zip(cabecalho, linha)), default=_json, ensure_ascii=False))
+        if len(partes) == lote:
+            yield "\n".join(partes) + "\n"
+            partes = []
+    if partes:
+        yield "\n".join(partes) + "\n"
+
+
+def exportar(nome: str, formato: str, de: date | None = None, ate: date | None = None):
+    """Text chunks of export `nome` in `formato` ('csv' or 'jsonl')."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    cabecalho, linhas = linhas_exportacao(nome, de, ate)
+    return (gerar_csv if formato == "csv" else gerar_jsonl)(cabecalho, linhas)
@@ -1,5 +1,8 @@
 """ficha_service.py — Ficha Técnica computation helper (Business Rule 2)."""
+from decimal import Decimal
+from app.extensions import db
 from app.models.ficha_tecnica import FichaTecnica
+from app.services.custo_service import custos_fichas, preco_sugerido
 
 
 def resumo_ficha(ficha: FichaTecnica) -> dict:
@@ -20,3 +23,20 @@ def resumo_ficha(ficha: FichaTecnica) -> dict:
         "margem_atacado_percentual": ficha.margem_atacado_percentual,
         "markup_atacado": ficha.markup_atacado,
     }
+
+
+def resumo_lista_fichas(fichas: list[FichaTecnica]) -> dict[int, dict]:
+    """
+    custo_unitario and preco_sugerido for many fichas at once, keyed by
+    ficha id — same Decimal results as the model properties, without
+    walking itens/insumos per ficha.
+    """
+    custos = custos_fichas(db.session, fichas)
+    return {
+        f.id: {
+            "custo_unitario": custos[f.id]["custo_unitario"],
+            "preco_sugerido": preco_sugerido(custos[f.id]["custo_unitario"],
+                                             f.margem_desejada_percentual),
+        }
+        for f in fichas
+    }
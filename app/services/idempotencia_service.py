@@ -0,0 +1,132 @@
+"""
+idempotencia_service.py
+=======================
+Idempotency keys for write endpoints (order creation, payments, bulk API).
+
+A client sends the same key (Idempotency-Key header, or the
+`idempotency_key` field of our own forms) on every retry of one logical
+request. The first request claims the key by inserting its row — the
+unique (usuario_id, chave) constraint makes the claim atomic across
+gunicorn workers — and commits right away so the others see it. The
+response is stored when the handler finishes; a retry then gets it back
+instead of running the handler again.
+
+  - Same key, different payload → CONFLITO (the client reused a key).
+  - Same key while the first request is still running → EM_ANDAMENTO
+    (answered with 409 right away; the client retries later).
+  - The claim is a lease (`em_andamento_ate`): if the worker running the
+    first request died, a retry after the lease takes the key over. The
+    reservation carries the lease it was granted, so a late finish by the
+    old holder can neither store nor release a claim it no longer owns.
+  - Handler failed (exception or 5xx) → the key is released so the retry runs.
+  - Keys expire after TTL; `flask limpar-idempotencia` purges old rows.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, insert, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.chave_idempotencia import ChaveIdempotencia
+
+TTL = timedelta(hours=24)
+PRAZO_EM_ANDAMENTO = timedelta(minutes=2)   # longer than any request may run (gunicorn timeout)
+CABECALHOS_GUARDADOS = ("Content-Type", "Location")
+
+NOVA = "nova"
+REPETIDA = "repetida"
+EM_ANDAMENTO = "em_andamento"
+CONFLITO = "conflito"
+
+
+def impressao(metodo: str, caminho: str, dados: bytes) -> str:
+    """Fingerprint of a request: same key + different fingerprint = misuse."""
+    return hashlib.sha256(b"\n".join([metodo.encode(), caminho.encode(), dados])).hexdigest()
+
+
+def reservar(usuario_id: int, chave: str,
+             impressao_req: str) -> tuple[str, ChaveIdempotencia | tuple[int, datetime]]:
+    """
+    Claims `chave` for this request, committing immediately. Returns
+    (NOVA, reservation) when the caller should run the handler — pass the
+    reservation to `concluir`/`liberar` — otherwise
+    (REPETIDA | EM_ANDAMENTO | CONFLITO, existing row).
+    """
+    tabela = ChaveIdempotencia.__table__
+    for _ in range(3):
+        agora = datetime.now(timezone.utc)
+        prazo = agora + PRAZO_EM_ANDAMENTO
+        try:
+            registro_id = db.session.execute(
+                insert(tabela).values(usuario_id=usuario_id, chave=chave, impressao=impressao_req,
+                                      created_at=agora, expira_em=agora + TTL, em_andamento_ate=prazo)
+                .returning(tabela.c.id)
+            ).scalar()
+            db.session.commit()
+            return NOVA, (registro_id, prazo)
+        except IntegrityError:
+            db.session.rollback()
+
+        expirada = db.session.execute(
+            delete(tabela).where(tabela.c.usuario_id == usuario_id, tabela.c.chave == chave,
+                                 tabela.c.expira_em <= agora)
+        ).rowcount
+        db.session.commit()
+        if expirada:
+            continue  # stale key: claim it again
+        registro = db.session.execute(
+            select(ChaveIdempotencia)
+            .where(ChaveIdempotencia.usuario_id == usuario_id, ChaveIdempotencia.chave == chave)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if registro is None:
+            continue  # released by a failed first attempt in the meantime
+        if registro.impressao != impressao_req:
+            return CONFLITO, registro
+        if registro.status_http is None:
+            assumida = db.session.execute(
+                update(tabela)
+                .where(tabela.c.id == registro.id, tabela.c.status_http.is_(None),
+                       or_(tabela.c.em_andamento_ate.is_(None), tabela.c.em_andamento_ate <= agora))
+                .values(em_andamento_ate=prazo)
+            ).rowcount
+            db.session.commit()
+            if assumida:
+                return NOVA, (registro.id, prazo)  # the first worker's lease ran out
+            return EM_ANDAMENTO, registro
+        return REPETIDA, registro
+    raise RuntimeError(f"Não foi possível reservar a chave de idempotência {chave!r}")
+
+
+def _da_reserva(reserva: tuple[int, datetime]):
+    """WHERE clause matching the claim only while `reserva` still holds its lease."""
+    tabela = ChaveIdempotencia.__table__
+    registro_id, prazo = reserva
+    return (tabela.c.id == registro_id, tabela.c.status_http.is_(None), tabela.c.em_andamento_ate == prazo)
+
+
+def concluir(reserva: tuple[int, datetime], status_http: int, corpo: bytes, cabecalhos: dict) -> None:
+    """Stores the response of the first request (commits)."""
+    db.session.rollback()  # anything the handler left uncommitted is not part of its result
+    db.session.execute(
+        update(ChaveIdempotencia.__table__)
+        .where(*_da_reserva(reserva))
+        .values(status_http=status_http, corpo=corpo, em_andamento_ate=None,
+                cabecalhos={k: v for k, v in cabecalhos.items() if k in CABECALHOS_GUARDADOS})
+    )
+    db.session.commit()
+
+
+def liberar(reserva: tuple[int, datetime]) -> None:
+    """Drops the claim of a request that failed, so a retry runs again (commits)."""
+    db.session.rollback()
+    db.session.execute(delete(ChaveIdempotencia.__table__).where(*_da_reserva(reserva)))
+    db.session.commit()
+
+
+def limpar_expiradas() -> int:
+    """Deletes expired keys; returns how many (the caller commits)."""
+    return db.session.execute(
+        delete(ChaveIdempotencia.__table__)
+        .where(ChaveIdempotencia.__table__.c.expira_em <= datetime.now(timezone.utc))
+    ).rowcount
@@ -0,0 +1,160 @@
+"""
+importacao_service.py
+=====================
+Streaming bulk import of compras de insumos from CSV.
+
+  - Rows are read one at a time (csv module over a text stream), so the
+    file is never held in memory; only the current chunk and one running
+    total per insumo are.
+  - Each chunk of valid rows is bulk-inserted: compras with RETURNING ids,
+    then their 'Entrada' ledger movements.
+  - Stock is applied once per insumo at the end with a relative
+    executemany UPDATE, like the production deduction.
+  - Nothing is committed here: the caller commits, or rolls back when the
+    import reported errors and partial imports are not wanted.
+
+Columns (header row, ',' or ';' separated):
+  data_compra, insumo (id or name), quantidade_comprada, custo_total,
+  fornecedor (optional), observacoes (optional)
+Dates may be AAAA-MM-DD or DD/MM/AAAA; numbers accept a decimal comma and
+must be finite and fit their column, so every bad value is reported per line.
+"""
+import csv
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import select, update, insert, bindparam
+from sqlalchemy.orm.util import identity_key
+from app.extensions import db
+from app.models.insumo import Insumo
+from app.models.compra_insumo import CompraInsumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+
+TAMANHO_LOTE = 1000
+MAX_ERROS = 100
+COLUNAS_OBRIGATORIAS = ("data_compra", "insumo", "quantidade_comprada", "custo_total")
+
+
+def cabe_na_coluna(d: Decimal, coluna, valor=None) -> Decimal:
+    """Returns `d` if it is finite and fits `coluna` (a Numeric(p, s) column); ValueError otherwise."""
+    valor = d if valor is None else valor
+    if not d.is_finite():
+        raise ValueError(f"{coluna.name} inválido: {valor}")
+    if abs(d) >= Decimal(10) ** (coluna.type.precision - coluna.type.scale):
+        raise ValueError(f"{coluna.name} fora do limite: {valor}")
+    return d
+
+
+def _decimal(valor: str, coluna) -> Decimal:
+    """Parses a number and checks it fits `coluna` (a Numeric(p, s) column)."""
+    valor = (valor or "").strip().replace("R$", "").replace(" ", "")
+    if "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    return cabe_na_coluna(Decimal(valor), coluna, valor)
+
+
+def _data(valor: str) -> date:
+    valor = (valor or "").strip()
+    if "/" in valor:
+        return datetime.strptime(valor, "%d/%m/%Y").date()
+    return date.fromisoformat(valor)
+
+
+def _leitor(stream) -> csv.DictReader:
+    """DictReader over a text stream, sniffing ',' vs ';' from the header line."""
+    cabecalho = stream.readline()
+    delimitador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    campos = [c.strip().lower() for c in next(csv.reader([cabecalho], delimiter=delimitador))]
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in campos]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    return csv.DictReader(stream, fieldnames=campos, delimiter=delimitador)
+
+
+def _indice_insumos() -> tuple[set[int], dict[str, int]]:
+    linhas = db.session.execute(select(Insumo.id, Insumo.nome)).all()
+    return {ln.id for ln in linhas}, {ln.nome.strip().lower(): ln.id for ln in linhas}
+
+
+def _gravar_lote(lote: list[dict]) -> None:
+    ids = db.session.execute(
+        insert(CompraInsumo).returning(CompraInsumo.id, sort_by_parameter_order=True), lote
+    ).scalars().all()
+    db.session.execute(insert(MovimentacaoEstoque), [
+        dict(tipo="Entrada", origem="Compra", insumo_id=c["insumo_id"],
+             quantidade=c["quantidade_comprada"], compra_id=compra_id,
+             observacoes=f"Compra de {c['fornecedor'] or 'fornecedor desconhecido'} (importação)")
+        for c, compra_id in zip(lote, ids)
+    ])
+
+
+def importar_compras_csv(stream, tamanho_lote: int = TAMANHO_LOTE,
+                         ignorar_invalidas: bool = False) -> dict:
+    """
+    Imports purchases from a text stream. Returns
+    {"importadas": n, "linhas": n, "insumos": n, "erros": [(linha, mensagem)...]}.
+    Without `ignorar_invalidas`, the first invalid row stops the import
+    and the caller must roll back (erros is not empty). Only the first
+    MAX_ERROS errors are kept.
+    """
+    leitor = _leitor(stream)
+    ids_validos, por_nome = _indice_insumos()
+    colunas = CompraInsumo.__table__.c
+    resultado = {"importadas": 0, "linhas": 0, "insumos": 0, "erros": []}
+    totais: dict[int, Decimal] = {}
+    lote: list[dict] = []
+
+    for numero, linha in enumerate(leitor, start=2):  # line 1 is the header
+        resultado["linhas"] += 1
+        try:
+            ref = (linha.get("insumo") or "").strip()
+            insumo_id = int(ref) if ref.isdigit() else por_nome.get(ref.lower())
+            if insumo_id not in ids_validos:
+                raise ValueError(f"insumo '{ref}' não encontrado")
+            quantidade = _decimal(linha["quantidade_comprada"], colunas.quantidade_comprada)
+            if quantidade <= 0:
+                raise ValueError("quantidade_comprada deve ser positiva")
+            custo = _decimal(linha["custo_total"], colunas.custo_total)
+            if custo < 0:
+                raise ValueError("custo_total não pode ser negativo")
+            compra = dict(
+                data_compra=_data(linha["data_compra"]),
+                insumo_id=insumo_id,
+                quantidade_comprada=quantidade,
+                custo_total=custo,
+                fornecedor=(linha.get("fornecedor") or "").strip(),
+                observacoes=(linha.get("observacoes") or "").strip() or None,
+            )
+        except (ValueError, InvalidOperation, TypeError) as e:
+            if len(resultado["erros"]) < MAX_ERROS:
+                resultado["erros"].append((numero, str(e) or "valor inválido"))
+            if not ignorar_invalidas:
+                return resultado
+            continue
+
+        lote.append(compra)
+        totais[insumo_id] = totais.get(insumo_id, Decimal("0")) + quantidade
+        if len(lote) >= tamanho_lote:
+            _gravar_lote(lote)
+            resultado["importadas"] += len(lote)
+            lote = []
+
+    if lote:
+        _gravar_lote(lote)
+        resultado["importadas"] += len(lote)
+
+    if totais:
+        tabela = Insumo.__table__
+        db.session.execute(
+            update(tabela)
+            .where(tabela.c.id == bindparam("b_id"))
+            .values(estoque_atual=tabela.c.estoque_atual + bindparam("b_qtd")),
+            [{"b_id": insumo_id, "b_qtd": qtd} for insumo_id, qtd in sorted(totais.items())],
+        )
+        # The UPDATE bypassed the ORM: refresh any Insumo already loaded
+        for insumo_id in totais:
+            insumo = db.session.identity_map.get(identity_key(Insumo, insumo_id))
+            if insumo is not None:
+                db.session.expire(insumo, ["estoque_atual", "folga_estoque", "updated_at"])
+    resultado["insumos"] = len(totais)
+    return resultado
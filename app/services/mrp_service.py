@@ -0,0 +1,121 @@
+"""
+mrp_service.py
+==============
+Material requirements planning for scheduled orders.
+
+The explosion orders × produtos × insumos is done as a product of two
+sparse matrices instead of walking each order:
+  - demanda[dia][produto]  — one GROUP BY query over pedido_itens;
+  - receita[produto][insumo] = quantidade_por_receita / rendimento — one
+    query over the fichas of the products that appear in the horizon.
+Each cell of necessidade[dia][insumo] is then a short dot product, so the
+cost grows with days × distinct products, not with the number of orders.
+Quantities use the same Decimal formula as the stock deduction
+(Business Rule 5).
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import select, func, literal_column
+from app.extensions import db
+from app.models.pedido import Pedido, PedidoItem
+from app.models.insumo import Insumo
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+from app.services.pedido_service import STATUS_PRODUZIVEIS
+
+HORIZONTE_PADRAO = 14
+HORIZONTE_MAXIMO = 180
+
+
+def _demanda(inicio: date, dias: int) -> dict[date, dict[int, Decimal]]:
+    """{dia: {produto_id: quantidade}} of the not-yet-produced orders (UTC days)."""
+    de = datetime(inicio.year, inicio.month, inicio.day, tzinfo=timezone.utc)
+    agendado = Pedido.data_hora_agendada
+    if db.engine.dialect.name == "postgresql":
+        # date() would use the session TimeZone; a literal keeps SELECT and GROUP BY identical
+        agendado = func.timezone(literal_column("'UTC'"), agendado)
+    dia = func.date(agendado, type_=db.Date)
+    linhas = db.session.execute(
+        select(dia.label("dia"), PedidoItem.produto_id, func.sum(PedidoItem.quantidade).label("qtd"))
+        .join(Pedido, Pedido.id == PedidoItem.pedido_id)
+        .where(
+            Pedido.data_hora_agendada >= de,
+            Pedido.data_hora_agendada < de + timedelta(days=dias),
+            Pedido.status_pedido.in_(STATUS_PRODUZIVEIS),
+        )
+        .group_by(dia, PedidoItem.produto_id)
+    ).all()
+    demanda: dict[date, dict[int, Decimal]] = {}
+    for ln in linhas:
+        demanda.setdefault(ln.dia, {})[ln.produto_id] = Decimal(str(ln.qtd))
+    return demanda
+
+
+def _receitas(produto_ids) -> dict[int, dict[int, Decimal]]:
+    """{produto_id: {insumo_id: quantidade por unidade de produto}}."""
+    receitas: dict[int, dict[int, Decimal]] = {}
+    if not produto_ids:
+        return receitas
+    linhas = db.session.execute(
+        select(FichaTecnica.produto_id, FichaTecnica.rendimento_unidades,
+               FichaTecnicaItem.insumo_id, FichaTecnicaItem.quantidade_por_receita)
+        .join(FichaTecnicaItem, FichaTecnicaItem.ficha_tecnica_id == FichaTecnica.id)
+        .where(FichaTecnica.produto_id.in_(list(produto_ids)))
+    ).all()
+    for ln in linhas:
+        if not ln.rendimento_unidades:
+            continue
+        por_unidade = Decimal(str(ln.quantidade_por_receita)) / Decimal(str(ln.rendimento_unidades))
+        linha = receitas.setdefault(ln.produto_id, {})
+        linha[ln.insumo_id] = linha.get(ln.insumo_id, Decimal("0")) + por_unidade
+    return receitas
+
+
+def plano_necessidades(inicio: date | None = None, dias: int = HORIZONTE_PADRAO) -> dict:
+    """
+    Per-insumo daily requirements of the orders scheduled in
+    [inicio, inicio + dias) against Insumo.estoque_atual.
+    Returns {"inicio", "dias_horizonte", "dias": [date...] (days with
+    demand), "linhas": [...]} where each
+    linha has nome, unidade, estoque_atual, por_dia (aligned with "dias"),
+    total, saldo_final and primeiro_dia_falta (None when stock suffices).
+    Rows that run short come first, earliest shortage first.
+    """
+    inicio = inicio or date.today()
+    dias = max(1, min(dias, HORIZONTE_MAXIMO))
+    demanda = _demanda(inicio, dias)
+    receitas = _receitas({pid for por_produto in demanda.values() for pid in por_produto})
+
+    # necessidade = demanda · receita
+    calendario = sorted(demanda)
+    necessidade: dict[int, list[Decimal]] = {}
+    for i, dia in enumerate(calendario):
+        for produto_id, qtd in demanda[dia].items():
+            for insumo_id, por_unidade in receitas.get(produto_id, {}).items():
+                coluna = necessidade.setdefault(insumo_id, [Decimal("0")] * len(calendario))
+                coluna[i] += por_unidade * qtd
+
+    insumos = db.session.execute(
+        select(Insumo.id, Insumo.nome, Insumo.unidade, Insumo.estoque_atual)
+        .where(Insumo.id.in_(list(necessidade)))
+    ).all() if necessidade else []
+
+    linhas = []
+    for ins in insumos:
+        saldo = Decimal(str(ins.estoque_atual))
+        primeiro_dia_falta = None
+        for dia, qtd in zip(calendario, necessidade[ins.id]):
+            saldo -= qtd
+            if saldo < 0 and primeiro_dia_falta is None:
+                primeiro_dia_falta = dia
+        linhas.append({
+            "insumo_id": ins.id, "nome": ins.nome, "unidade": ins.unidade,
+            "estoque_atual": Decimal(str(ins.estoque_atual)),
+            "por_dia": necessidade[ins.id],
+            "total": sum(necessidade[ins.id], Decimal("0")),
+            "saldo_final": saldo,
+            "primeiro_dia_falta": primeiro_dia_falta,
+        })
+    linhas.sort(key=lambda ln: (ln["primeiro_dia_falta"] is None,
+                                ln["primeiro_dia_falta"] or date.max, ln["nome"]))
+    return {"inicio": inicio, "dias_horizonte": dias, "dias": calendario, "linhas": linhas}
@@ -4,33 +4,94 @@ pedido_service.py
 Central service for all Pedido business logic:
   - Pedido number generation
   - Payment status automation (Business Rule 4)
-  - Production start → stock deduction (Business Rule 5)
+  - Production start → set-based stock deduction (Business Rule 5)
   - Admin override for negative stock
+  - Batch production runs with a consolidated shortage report
+  - Keyset-paginated order listing
 """
 from decimal import Decimal
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select, func
+from sqlalchemy import select, and_, or_, update, insert, bindparam
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.util import identity_key
 from app.extensions import db
 from app.models.pedido import Pedido, PedidoItem
 from app.models.pagamento import Pagamento
 from app.models.insumo import Insumo
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
 from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.services.sequencia_service import reservar_numeros_pedido
+from app.services.estoque_service import movimentar
 
 
 def gerar_numero_pedido() -> str:
-    """Generates next sequential BD-000001 order number."""
-    ultimo = db.session.execute(
-        select(func.max(Pedido.numero_pedido))
-    ).scalar()
-    if ultimo:
-        try:
-            seq = int(ultimo.split("-")[1]) + 1
-        except (IndexError, ValueError):
-            seq = 1
-    else:
-        seq = 1
-    return f"BD-{seq:06d}"
+    """
+    Allocates the next sequential BD-000001 order number.
+    Concurrency-safe and gap-free: see sequencia_service.
+    """
+    return reservar_numeros_pedido(1)[0]
+
+
+STATUS_VALIDOS = ["Rascunho", "Agendado", "Em produção", "Pronto", "Entregue", "Cancelado"]
+# Statuses a production run may move to 'Em produção'
+STATUS_PRODUZIVEIS = ["Rascunho", "Agendado"]
+
+PAGINA_PADRAO = 50
+PAGINA_MAXIMA = 200
+
+
+def _encode_cursor(pedido: Pedido) -> str:
+    """Cursor = '<data_hora_agendada ISO or empty>|<id>' of the last row shown."""
+    agendado = pedido.data_hora_agendada.isoformat() if pedido.data_hora_agendada else ""
+    return f"{agendado}|{pedido.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, int] | None:
+    try:
+        agendado, pedido_id = cursor.rsplit("|", 1)
+        return (datetime.fromisoformat(agendado) if agendado else None), int(pedido_id)
+    except ValueError:
+        return None
+
+
+def listar_pedidos_pagina(status: str = "", cursor: str | None = None,
+                          limite: int = PAGINA_PADRAO) -> tuple[list[Pedido], str | None]:
+    """
+    Keyset pagination over (data_hora_agendada DESC NULLS LAST, id DESC).
+    Cliente, itens and pagamentos are eager-loaded for the whole page, so
+    rendering totals costs a constant number of queries regardless of history.
+    Returns (pedidos, next_cursor); next_cursor is None on the last page.
+    """
+    limite = max(1, min(int(limite), PAGINA_MAXIMA))
+    query = (
+        select(Pedido)
+        .options(
+            joinedload(Pedido.cliente),
+            selectinload(Pedido.itens),
+            selectinload(Pedido.pagamentos),
+        )
+        .order_by(Pedido.data_hora_agendada.desc().nullslast(), Pedido.id.desc())
+    )
+    if status:
+        query = query.where(Pedido.status_pedido == status)
+
+    chave = _decode_cursor(cursor) if cursor else None
+    if chave:
+        agendado, pedido_id = chave
+        if agendado is None:
+            # Already inside the NULL tail: only older ids remain
+            query = query.where(Pedido.data_hora_agendada.is_(None), Pedido.id < pedido_id)
+        else:
+            query = query.where(or_(
+                Pedido.data_hora_agendada < agendado,
+                and_(Pedido.data_hora_agendada == agendado, Pedido.id < pedido_id),
+                Pedido.data_hora_agendada.is_(None),
+            ))
+
+    pedidos = db.session.execute(query.limit(limite + 1)).unique().scalars().all()
+    proximo = _encode_cursor(pedidos[limite - 1]) if len(pedidos) > limite else None
+    return list(pedidos[:limite]), proximo
 
 
 def atualizar_status_pagamento(pedido: Pedido) -> None:
@@ -40,6 +101,7 @@ def atualizar_status_pagamento(pedido: Pedido) -> None:
     """
     if pedido.status_pagamento == "Estornado":
         return  # Manual flag; do not auto-update
+    db.session.flush()  # persisted totals are refreshed by the flush hook
     soma = pedido.soma_recebida
     total = pedido.total_pedido
     if soma <= 0:
@@ -50,71 +112,200 @@ def atualizar_status_pagamento(pedido: Pedido) -> None:
         pedido.status_pagamento = "Pago"
 
 
-def iniciar_producao(pedido: Pedido, admin_override: bool = False) -> list[str]:
+class EstoqueInsuficiente(ValueError):
+    """Stock would go negative; `faltas` lists every short insumo (see _faltas)."""
+
+    def __init__(self, faltas: list[dict]):
+        self.faltas = faltas
+        if not faltas:  # lost a race to a concurrent start; stock changed again since
+            super().__init__("Estoque insuficiente.")
+            return
+        f = faltas[0]
+        mensagem = (
+            f"Estoque insuficiente para '{f['nome']}'. "
+            f"Necessário: {f['necessario']:.4f} {f['unidade']}, "
+            f"Disponível: {f['disponivel']} {f['unidade']}."
+        )
+        if len(faltas) > 1:
+            mensagem += f" (e mais {len(faltas) - 1} insumo(s))"
+        super().__init__(mensagem)
+
+
+def _faltas(total: dict[int, Decimal], insumos) -> list[dict]:
+    """Shortage rows for insumo rows (id, nome, unidade, estoque_atual) vs. total need."""
+    faltas = []
+    for ins in insumos:
+        disponivel = Decimal(str(ins.estoque_atual))
+        if disponivel - total[ins.id] < 0:
+            faltas.append({
+                "insumo_id": ins.id, "nome": ins.nome, "unidade": ins.unidade,
+                "necessario": total[ins.id], "disponivel": disponivel,
+                "falta": total[ins.id] - disponivel,
+            })
+    return faltas
+
+
+def necessidades_insumos(pedido_ids) -> dict[tuple[int, int], Decimal]:
     """
-    Business Rule 5 — Deduct ingredients from stock when order moves to 'Em produção'.
-    Returns a list of warning messages for low-stock situations.
-    Raises ValueError if stock would go negative and admin_override is False.
+    Explodes orders through their fichas in one query.
+    Returns {(pedido_id, insumo_id): quantidade_necessaria} in insumo base units,
+    where quantidade_necessaria = (por_receita / rendimento) * qtd_produto_pedido.
+    Products without a ficha contribute nothing.
     """
-    warnings: list[str] = []
+    pedido_ids = list(set(pedido_ids))
+    if not pedido_ids:
+        return {}
+    linhas = db.session.execute(
+        select(
+            PedidoItem.pedido_id, FichaTecnicaItem.insumo_id, PedidoItem.quantidade,
+            FichaTecnicaItem.quantidade_por_receita, FichaTecnica.rendimento_unidades,
+        )
+        .join(FichaTecnica, FichaTecnica.produto_id == PedidoItem.produto_id)
+        .join(FichaTecnicaItem, FichaTecnicaItem.ficha_tecnica_id == FichaTecnica.id)
+        .where(PedidoItem.pedido_id.in_(pedido_ids))
+    ).all()
+    necessidades: dict[tuple[int, int], Decimal] = {}
+    for ln in linhas:
+        chave = (ln.pedido_id, ln.insumo_id)
+        necessidades[chave] = necessidades.get(chave, Decimal("0")) + (
+            Decimal(str(ln.quantidade_por_receita))
+            / Decimal(str(ln.rendimento_unidades))
+            * Decimal(str(ln.quantidade))
+        )
+    return necessidades
 
-    for item in pedido.itens:
-        ficha = item.produto.ficha_tecnica
-        if not ficha:
-            continue  # No recipe; skip deduction
-
-        for fi in ficha.itens:
-            insumo: Insumo = fi.insumo
-            # quantidade_necessaria = (por_receita / rendimento) * qtd_produto_pedido
-            quantidade_necessaria = (
-                Decimal(str(fi.quantidade_por_receita))
-                / Decimal(str(ficha.rendimento_unidades))
-                * Decimal(str(item.quantidade))
-            )
 
-            novo_estoque = Decimal(str(insumo.estoque_atual)) - quantidade_necessaria
+def _total_por_insumo(por_pedido: dict[tuple[int, int], Decimal]) -> dict[int, Decimal]:
+    total: dict[int, Decimal] = {}
+    for (_, insumo_id), qtd in por_pedido.items():
+        total[insumo_id] = total.get(insumo_id, Decimal("0")) + qtd
+    return total
+
+
+def _baixar_sem_negativo(baixa, parametros: list[dict], total: dict[int, Decimal]) -> None:
+    """
+    Runs the guarded UPDATE (estoque_atual >= b_qtd) in a savepoint. FOR
+    UPDATE is a no-op on SQLite, so two starts may have read the same
+    stock; the guard makes the later one match no row instead of going
+    negative, and it raises EstoqueInsuficiente with the current stock.
+    """
+    try:
+        with db.session.begin_nested():
+            if db.engine.dialect.supports_sane_multi_rowcount:
+                atualizados = db.session.execute(baixa, parametros).rowcount
+            else:
+                atualizados = sum(db.session.execute(baixa, p).rowcount for p in parametros)
+            if atualizados < len(parametros):
+                raise EstoqueInsuficiente([])
+    except EstoqueInsuficiente:
+        atuais = db.session.execute(
+            select(Insumo.id, Insumo.nome, Insumo.unidade, Insumo.estoque_atual)
+            .where(Insumo.id.in_(list(total)))
+            .order_by(Insumo.id)
+        ).all()
+        raise EstoqueInsuficiente(_faltas(total, atuais)) from None
+
 
-            if novo_estoque < 0 and not admin_override:
-                raise ValueError(
-                    f"Estoque insuficiente para '{insumo.nome}'. "
-                    f"Necessário: {quantidade_necessaria:.4f} {insumo.unidade}, "
-                    f"Disponível: {insumo.estoque_atual} {insumo.unidade}."
-                )
+def baixar_estoque_producao(pedidos: list[Pedido], admin_override: bool = False) -> list[str]:
+    """
+    Business Rule 5 for one or many orders, set-based:
+      1. total requirement per insumo is aggregated first;
+      2. the insumo rows are locked in id order (SELECT ... FOR UPDATE on
+         PostgreSQL, so concurrent production starts cannot deadlock);
+      3. stock is decremented with relative UPDATEs (estoque = estoque - n),
+         so concurrent deductions are never lost, even on SQLite; without
+         admin_override they also require estoque >= n, so a concurrent
+         start that read the same stock cannot push it negative;
+      4. one Saida movement per (pedido, insumo) is bulk-inserted.
+    A constant number of round trips regardless of items or recipe lines.
+    Raises EstoqueInsuficiente (a ValueError) if stock would go negative
+    and admin_override is False.
+    """
+    warnings: list[str] = []
+    por_pedido = necessidades_insumos(p.id for p in pedidos)
+    if not por_pedido:
+        return warnings  # No recipes; nothing to deduct
 
-            if novo_estoque < 0:
-                warnings.append(
-                    f"Atenção: '{insumo.nome}' ficou negativo ({novo_estoque:.4f} {insumo.unidade})."
-                )
+    total = _total_por_insumo(por_pedido)
+    insumos = db.session.execute(
+        select(Insumo.id, Insumo.nome, Insumo.unidade, Insumo.estoque_atual)
+        .where(Insumo.id.in_(list(total)))
+        .order_by(Insumo.id)
+        .with_for_update()
+    ).all()
 
-            insumo.estoque_atual = novo_estoque
-            mov = MovimentacaoEstoque(
+    faltas = _faltas(total, insumos)
+    if faltas and not admin_override:
+        raise EstoqueInsuficiente(faltas)
+    for f in faltas:
+        warnings.append(
+            f"Atenção: '{f['nome']}' ficou negativo ({-f['falta']:.4f} {f['unidade']})."
+        )
+
+    tabela = Insumo.__table__
+    baixa = (
+        update(tabela)
+        .where(tabela.c.id == bindparam("b_id"))
+        .values(estoque_atual=tabela.c.estoque_atual - bindparam("b_qtd"))
+    )
+    parametros = [{"b_id": ins.id, "b_qtd": total[ins.id]} for ins in insumos]
+    if admin_override:
+        db.session.execute(baixa, parametros)
+    else:
+        _baixar_sem_negativo(baixa.where(tabela.c.estoque_atual >= bindparam("b_qtd")), parametros, total)
+    numeros = {p.id: p.numero_pedido for p in pedidos}
+    db.session.execute(
+        insert(MovimentacaoEstoque),
+        [
+            dict(
                 tipo="Saida",
                 origem="Producao",
-                insumo_id=insumo.id,
-                quantidade=-quantidade_necessaria,  # negative = out
-                pedido_id=pedido.id,
-                observacoes=f"Produção {pedido.numero_pedido}",
+                insumo_id=insumo_id,
+                quantidade=-qtd,  # negative = out
+                pedido_id=pedido_id,
+                observacoes=f"Produção {numeros[pedido_id]}",
             )
-            db.session.add(mov)
+            for (pedido_id, insumo_id), qtd in sorted(por_pedido.items())
+        ],
+    )
 
+    # The UPDATE bypassed the ORM: refresh any Insumo already loaded
+    for insumo_id in total:
+        insumo = db.session.identity_map.get(identity_key(Insumo, insumo_id))
+        if insumo is not None:
+            db.session.expire(insumo, ["estoque_atual", "folga_estoque", "updated_at"])
     return warnings
 
 
+def iniciar_producao(pedido: Pedido, admin_override: bool = False) -> list[str]:
+    """
+    Business Rule 5 — Deduct ingredients from stock when order moves to 'Em produção'.
+    Returns a list of warning messages for low-stock situations.
+    Raises ValueError if stock would go negative and admin_override is False.
+    """
+    return baixar_estoque_producao([pedido], admin_override=admin_override)
+
+
 def registrar_entrada_estoque(compra) -> None:
     """Called after a CompraInsumo is saved — adds stock and creates Movimentacao."""
-    insumo: Insumo = compra.insumo
-    insumo.estoque_atual = (
-        Decimal(str(insumo.estoque_atual)) + Decimal(str(compra.quantidade_comprada))
-    )
-    mov = MovimentacaoEstoque(
-        tipo="Entrada",
-        origem="Compra",
-        insumo_id=insumo.id,
-        quantidade=compra.quantidade_comprada,
+    movimentar(
+        compra.insumo, compra.quantidade_comprada, "Entrada", "Compra",
         compra_id=compra.id,
         observacoes=f"Compra de {compra.fornecedor or 'fornecedor desconhecido'}",
     )
-    db.session.add(mov)
+
+
+def _pedidos_ja_baixados(pedido_ids) -> set[int]:
+    """Orders that already have production stock movements (one query)."""
+    pedido_ids = list(set(pedido_ids))
+    if not pedido_ids:
+        return set()
+    return set(db.session.execute(
+        select(MovimentacaoEstoque.pedido_id).distinct().where(
+            MovimentacaoEstoque.pedido_id.in_(pedido_ids),
+            MovimentacaoEstoque.origem == "Producao",
+        )
+    ).scalars())
 
 
 def mudar_status_pedido(pedido: Pedido, novo_status: str,
@@ -124,25 +315,93 @@ def mudar_status_pedido(pedido: Pedido, novo_status: str,
       - 'Em produção' → stock deduction
     Returns a list of warning strings.
     """
-    status_validos = [
-        "Rascunho", "Agendado", "Em produção", "Pronto", "Entregue", "Cancelado"
-    ]
-    if novo_status not in status_validos:
+    if novo_status not in STATUS_VALIDOS:
         raise ValueError(f"Status inválido: {novo_status}")
 
     warnings: list[str] = []
 
     # Only deduct stock on the FIRST transition to production
     if novo_status == "Em produção" and pedido.status_pedido != "Em produção":
-        ja_deduziu = db.session.execute(
-            select(func.count(MovimentacaoEstoque.id)).where(
-                MovimentacaoEstoque.pedido_id == pedido.id,
-                MovimentacaoEstoque.origem == "Producao",
-            )
-        ).scalar()
-        if not ja_deduziu:
+        if pedido.id not in _pedidos_ja_baixados([pedido.id]):
             warnings = iniciar_producao(pedido, admin_override=usuario_is_admin)
 
     pedido.status_pedido = novo_status
     pedido.updated_at = datetime.now(timezone.utc)
     return warnings
+
+
+def pedidos_para_producao(dia: date) -> list[Pedido]:
+    """Orders scheduled for `dia` (UTC) that can still go to production."""
+    inicio = datetime(dia.year, dia.month, dia.day, tzinfo=timezone.utc)
+    return db.session.execute(
+        select(Pedido)
+        .options(joinedload(Pedido.cliente))
+        .where(
+            Pedido.data_hora_agendada >= inicio,
+            Pedido.data_hora_agendada < inicio + timedelta(days=1),
+            Pedido.status_pedido.in_(STATUS_PRODUZIVEIS),
+        )
+        .order_by(Pedido.data_hora_agendada, Pedido.id)
+    ).scalars().all()
+
+
+def previa_producao(pedidos: list[Pedido]) -> dict:
+    """
+    Consolidated ingredient requirement of a production run, without
+    touching stock: {"necessidades": [...], "faltas": [...]}, one row per
+    insumo ordered by name.
+    """
+    baixados = _pedidos_ja_baixados(p.id for p in pedidos)
+    total = _total_por_insumo(necessidades_insumos(p.id for p in pedidos if p.id not in baixados))
+    if not total:
+        return {"necessidades": [], "faltas": []}
+    insumos = db.session.execute(
+        select(Insumo.id, Insumo.nome, Insumo.unidade, Insumo.estoque_atual)
+        .where(Insumo.id.in_(list(total)))
+        .order_by(Insumo.nome)
+    ).all()
+    necessidades = [
+        {"insumo_id": ins.id, "nome": ins.nome, "unidade": ins.unidade,
+         "necessario": total[ins.id], "disponivel": Decimal(str(ins.estoque_atual))}
+        for ins in insumos
+    ]
+    return {"necessidades": necessidades, "faltas": _faltas(total, insumos)}
+
+
+def iniciar_producao_lote(pedidos: list[Pedido], usuario_is_admin: bool = False) -> dict:
+    """
+    Daily production run: moves many orders to 'Em produção' at once.
+      - orders not in STATUS_PRODUZIVEIS are skipped;
+      - the duplicate-deduction check runs once for the whole batch;
+      - ingredient availability is validated once against the batch total
+        and stock is deducted with a single baixar_estoque_producao call.
+    All-or-nothing: on a shortage (without admin override) nothing changes
+    and the consolidated report comes back in "faltas". The caller commits.
+    Returns {"iniciados": [numero...], "ignorados": [(numero, motivo)...],
+             "faltas": [...], "warnings": [...]}.
+    """
+    resultado = {"iniciados": [], "ignorados": [], "faltas": [], "warnings": []}
+    elegiveis = []
+    for p in pedidos:
+        if p.status_pedido in STATUS_PRODUZIVEIS:
+            elegiveis.append(p)
+        else:
+            resultado["ignorados"].append((p.numero_pedido, f"status '{p.status_pedido}'"))
+    if not elegiveis:
+        return resultado
+
+    baixados = _pedidos_ja_baixados(p.id for p in elegiveis)
+    try:
+        resultado["warnings"] = baixar_estoque_producao(
+            [p for p in elegiveis if p.id not in baixados], admin_override=usuario_is_admin
+        )
+    except EstoqueInsuficiente as e:
+        resultado["faltas"] = e.faltas
+        return resultado
+
+    agora = datetime.now(timezone.utc)
+    for p in elegiveis:
+        p.status_pedido = "Em produção"
+        p.updated_at = agora
+        resultado["iniciados"].append(p.numero_pedido)
+    return resultado
@@ -9,100 +9,116 @@ CASH-BASIS CONVENTION (documented here):
   - Only status_pagamento == 'Pago' counts as fully realized revenue.
   - 'Parcial' orders contribute proportionally to realized revenue and profit.
   - 'Cancelado' or 'Estornado' orders are excluded entirely.
+Every query here is read-only, so they run on the read replica when one
+is configured (app/replica.py).
 """
 from decimal import Decimal
 from datetime import date
 
-from sqlalchemy import select, func, extract
+from sqlalchemy import select, func, and_
 from app.extensions import db
+from app.replica import somente_leitura
 from app.models.pedido import Pedido
 from app.models.pagamento import Pagamento
 from app.models.despesa import Despesa
 
 
+def intervalo_mes(ano: int, mes: int) -> tuple[date, date]:
+    """Half-open [inicio, fim) date range of a month, index-friendly."""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def _dec(valor) -> Decimal:
+    return Decimal(str(valor if valor is not None else 0))
+
+
+@somente_leitura
 def dashboard_mes(ano: int, mes: int) -> dict:
     """
     Returns all cash-basis KPIs for a given month.
+    Every figure is a set-based aggregate over the persisted order totals,
+    so the cost does not depend on how many itens/pagamentos exist.
     """
+    inicio, fim = intervalo_mes(ano, mes)
+
     # 1. Recebido no mês: all actual receipts recorded in this month
     recebido_mes = db.session.execute(
         select(func.coalesce(func.sum(Pagamento.valor_recebido), 0)).where(
-            extract("year", Pagamento.data_recebimento) == ano,
-            extract("month", Pagamento.data_recebimento) == mes,
+            Pagamento.data_recebimento >= inicio,
+            Pagamento.data_recebimento < fim,
         )
     ).scalar()
 
     # 2. Faturamento realizado: sum of total_pedido for fully PAID orders
     #    where the LAST payment fell in this month (cash basis by payment date).
-    #    We use the max(data_recebimento) per pedido as the realization date.
-    pago_subq = (
-        select(
-            Pagamento.pedido_id,
-            func.max(Pagamento.data_recebimento).label("ultima_receita"),
-        )
+    #    Orders with a receipt in/after the month whose latest receipt is
+    #    before `fim` are exactly those realized in this month.
+    realizados = (
+        select(Pagamento.pedido_id)
+        .where(Pagamento.data_recebimento >= inicio)
         .group_by(Pagamento.pedido_id)
-        .subquery()
+        .having(func.max(Pagamento.data_recebimento) < fim)
     )
-    pedidos_pagos = db.session.execute(
-        select(Pedido).join(
-            pago_subq, Pedido.id == pago_subq.c.pedido_id
+    pagos = db.session.execute(
+        select(
+            func.coalesce(func.sum(Pedido.total_pedido), 0),
+            func.coalesce(func.sum(Pedido.total_pedido - Pedido.custo_estimado), 0),
         ).where(
             Pedido.status_pagamento == "Pago",
-            extract("year", pago_subq.c.ultima_receita) == ano,
-            extract("month", pago_subq.c.ultima_receita) == mes,
+            Pedido.id.in_(realizados),
         )
-    ).scalars().all()
-
-    faturamento_realizado = Decimal("0")
-    lucro_realizado = Decimal("0")
-
-    for p in pedidos_pagos:
-        faturamento_realizado += p.total_pedido
-        lucro_realizado += p.lucro_estimado
+    ).one()
 
     # 3. Partial orders — proportional realization
-    pedidos_parciais = db.session.execute(
-        select(Pedido).where(
-            Pedido.status_pagamento == "Parcial",
-            Pedido.status_pedido != "Cancelado",
-        )
-    ).scalars().all()
-
-    for p in pedidos_parciais:
-        if p.total_pedido > 0:
-            proporcao = p.soma_recebida / p.total_pedido
-            faturamento_realizado += p.soma_recebida
-            lucro_realizado += p.lucro_estimado * proporcao
+    parcial = and_(Pedido.status_pagamento == "Parcial", Pedido.total_pedido > 0)
+    parciais = db.session.execute(
+        select(
+            func.coalesce(func.sum(Pedido.soma_recebida), 0),
+            func.coalesce(func.sum(
+                (Pedido.total_pedido - Pedido.custo_estimado)
+                * Pedido.soma_recebida / Pedido.total_pedido
+            ), 0),
+        ).where(parcial, Pedido.status_pedido != "Cancelado")
+    ).one()
 
     # 4. A receber: open orders not fully paid/canceled
-    a_receber_rows = db.session.execute(
-        select(Pedido).where(
-            Pedido.status_pagamento.in_(["Não pago", "Parcial"]),
-            Pedido.status_pedido != "Cancelado",
-        )
-    ).scalars().all()
-    a_receber = sum(
-        (p.total_pedido - p.soma_recebida for p in a_receber_rows), Decimal("0")
-    )
+    a_receber = a_receber_total()
 
     # 5. Despesas do mês
     despesas_mes = db.session.execute(
         select(func.coalesce(func.sum(Despesa.valor), 0)).where(
-            extract("year", Despesa.data) == ano,
-            extract("month", Despesa.data) == mes,
+            Despesa.data >= inicio,
+            Despesa.data < fim,
         )
     ).scalar()
 
+    faturamento_realizado = _dec(pagos[0]) + _dec(parciais[0])
+    lucro_realizado = _dec(pagos[1]) + _dec(parciais[1])
+
     return {
-        "recebido_mes": Decimal(str(recebido_mes)),
+        "recebido_mes": _dec(recebido_mes),
         "faturamento_realizado": faturamento_realizado,
         "lucro_realizado": lucro_realizado,
         "a_receber": a_receber,
-        "despesas_mes": Decimal(str(despesas_mes)),
-        "resultado_mes": Decimal(str(recebido_mes)) - Decimal(str(despesas_mes)),
+        "despesas_mes": _dec(despesas_mes),
+        "resultado_mes": _dec(recebido_mes) - _dec(despesas_mes),
     }
 
 
+@somente_leitura
+def a_receber_total() -> Decimal:
+    """Outstanding balance of open orders not fully paid/canceled."""
+    return _dec(db.session.execute(
+        select(func.coalesce(func.sum(Pedido.total_pedido - Pedido.soma_recebida), 0)).where(
+            Pedido.status_pagamento.in_(["Não pago", "Parcial"]),
+            Pedido.status_pedido != "Cancelado",
+        )
+    ).scalar())
+
+
+@somente_leitura
 def pedidos_proximas_entregas(limite: int = 10) -> list[Pedido]:
     """Returns upcoming scheduled orders for the agenda dashboard card."""
     from datetime import datetime, timezone
@@ -115,10 +131,24 @@ def pedidos_proximas_entregas(limite: int = 10) -> list[Pedido]:
     ).scalars().all()
 
 
+def _filtro_estoque_baixo():
+    from app.models.insumo import Insumo
+    return (Insumo.ativo == True, Insumo.folga_estoque <= 0)  # noqa: E712
+
+
+@somente_leitura
 def insumos_estoque_baixo():
-    """Returns insumos at or below minimum stock level."""
+    """Returns insumos at or below minimum stock level, most short first."""
     from app.models.insumo import Insumo
-    insumos = db.session.execute(
-        select(Insumo).where(Insumo.ativo == True)
+    return db.session.execute(
+        select(Insumo).where(*_filtro_estoque_baixo()).order_by(Insumo.folga_estoque, Insumo.nome)
     ).scalars().all()
-    return [i for i in insumos if i.estoque_baixo]
+
+
+@somente_leitura
+def contar_insumos_estoque_baixo() -> int:
+    """Number of low-stock insumos (index-only count, for the navbar badge)."""
+    from app.models.insumo import Insumo
+    return db.session.execute(
+        select(func.count()).select_from(Insumo).where(*_filtro_estoque_baixo())
+    ).scalar()
@@ -0,0 +1,194 @@
+"""
+resumo_service.py
+=================
+Monthly financial rollup (`resumos_mensais`) in front of dashboard_mes.
+
+  - `kpis_mes` serves a month from its rollup row; only a missing or dirty
+    row is recomputed, so the dashboard cost does not grow with history.
+    a_receber is not a monthly figure and is always read live.
+  - `kpis_painel` is kpis_mes for GET views: they run without the SQLite
+    write gate, which is taken only when the row has to be refreshed.
+  - A session `after_flush` hook marks rows dirty when pagamentos, despesas
+    or pedidos change: the months of the affected dates, plus every still
+    open month (Parcial orders count towards the open month's faturamento).
+  - A refresh stores its totals only if no write marked the month since
+    it read the row (compare-and-set on `geracao`), so a concurrent
+    payment is never overwritten by totals computed before it.
+  - A month whose end has passed is frozen (`fechado`): it is no longer
+    dirtied by Parcial drift, only by changes dated inside it.
+  - `flask recalcular-resumos` rebuilds any range of months.
+"""
+from datetime import date
+
+from sqlalchemy import event, select, update, or_, and_, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.banco import escrevendo
+from app.replica import usa_primario
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.despesa import Despesa
+from app.models.resumo_mensal import ResumoMensal
+from app.services.relatorio_service import dashboard_mes, intervalo_mes, a_receber_total
+
+CAMPOS_PEDIDO = ("status_pagamento", "status_pedido", "desconto", "taxa_entrega")
+
+
+CAMPOS_RESUMO = {
+    "recebido": "recebido_mes",
+    "faturamento": "faturamento_realizado",
+    "lucro": "lucro_realizado",
+    "despesas": "despesas_mes",
+    "resultado": "resultado_mes",
+}
+
+
+def _para_dict(resumo: ResumoMensal) -> dict:
+    return {chave: getattr(resumo, campo) for campo, chave in CAMPOS_RESUMO.items()}
+
+
+def _ler(ano: int, mes: int) -> ResumoMensal | None:
+    return db.session.execute(
+        select(ResumoMensal).where(ResumoMensal.ano == ano, ResumoMensal.mes == mes)
+        .execution_options(populate_existing=True)  # `sujo`/`geracao` are set behind the ORM
+    ).scalar_one_or_none()
+
+
+@usa_primario  # the rollup is written back: never compute it from the replica
+def atualizar_resumo(ano: int, mes: int) -> tuple[dict, bool]:
+    """
+    Recomputes one month from raw data and stores it in its rollup row
+    (flush only). Returns (kpis, alterado); alterado is False when nothing
+    was written.
+
+    The store is a compare-and-set on `geracao`, which the dirty-marking
+    hook increments: when another transaction marked the month after the
+    row was read, the totals may predate its change, so the row is left
+    dirty for the next reader. A missing row is only created, dirty: a
+    concurrent writer cannot mark a row it cannot see yet, so it is filled
+    by a later refresh, once committed.
+    """
+    resumo = _ler(ano, mes)
+    kpis = dashboard_mes(ano, mes)
+    kpis = {chave: kpis[chave] for chave in CAMPOS_RESUMO.values()}
+    _, fim = intervalo_mes(ano, mes)
+    if resumo is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(ResumoMensal(ano=ano, mes=mes, fechado=fim <= date.today(), sujo=True))
+        except IntegrityError:
+            pass  # another worker created it first
+        return kpis, True
+
+    tabela = ResumoMensal.__table__
+    gravado = db.session.execute(
+        update(tabela)
+        .where(tabela.c.id == resumo.id, tabela.c.geracao == resumo.geracao)
+        .values(fechado=fim <= date.today(), sujo=False,
+                **{campo: kpis[chave] for campo, chave in CAMPOS_RESUMO.items()})
+    ).rowcount == 1
+    db.session.expire(resumo)
+    return kpis, gravado
+
+
+def _desatualizado(resumo: ResumoMensal | None, ano: int, mes: int) -> bool:
+    _, fim = intervalo_mes(ano, mes)
+    return resumo is None or resumo.sujo or (not resumo.fechado and fim <= date.today())
+
+
+@usa_primario
+def kpis_mes(ano: int, mes: int) -> tuple[dict, bool]:
+    """
+    Same keys as dashboard_mes, served from the rollup, and whether the
+    rollup was written: the caller commits only then.
+    """
+    resumo = _ler(ano, mes)
+    if _desatualizado(resumo, ano, mes):
+        kpis, alterado = atualizar_resumo(ano, mes)
+    else:
+        kpis, alterado = _para_dict(resumo), False
+    kpis["a_receber"] = a_receber_total()
+    return kpis, alterado
+
+
+@usa_primario
+def kpis_painel(ano: int, mes: int) -> dict:
+    """
+    kpis_mes for GET views. A fresh row is served without writing; a stale
+    one is refreshed and committed under the write gate (banco.escrevendo).
+    """
+    resumo = _ler(ano, mes)
+    if not _desatualizado(resumo, ano, mes):
+        return {**_para_dict(resumo), "a_receber": a_receber_total()}
+    with escrevendo():
+        kpis, alterado = kpis_mes(ano, mes)
+        if alterado:
+            db.session.commit()  # keep the refreshed rollup row
+    return kpis
+
+
+def recalcular_resumos(inicio: tuple[int, int], fim: tuple[int, int]) -> tuple[int, int]:
+    """
+    Rebuilds every month from `inicio` to `fim` (inclusive, (ano, mes)).
+    Returns (meses, pendentes): pendentes were created or changed
+    meanwhile and stay dirty; run again after committing.
+    """
+    ano, mes = inicio
+    total = pendentes = 0
+    while (ano, mes) <= fim:
+        existia = _ler(ano, mes) is not None
+        _, gravado = atualizar_resumo(ano, mes)
+        pendentes += not (existia and gravado)
+        total += 1
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return total, pendentes
+
+
+def _meses(valores) -> set[tuple[int, int]]:
+    return {(d.year, d.month) for d in valores if d is not None}
+
+
+def _historico(obj, campo: str) -> list:
+    hist = inspect(obj).attrs[campo].history
+    return [*hist.added, *hist.unchanged, *hist.deleted]
+
+
+@event.listens_for(Session, "after_flush")
+def _marcar_resumos_sujos(session: Session, flush_context) -> None:
+    meses: set[tuple[int, int]] = set()
+    pedido_ids: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Pagamento):
+            meses |= _meses(_historico(obj, "data_recebimento"))
+            pedido_ids.update(v for v in _historico(obj, "pedido_id") if v)
+        elif isinstance(obj, Despesa):
+            meses |= _meses(_historico(obj, "data"))
+        elif isinstance(obj, PedidoItem):
+            pedido_ids.update(v for v in _historico(obj, "pedido_id") if v)
+        elif isinstance(obj, Pedido):
+            estado = inspect(obj)
+            if (obj in session.new or obj in session.deleted
+                    or any(estado.attrs[c].history.has_changes() for c in CAMPOS_PEDIDO)):
+                pedido_ids.add(obj.id)
+
+    if not meses and not pedido_ids:
+        return
+
+    conn = session.connection()
+    if pedido_ids:
+        # The order may be realized in the month of any of its receipts
+        meses |= _meses(conn.execute(
+            select(Pagamento.data_recebimento).distinct()
+            .where(Pagamento.pedido_id.in_(pedido_ids))
+        ).scalars())
+
+    condicoes = [and_(ResumoMensal.ano == a, ResumoMensal.mes == m) for a, m in meses]
+    if pedido_ids:
+        condicoes.append(ResumoMensal.fechado.is_(False))
+    tabela = ResumoMensal.__table__
+    conn.execute(
+        update(tabela)
+        .where(or_(*condicoes))
+        .values(sujo=True, geracao=tabela.c.geracao + 1)
+    )
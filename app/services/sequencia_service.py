@@ -0,0 +1,74 @@
+"""
+sequencia_service.py
+====================
+Gap-free, concurrency-safe number allocator backed by the `sequencias` table.
+
+Each allocation is a single `UPDATE ... SET valor = valor + n RETURNING valor`
+executed inside the caller's transaction:
+  - PostgreSQL: the row lock serializes concurrent allocators until the
+    surrounding transaction ends, so two workers never get the same number
+    and a rolled-back order gives its number back (no gaps). A native
+    SEQUENCE would not roll back, hence the table.
+  - SQLite: the UPDATE takes the database write lock, with the same effect.
+The counter row is created on first use, seeded from the existing data.
+"""
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.sequencia import Sequencia
+from app.models.pedido import Pedido
+
+SEQUENCIA_PEDIDO = "pedido"
+PREFIXO_PEDIDO = "BD-"
+
+
+def _valor_inicial_pedido(session) -> int:
+    """Highest BD-number already in use (one-off scan when the counter is created)."""
+    ultimo = session.execute(
+        select(func.max(Pedido.numero_pedido)).where(Pedido.numero_pedido.like(f"{PREFIXO_PEDIDO}%"))
+    ).scalar()
+    try:
+        return int(ultimo.split("-")[1]) if ultimo else 0
+    except (IndexError, ValueError):
+        return 0
+
+
+VALORES_INICIAIS = {SEQUENCIA_PEDIDO: _valor_inicial_pedido}
+
+
+def reservar(nome: str, quantidade: int = 1, session=None) -> range:
+    """
+    Atomically reserves `quantidade` consecutive values of sequence `nome`
+    and returns them as a range. The reservation is part of the session's
+    current transaction.
+    """
+    if quantidade < 1:
+        raise ValueError("quantidade deve ser >= 1")
+    session = session or db.session
+    tabela = Sequencia.__table__
+    incremento = (
+        update(tabela)
+        .where(tabela.c.nome == nome)
+        .values(valor=tabela.c.valor + quantidade)
+        .returning(tabela.c.valor)
+    )
+    # Write first: the UPDATE takes the lock before anything is read
+    ultimo = session.execute(incremento).scalar()
+    if ultimo is None:
+        inicial = VALORES_INICIAIS.get(nome, lambda s: 0)(session)
+        try:
+            with session.begin_nested():
+                session.execute(insert(tabela).values(nome=nome, valor=inicial))
+        except IntegrityError:
+            pass  # another worker created it first
+        ultimo = session.execute(incremento).scalar()
+    return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+def formatar_numero_pedido(seq: int) -> str:
+    return f"{PREFIXO_PEDIDO}{seq:06d}"
+
+
+def reservar_numeros_pedido(quantidade: int, session=None) -> list[str]:
+    """Reserves a block of consecutive order numbers (bulk imports/API)."""
+    return [formatar_numero_pedido(s) for s in reservar(SEQUENCIA_PEDIDO, quantidade, session)]
@@ -0,0 +1,145 @@
+"""
+totais_service.py
+=================
+Keeps the persisted order totals on `pedidos` (subtotal, total_pedido,
+soma_recebida, custo_estimado) in sync with their itens and pagamentos.
+
+A session `after_flush` hook collects every order touched by the flush —
+new/edited/deleted PedidoItem or Pagamento rows, and orders whose desconto
+or taxa_entrega changed — and recomputes just those orders with a constant
+number of aggregate queries. `recalcular_totais` is also what the
+`flask recalcular-totais` command uses to fix drift.
+
+custo_estimado is a snapshot: it is priced at the current ficha costs only
+when the order itself changes, so later insumo price changes never rewrite
+a past order's lucro. The rebuild leaves it alone unless asked to
+reprice (`recustear=True`, `flask recalcular-totais --recustear`).
+"""
+from decimal import Decimal
+
+from sqlalchemy import event, select, update, bindparam, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.services.custo_service import custos_unitarios_por_produto
+
+CAMPOS_TOTAIS = ("subtotal", "total_pedido", "soma_recebida", "custo_estimado")
+CAMPOS_SEM_CUSTO = ("subtotal", "total_pedido", "soma_recebida")
+
+
+def _calcular_totais(conn, pedido_ids: list[int], recustear: bool = True) -> dict[int, dict]:
+    pedidos = conn.execute(
+        select(Pedido.id, Pedido.desconto, Pedido.taxa_entrega,
+               *(getattr(Pedido, c) for c in CAMPOS_TOTAIS))
+        .where(Pedido.id.in_(pedido_ids))
+    ).all()
+    itens = conn.execute(
+        select(PedidoItem.pedido_id, PedidoItem.produto_id,
+               PedidoItem.quantidade, PedidoItem.preco_unitario)
+        .where(PedidoItem.pedido_id.in_(pedido_ids))
+    ).all()
+    pagamentos = conn.execute(
+        select(Pagamento.pedido_id, Pagamento.valor_recebido, Pagamento.taxa_cartao)
+        .where(Pagamento.pedido_id.in_(pedido_ids))
+    ).all()
+    custos = custos_unitarios_por_produto(conn, (i.produto_id for i in itens)) if recustear else {}
+
+    totais = {
+        p.id: {"atual": p, "subtotal": Decimal("0"), "custo_itens": Decimal("0"),
+               "soma_recebida": Decimal("0"), "taxa_cartao": Decimal("0")}
+        for p in pedidos
+    }
+    for i in itens:
+        t = totais[i.pedido_id]
+        qtd = Decimal(str(i.quantidade))
+        t["subtotal"] += qtd * Decimal(str(i.preco_unitario))
+        t["custo_itens"] += custos.get(i.produto_id, Decimal("0")) * qtd
+    for pg in pagamentos:
+        t = totais[pg.pedido_id]
+        t["soma_recebida"] += Decimal(str(pg.valor_recebido))
+        t["taxa_cartao"] += Decimal(str(pg.taxa_cartao or 0))
+
+    resultado = {}
+    for pedido_id, t in totais.items():
+        p = t["atual"]
+        resultado[pedido_id] = {
+            "subtotal": t["subtotal"],
+            "total_pedido": t["subtotal"] - Decimal(str(p.desconto)) + Decimal(str(p.taxa_entrega)),
+            "soma_recebida": t["soma_recebida"],
+            "custo_estimado": t["custo_itens"] + t["taxa_cartao"],
+        }
+    return resultado
+
+
+def _divergente(atual, novo: dict, campos) -> bool:
+    for campo in campos:
+        valor = getattr(atual, campo)
+        if valor is None or abs(Decimal(str(valor)) - novo[campo]) >= Decimal("0.0001"):
+            return True
+    return False
+
+
+def recalcular_totais(conn, pedido_ids, recustear: bool = False) -> int:
+    """
+    Recomputes the persisted totals of the given orders and writes back only
+    the rows that drifted. Returns how many orders were updated. The
+    custo_estimado snapshot is only re-priced with `recustear`.
+    `conn` is a Session or Connection; the caller owns the transaction.
+    """
+    pedido_ids = list(set(pedido_ids))
+    if not pedido_ids:
+        return 0
+    campos = CAMPOS_TOTAIS if recustear else CAMPOS_SEM_CUSTO
+    atuais = {
+        r.id: r for r in conn.execute(
+            select(Pedido.id, *(getattr(Pedido, c) for c in CAMPOS_TOTAIS))
+            .where(Pedido.id.in_(pedido_ids))
+        ).all()
+    }
+    novos = _calcular_totais(conn, pedido_ids, recustear)
+    linhas = [
+        {"b_id": pedido_id, **{c: valores[c] for c in campos}}
+        for pedido_id, valores in novos.items()
+        if _divergente(atuais[pedido_id], valores, campos)
+    ]
+    if linhas:
+        conn.execute(
+            update(Pedido.__table__)
+            .where(Pedido.__table__.c.id == bindparam("b_id"))
+            .values({c: bindparam(c) for c in campos}),
+            linhas,
+        )
+    return len(linhas)
+
+
+def _pedidos_afetados(session: Session) -> set[int]:
+    afetados: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (PedidoItem, Pagamento)):
+            hist = inspect(obj).attrs.pedido_id.history
+            afetados.update(v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v)
+        elif isinstance(obj, Pedido) and obj not in session.deleted:
+            estado = inspect(obj)
+            if (obj in session.new
+                    or estado.attrs.desconto.history.has_changes()
+                    or estado.attrs.taxa_entrega.history.has_changes()):
+                afetados.add(obj.id)
+    return afetados
+
+
+@event.listens_for(Session, "after_flush")
+def _manter_totais(session: Session, flush_context) -> None:
+    afetados = _pedidos_afetados(session)
+    if afetados:
+        recalcular_totais(session.connection(), afetados, recustear=True)  # the order changed: new snapshot
+        session.info.setdefault("_totais_expirar", set()).update(afetados)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expirar_totais(session: Session, flush_context) -> None:
+    # The UPDATE bypassed the ORM: make loaded orders reload their totals
+    for pedido_id in session.info.pop("_totais_expirar", ()):
+        pedido = session.identity_map.get(identity_key(Pedido, pedido_id))
+        if pedido is not None:
+            session.expire(pedido, list(CAMPOS_TOTAIS) + ["updated_at"])
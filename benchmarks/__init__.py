@@ -0,0 +1,14 @@
+"""
+Benchmark suite for the hot routes and services.
+
+    python -m benchmarks executar --escala 1 --escala 10 --saida base.json
+    python -m benchmarks executar --url postgresql://localhost/bench_bdd --saida pg.json
+    python -m benchmarks comparar base.json novo.json --tolerancia 0.15
+
+`executar` builds a synthetic dataset per scale on a scratch database
+(a temporary SQLite file by default — the tables of --url are dropped and
+recreated, never point it at real data), times every scenario of
+`cenarios.CENARIOS` and writes the timings as JSON. `comparar` matches
+two result files by (cenario, banco, escala) and exits with status 1 when
+a median got slower than the tolerance allows.
+"""
@@ -0,0 +1,222 @@
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import click
+import sqlalchemy
+
+from benchmarks import carga as carga_mod
+from benchmarks.cenarios import CENARIOS
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(executar, repeticoes: int, aquecimento: int) -> dict:
+    """Runs `executar` aquecimento + repeticoes times; stats (ms) over the timed runs."""
+    for _ in range(aquecimento):
+        executar()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        executar()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "n": repeticoes,
+        "min_ms": tempos[0],
+        "mediana_ms": statistics.median(tempos),
+        "p95_ms": tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))],
+        "max_ms": tempos[-1],
+    }
+
+
+def rodar_escala(url: str, escala: int, cenarios: list[str], repeticoes: int, aquecimento: int) -> list[dict]:
+    """Rebuilds the schema at `url`, fills it at `escala` and times each scenario."""
+    from app import create_app
+    from app.extensions import db
+    from benchmarks.dados import gerar, EMAIL_BENCH, SENHA_BENCH
+
+    app = create_app("default", {"SQLALCHEMY_DATABASE_URI": url, "TESTING": True,
+                                 "WTF_CSRF_ENABLED": False, "PROFILER_ATIVO": False})
+    resultados = []
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        linhas = gerar(escala)
+        banco = db.engine.dialect.name
+        client = app.test_client()
+        client.post("/auth/login", data={"email": EMAIL_BENCH, "password": SENHA_BENCH})
+        for nome in cenarios:
+            estatisticas = medir(CENARIOS[nome](app, client), repeticoes, aquecimento)
+            resultados.append({"cenario": nome, "banco": banco, "escala": escala, "linhas": linhas,
+                               **estatisticas})
+            click.echo(f"  {banco:<10} x{escala:<4} {nome:<28} mediana {estatisticas['mediana_ms']:9.2f} ms"
+                       f"  p95 {estatisticas['p95_ms']:9.2f} ms")
+        db.session.remove()
+        db.engine.dispose()
+    return resultados
+
+
+def comparar_resultados(base: dict, novo: dict, tolerancia: float, minimo_ms: float) -> list[dict]:
+    """
+    Matches runs by (cenario, banco, escala). A scenario regressed when its
+    median grew by more than `tolerancia` (fraction) AND by more than
+    `minimo_ms` — sub-millisecond jitter is not a regression.
+    """
+    def chave(r):
+        return r["cenario"], r["banco"], r["escala"]
+
+    anteriores = {chave(r): r for r in base["resultados"]}
+    linhas = []
+    for r in novo["resultados"]:
+        antes = anteriores.get(chave(r))
+        if antes is None:
+            continue
+        delta = r["mediana_ms"] - antes["mediana_ms"]
+        variacao = delta / antes["mediana_ms"] if antes["mediana_ms"] else 0.0
+        linhas.append({
+            "cenario": r["cenario"], "banco": r["banco"], "escala": r["escala"],
+            "base_ms": antes["mediana_ms"], "novo_ms": r["mediana_ms"], "variacao": variacao,
+            "regressao": variacao > tolerancia and delta > minimo_ms,
+        })
+    return linhas
+
+
+@click.group()
+def cli():
+    """Benchmarks of the hot routes and services."""
+
+
+@cli.command()
+@click.option("--url", "urls", multiple=True,
+              help="Scratch database URL (repeatable). Default: a temporary SQLite file.")
+@click.option("--escala", "escalas", multiple=True, type=int, default=(1, 10), show_default=True)
+@click.option("--cenario", "cenarios", multiple=True, type=click.Choice(list(CENARIOS)),
+              help="Only these scenarios (repeatable). Default: all.")
+@click.option("--repeticoes", default=20, show_default=True)
+@click.option("--aquecimento", default=3, show_default=True)
+@click.option("--saida", type=click.Path(dir_okay=False), required=True, help="JSON results file.")
+def executar(urls, escalas, cenarios, repeticoes, aquecimento, saida):
+    """Time every scenario at every scale on every database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = urls or (f"sqlite:///{Path(tmp) / 'bench.db'}",)
+        resultados = []
+        for url in urls:
+            for escala in escalas:
+                resultados += rodar_escala(url, escala, list(cenarios or CENARIOS), repeticoes, aquecimento)
+    documento = {
+        "meta": {
+            "criado_em": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "repeticoes": repeticoes,
+        },
+        "resultados": resultados,
+    }
+    Path(saida).write_text(json.dumps(documento, indent=2), encoding="utf-8")
+    click.echo(f"✓ {len(resultados)} medição(ões) gravada(s) em {saida}")
+
+
+@cli.command()
+@click.option("--alvo", help="Base URL of a running server (e.g. http://127.0.0.1:8000).")
+@click.option("--servidor", "url_banco",
+              help="Scratch database URL: rebuilt with the synthetic dataset and served by gunicorn.")
+@click.option("--escala", default=1, show_default=True, help="Dataset scale for --servidor.")
+@click.option("--workers", default=2, show_default=True, help="gunicorn workers for --servidor.")
+@click.option("--usuarios", default=8, show_default=True, help="Concurrent virtual users.")
+@click.option("--acoes", default=50, show_default=True, help="Actions per user.")
+@click.option("--duracao", type=float, help="Stop after this many seconds (default: run every action).")
+@click.option("--mix", help=f"Action weights, e.g. novo_pedido=4,dashboard=1. Default: "
+                            f"{','.join(f'{k}={v}' for k, v in carga_mod.MIX_PADRAO.items())}.")
+@click.option("--semente", default=42, show_default=True)
+@click.option("--email", default=None, help="Login (default: the benchmark user).")
+@click.option("--senha", default=None)
+@click.option("--banco", help="Database label stored with the results (default: dialect of --servidor).")
+@click.option("--repetir", type=click.File(encoding="utf-8"),
+              help="Replay the configuration stored in a previous results file.")
+@click.option("--saida", type=click.Path(dir_okay=False), required=True, help="JSON results file.")
+def carga(alvo, url_banco, escala, workers, usuarios, acoes, duracao, mix, semente, email, senha, banco,
+          repetir, saida):
+    """Load-test a gunicorn server; throughput and latency percentiles per route."""
+    from benchmarks.dados import EMAIL_BENCH, SENHA_BENCH
+
+    if repetir:
+        config = json.load(repetir)["meta"]["config"]
+    else:
+        try:
+            config = {"usuarios": usuarios, "acoes": acoes, "duracao": duracao, "semente": semente,
+                      "mix": carga_mod.interpretar_mix(mix), "email": email or EMAIL_BENCH,
+                      "senha": senha or SENHA_BENCH}
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--mix")
+    if bool(alvo) == bool(url_banco):
+        raise click.UsageError("Informe --alvo ou --servidor (um dos dois).")
+    banco = banco or (sqlalchemy.engine.make_url(url_banco).get_backend_name() if url_banco else "externo")
+
+    try:
+        if url_banco:
+            with carga_mod.servidor_local(url_banco, escala, workers) as alvo:
+                relatorio = carga_mod.executar_carga({**config, "alvo": alvo})
+        else:
+            relatorio = carga_mod.executar_carga({**config, "alvo": alvo})
+    except carga_mod.FalhaCarga as e:
+        raise click.ClickException(str(e))
+
+    rotas = relatorio["rotas"]
+    total = sum(r["n"] for r in rotas)
+    erros = sum(r["erros"] for r in rotas)
+    for r in rotas:
+        click.echo(f"  {r['rota']:<32} {r['n']:>6} req {r['rps']:8.1f}/s  p50 {r['p50_ms']:8.1f}"
+                   f"  p95 {r['p95_ms']:8.1f}  p99 {r['p99_ms']:8.1f} ms  erros {r['erros']}")
+    click.echo(f"  {total} requisições em {relatorio['segundos']:.1f}s "
+               f"({total / relatorio['segundos']:.1f}/s), {erros} erro(s).")
+    documento = {
+        "meta": {
+            "criado_em": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "config": {k: v for k, v in config.items() if k != "alvo"},
+            "segundos": relatorio["segundos"],
+            "usuarios_com_falha": relatorio["usuarios_com_falha"],
+        },
+        "resultados": [{"cenario": r["rota"], "banco": banco, "escala": config["usuarios"],
+                        "mediana_ms": r["p50_ms"], **r} for r in rotas],
+    }
+    Path(saida).write_text(json.dumps(documento, indent=2), encoding="utf-8")
+    click.echo(f"✓ Resultados gravados em {saida}")
+
+
+@cli.command()
+@click.argument("base", type=click.File(encoding="utf-8"))
+@click.argument("novo", type=click.File(encoding="utf-8"))
+@click.option("--tolerancia", default=0.15, show_default=True, help="Allowed slowdown of the median (fraction).")
+@click.option("--minimo-ms", default=0.5, show_default=True, help="Ignore slowdowns smaller than this.")
+def comparar(base, novo, tolerancia, minimo_ms):
+    """Compare two result files; exit status 1 on regressions."""
+    linhas = comparar_resultados(json.load(base), json.load(novo), tolerancia, minimo_ms)
+    for ln in linhas:
+        marca = "REGRESSÃO" if ln["regressao"] else ""
+        click.echo(f"{ln['cenario']:<28} {ln['banco']:<10} x{ln['escala']:<4} "
+                   f"{ln['base_ms']:9.2f} → {ln['novo_ms']:9.2f} ms  {ln['variacao']:+7.1%}  {marca}")
+    regressoes = sum(ln["regressao"] for ln in linhas)
+    if regressoes:
+        click.echo(f"✗ {regressoes} regressão(ões) acima de {tolerancia:.0%}.")
+        sys.exit(1)
+    click.echo("✓ Nenhuma regressão.")
+
+
+if __name__ == "__main__":
+    cli()
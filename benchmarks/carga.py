@@ -0,0 +1,336 @@
+"""
+Load generator: virtual users drive a running server (gunicorn) over HTTP.
+
+Each virtual user keeps its own cookie session and keep-alive connection
+and repeats actions drawn from a weighted mix — login, order creation
+(form + typeahead), payments, status changes, dashboard and list views —
+submitting real forms with their CSRF tokens. Every HTTP request is timed
+and labelled by route (`POST /pedidos/<id>/pagamento`), so one action may
+produce several samples.
+
+Runs are replayable: user `n` draws its actions and payloads from
+`random.Random(f"{semente}-{n}")`, so the same seed, mix and user count
+send the same requests (up to the ids the server hands out). The
+configuration is stored in the results file for `--repetir`.
+"""
+import http.client
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+MIX_PADRAO = {
+    "login": 1, "novo_pedido": 4, "pagamento": 3, "status": 2,
+    "dashboard": 3, "lista_pedidos": 3, "agenda": 1,
+}
+PROXIMO_STATUS = {"Rascunho": "Agendado", "Agendado": "Em produção",
+                  "Em produção": "Pronto", "Pronto": "Entregue"}
+TERMOS_DESCOBERTA = ["an", "ma", "jo", "ca", "ra", "si", "sa", "li", "br", "pe"]
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+_ID_PEDIDO = re.compile(r"/pedidos/(\d+)$")
+
+
+class FalhaCarga(Exception):
+    """The target cannot be load-tested (unreachable, bad login, no data)."""
+
+
+def interpretar_mix(texto: str | None) -> dict[str, int]:
+    """'novo_pedido=4,dashboard=1' → weights; unknown actions are an error."""
+    if not texto:
+        return dict(MIX_PADRAO)
+    mix = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        nome = nome.strip()
+        if nome not in ACOES:
+            raise ValueError(f"Ação desconhecida no mix: {nome} (válidas: {', '.join(ACOES)})")
+        mix[nome] = int(peso or 1)
+    if not any(mix.values()):
+        raise ValueError("O mix precisa de pelo menos um peso positivo.")
+    return mix
+
+
+class Navegador:
+    """One browser: cookies, a keep-alive connection and the timed samples."""
+
+    def __init__(self, alvo: str, amostras: list, trava: threading.Lock):
+        partes = urlsplit(alvo)
+        self.host, self.porta = partes.hostname, partes.port or 80
+        self.conexao = None
+        self.cookies: dict[str, str] = {}
+        self.amostras, self.trava = amostras, trava
+
+    def requisitar(self, metodo: str, caminho: str, rota: str, dados: dict | None = None,
+                   cabecalhos: dict | None = None) -> tuple[int, dict, str]:
+        corpo = urlencode(dados, doseq=True) if dados is not None else None
+        cabecalhos = dict(cabecalhos or {})
+        if corpo is not None:
+            cabecalhos["Content-Type"] = "application/x-www-form-urlencoded"
+        if self.cookies:
+            cabecalhos["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        inicio = time.perf_counter()
+        try:
+            if self.conexao is None:
+                self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=60)
+            self.conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = self.conexao.getresponse()
+            texto = resposta.read().decode("utf-8", "replace")
+            status, headers = resposta.status, resposta.headers
+        except (OSError, http.client.HTTPException):
+            self.fechar()
+            status, headers, texto = 0, {}, ""
+        ms = (time.perf_counter() - inicio) * 1000
+        for valor in (headers.get_all("Set-Cookie") or []) if status else []:
+            for nome, morsel in SimpleCookie(valor).items():
+                self.cookies[nome] = morsel.value
+        with self.trava:
+            self.amostras.append((f"{metodo} {rota}", ms, not 200 <= status < 400))
+        return status, headers, texto
+
+    def csrf(self, html: str) -> str:
+        achado = _CSRF.search(html)
+        return achado.group(1) if achado else ""
+
+    def fechar(self) -> None:
+        if self.conexao is not None:
+            self.conexao.close()
+            self.conexao = None
+
+
+class Usuario:
+    """A virtual user: a Navegador plus its own RNG and the orders it created."""
+
+    def __init__(self, n: int, config: dict, dados: dict, amostras: list, trava: threading.Lock):
+        self.rnd = random.Random(f"{config['semente']}-{n}")
+        self.nav = Navegador(config["alvo"], amostras, trava)
+        self.email, self.senha = config["email"], config["senha"]
+        self.dados = dados
+        self.pedidos: dict[int, str] = {}  # id -> last known status
+
+    def login(self) -> None:
+        if self.nav.cookies:
+            self.nav.requisitar("GET", "/auth/logout", "/auth/logout")
+        _, _, html = self.nav.requisitar("GET", "/auth/login", "/auth/login")
+        status, headers, _ = self.nav.requisitar("POST", "/auth/login", "/auth/login", {
+            "csrf_token": self.nav.csrf(html), "email": self.email, "password": self.senha,
+        })
+        if status != 302 or urlsplit(headers.get("Location", "")).path.startswith("/auth/login"):
+            raise FalhaCarga(f"Login de {self.email} falhou (HTTP {status}).")
+
+    def novo_pedido(self) -> None:
+        _, _, html = self.nav.requisitar("GET", "/pedidos/novo", "/pedidos/novo")
+        termo = self.rnd.choice(self.dados["clientes"])["texto"][:3]
+        _, _, corpo = self.nav.requisitar("GET", "/busca/clientes?" + urlencode({"q": termo}),
+                                          "/busca/clientes")
+        try:
+            encontrados = json.loads(corpo)
+        except ValueError:
+            encontrados = []
+        cliente = encontrados[0] if encontrados else self.rnd.choice(self.dados["clientes"])
+        produtos = self.rnd.sample(self.dados["produtos"], min(len(self.dados["produtos"]), self.rnd.randint(1, 3)))
+        agendado = datetime.combine(date.today() + timedelta(days=self.rnd.randint(0, 7)),
+                                    datetime.min.time()).replace(hour=self.rnd.randint(9, 18))
+        status, headers, _ = self.nav.requisitar("POST", "/pedidos/novo", "/pedidos/novo", {
+            "csrf_token": self.nav.csrf(html), "idempotency_key": uuid.UUID(int=self.rnd.getrandbits(128)).hex,
+            "cliente_id": cliente["id"], "canal": cliente.get("canal") or "B2C",
+            "data_hora_agendada": agendado.isoformat(timespec="minutes"), "tipo_entrega": "Retirada",
+            "desconto": 0, "taxa_entrega": 0,
+            "produto_id[]": [p["id"] for p in produtos],
+            "quantidade[]": [self.rnd.randint(1, 12) for _ in produtos],
+            "preco_unitario[]": [p["preco_varejo"] for p in produtos],
+        })
+        achado = _ID_PEDIDO.search(urlsplit(headers.get("Location", "")).path) if status == 302 else None
+        if achado:
+            self.pedidos[int(achado.group(1))] = "Agendado"
+
+    def _meu_pedido(self) -> int:
+        if not self.pedidos:
+            self.novo_pedido()
+        return self.rnd.choice(sorted(self.pedidos)) if self.pedidos else 0
+
+    def pagamento(self) -> None:
+        pedido_id = self._meu_pedido()
+        if not pedido_id:
+            return
+        _, _, html = self.nav.requisitar("GET", f"/pedidos/{pedido_id}", "/pedidos/<id>")
+        self.nav.requisitar("POST", f"/pedidos/{pedido_id}/pagamento", "/pedidos/<id>/pagamento", {
+            "csrf_token": self.nav.csrf(html), "data_recebimento": date.today().isoformat(),
+            "forma_pagamento": self.rnd.choice(["PIX", "Dinheiro", "Cartão"]),
+            "valor_recebido": self.rnd.randint(5, 60), "taxa_cartao": 0,
+        }, {"Idempotency-Key": uuid.UUID(int=self.rnd.getrandbits(128)).hex})
+
+    def status(self) -> None:
+        pedido_id = self._meu_pedido()
+        if not pedido_id:
+            return
+        novo = PROXIMO_STATUS.get(self.pedidos[pedido_id])
+        if novo is None:  # delivered: done with this one
+            del self.pedidos[pedido_id]
+            return
+        _, _, html = self.nav.requisitar("GET", f"/pedidos/{pedido_id}", "/pedidos/<id>")
+        self.nav.requisitar("POST", f"/pedidos/{pedido_id}/status", "/pedidos/<id>/status",
+                            {"csrf_token": self.nav.csrf(html), "status": novo})
+        self.pedidos[pedido_id] = novo
+
+    def dashboard(self) -> None:
+        self.nav.requisitar("GET", "/", "/")
+
+    def lista_pedidos(self) -> None:
+        self.nav.requisitar("GET", "/pedidos/", "/pedidos/")
+
+    def agenda(self) -> None:
+        visao = self.rnd.choice(["dia", "semana", "mes"])
+        self.nav.requisitar("GET", f"/agenda?visao={visao}", "/agenda")
+
+
+ACOES = {nome: getattr(Usuario, nome) for nome in MIX_PADRAO}
+
+
+def descobrir(config: dict) -> dict:
+    """Logs in once and collects clientes/produtos through the typeahead endpoints."""
+    usuario = Usuario(-1, config, {}, [], threading.Lock())
+    try:
+        usuario.login()
+        dados = {}
+        for entidade in ("clientes", "produtos"):
+            vistos = {}
+            for termo in TERMOS_DESCOBERTA:
+                status, _, corpo = usuario.nav.requisitar(
+                    "GET", f"/busca/{entidade}?" + urlencode({"q": termo, "limite": 50}), f"/busca/{entidade}")
+                if status == 200:
+                    vistos.update((r["id"], r) for r in json.loads(corpo))
+            dados[entidade] = [vistos[k] for k in sorted(vistos)]
+    except OSError as e:
+        raise FalhaCarga(f"Servidor inacessível em {config['alvo']}: {e}")
+    finally:
+        usuario.nav.fechar()
+    if not dados["clientes"] or not dados["produtos"]:
+        raise FalhaCarga("Nenhum cliente/produto encontrado — carregue dados antes (flask seed-scale).")
+    return dados
+
+
+def percentil(ordenados: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir(amostras: list[tuple[str, float, bool]], segundos: float) -> list[dict]:
+    """Per-route throughput, error count and latency percentiles (ms)."""
+    por_rota: dict[str, list] = {}
+    for rota, ms, erro in amostras:
+        por_rota.setdefault(rota, []).append((ms, erro))
+    linhas = []
+    for rota in sorted(por_rota):
+        tempos = sorted(ms for ms, _ in por_rota[rota])
+        linhas.append({
+            "rota": rota,
+            "n": len(tempos),
+            "erros": sum(erro for _, erro in por_rota[rota]),
+            "rps": len(tempos) / segundos if segundos else 0.0,
+            "p50_ms": percentil(tempos, 50),
+            "p95_ms": percentil(tempos, 95),
+            "p99_ms": percentil(tempos, 99),
+            "max_ms": tempos[-1],
+        })
+    return linhas
+
+
+def executar_carga(config: dict) -> dict:
+    """
+    Runs `config['usuarios']` virtual users, each doing `config['acoes']`
+    actions (or until `config['duracao']` seconds pass, if set).
+    Returns {"segundos", "rotas": resumir(...)}.
+    """
+    mix = config["mix"]
+    nomes, pesos = list(mix), list(mix.values())
+    dados = descobrir(config)
+    amostras: list[tuple[str, float, bool]] = []
+    trava = threading.Lock()
+    erros: list[Exception] = []
+    largada = threading.Barrier(config["usuarios"] + 1)
+    limite = time.monotonic() + config["duracao"] if config.get("duracao") else None
+
+    def rodar(n: int):
+        usuario = Usuario(n, config, dados, amostras, trava)
+        try:
+            largada.wait()
+            usuario.login()
+            for _ in range(config["acoes"]):
+                if limite and time.monotonic() >= limite:
+                    break
+                ACOES[usuario.rnd.choices(nomes, pesos)[0]](usuario)
+        except Exception as e:  # surfaced by the caller
+            erros.append(e)
+        finally:
+            usuario.nav.fechar()
+
+    threads = [threading.Thread(target=rodar, args=(n,), daemon=True) for n in range(config["usuarios"])]
+    for t in threads:
+        t.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for t in threads:
+        t.join()
+    segundos = time.perf_counter() - inicio
+    if erros and not amostras:
+        raise FalhaCarga(str(erros[0]))
+    return {"segundos": segundos, "usuarios_com_falha": len(erros), "rotas": resumir(amostras, segundos)}
+
+
+@contextmanager
+def servidor_local(url_banco: str, escala: int, workers: int):
+    """
+    Rebuilds `url_banco` with the synthetic dataset (its tables are dropped —
+    scratch databases only), starts gunicorn on a free local port and yields
+    its base URL; the server is stopped on exit.
+    """
+    from app import create_app
+    from app.extensions import db
+    from benchmarks.dados import gerar
+
+    app = create_app("default", {"SQLALCHEMY_DATABASE_URI": url_banco})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        gerar(escala)
+        db.engine.dispose()
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        porta = s.getsockname()[1]
+    raiz = Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryFile() as log:
+        processo = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{porta}", "wsgi:app"],
+            cwd=raiz, env={**os.environ, "DATABASE_URL": url_banco, "PROFILER": "0"},
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            for _ in range(300):
+                if processo.poll() is not None:
+                    break
+                try:
+                    with socket.create_connection(("127.0.0.1", porta), timeout=0.1):
+                        break
+                except OSError:
+                    time.sleep(0.1)
+            if processo.poll() is not None:
+                log.seek(0)
+                raise FalhaCarga("gunicorn não subiu:\n" + log.read().decode("utf-8", "replace")[-2000:])
+            yield f"http://127.0.0.1:{porta}"
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
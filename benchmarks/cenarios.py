@@ -0,0 +1,79 @@
+"""
+Benchmark scenarios. Each one is `preparar(app, client) -> executar`:
+`preparar` runs once per scale (untimed) and returns the callable that is
+timed on every repetition. Write scenarios roll back what they did, so
+every repetition sees the same data.
+"""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select
+from app.extensions import db
+from app.models.pedido import Pedido
+from app.models.pagamento import Pagamento
+from app.models.ficha_tecnica import FichaTecnica
+from app.services.relatorio_service import dashboard_mes
+from app.services.pedido_service import iniciar_producao, atualizar_status_pagamento
+from app.services.ficha_service import resumo_ficha
+
+
+def _get(client, url: str):
+    def executar():
+        resposta = client.get(url)
+        assert resposta.status_code == 200, f"{url}: {resposta.status_code}"
+    return executar
+
+
+def _dashboard_mes(app, client):
+    hoje = date.today()
+    return lambda: dashboard_mes(hoje.year, hoje.month)
+
+
+def _iniciar_producao(app, client):
+    ids = iter(db.session.execute(
+        select(Pedido.id).where(Pedido.status_pedido.in_(["Rascunho", "Agendado"])).order_by(Pedido.id)
+    ).scalars().all())
+
+    def executar():
+        pedido = db.session.get(Pedido, next(ids))
+        try:
+            iniciar_producao(pedido)
+            db.session.flush()
+        finally:
+            db.session.rollback()
+    return executar
+
+
+def _atualizar_status_pagamento(app, client):
+    ids = iter(db.session.execute(
+        select(Pedido.id).where(Pedido.status_pagamento == "Não pago").order_by(Pedido.id)
+    ).scalars().all())
+
+    def executar():
+        pedido = db.session.get(Pedido, next(ids))
+        try:
+            db.session.add(Pagamento(pedido_id=pedido.id, data_recebimento=date.today(),
+                                     forma_pagamento="PIX", valor_recebido=Decimal("10")))
+            atualizar_status_pagamento(pedido)
+        finally:
+            db.session.rollback()
+    return executar
+
+
+def _resumo_ficha(app, client):
+    def executar():
+        for ficha in db.session.execute(select(FichaTecnica)).scalars():
+            resumo_ficha(ficha)
+        db.session.rollback()
+    return executar
+
+
+CENARIOS = {
+    "dashboard_mes": _dashboard_mes,
+    "iniciar_producao": _iniciar_producao,
+    "atualizar_status_pagamento": _atualizar_status_pagamento,
+    "resumo_ficha": _resumo_ficha,
+    "pedidos.listar": lambda app, client: _get(client, "/pedidos/"),
+    "fichas.listar": lambda app, client: _get(client, "/fichas/"),
+    "main.agenda": lambda app, client: _get(client, "/agenda?visao=mes"),
+}
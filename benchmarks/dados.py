@@ -0,0 +1,18 @@
+"""Synthetic dataset for the benchmarks: the `flask seed-scale` generator plus a login."""
+from app.extensions import db
+from app.models.usuario import Usuario
+from app.services.dados_sinteticos_service import gerar_dados
+
+EMAIL_BENCH = "bench@browniedudu.com"
+SENHA_BENCH = "bench"
+
+
+def gerar(escala: int, semente: int = 42) -> dict:
+    """Fills an empty schema; returns the row counts. Same (escala, semente) → same data."""
+    admin = Usuario(nome="Bench", email=EMAIL_BENCH, role="Admin")
+    admin.set_password(SENHA_BENCH)
+    db.session.add(admin)
+    db.session.flush()
+    linhas = gerar_dados(semente, escala)
+    db.session.commit()
+    return linhas
@@ -32,4 +32,114 @@ with app.app_context():
         print(f"Erro ao atualizar precisão: {e}")
         db.session.rollback()
 
+    try:
+        # Persisted order totals (see app/services/totais_service.py)
+        alter_sql = """
+        ALTER TABLE pedidos
+          ADD COLUMN IF NOT EXISTS subtotal NUMERIC(14, 4) NOT NULL DEFAULT 0,
+          ADD COLUMN IF NOT EXISTS total_pedido NUMERIC(14, 4) NOT NULL DEFAULT 0,
+          ADD COLUMN IF NOT EXISTS soma_recebida NUMERIC(12, 2) NOT NULL DEFAULT 0,
+          ADD COLUMN IF NOT EXISTS custo_estimado NUMERIC(14, 4) NOT NULL DEFAULT 0;
+        """
+        db.session.execute(text(alter_sql))
+        db.session.commit()
+        print("Colunas de totais adicionadas em pedidos — rode 'flask recalcular-totais'.")
+    except Exception as e:
+        print(f"Erro ao adicionar totais: {e}")
+        db.session.rollback()
+
+    try:
+        # Cost engine version stamp (see app/services/custo_service.py)
+        db.session.execute(text(
+            "ALTER TABLE fichas_tecnicas ADD COLUMN IF NOT EXISTS versao_custo INTEGER NOT NULL DEFAULT 0"
+        ))
+        db.session.commit()
+        print("Coluna versao_custo adicionada em fichas_tecnicas.")
+    except Exception as e:
+        print(f"Erro ao adicionar versao_custo: {e}")
+        db.session.rollback()
+
+    try:
+        # Date indexes used by the half-open month ranges in relatorio_service
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_pagamentos_data_recebimento ON pagamentos (data_recebimento)"
+        ))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_despesas_data ON despesas (data)"))
+        db.session.commit()
+        print("Índices de data criados.")
+    except Exception as e:
+        print(f"Erro ao criar índices: {e}")
+        db.session.rollback()
+
+    try:
+        # Ledger range scans for point-in-time stock (see app/services/estoque_service.py)
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_movimentacoes_estoque_insumo_data "
+            "ON movimentacoes_estoque (insumo_id, data)"
+        ))
+        db.session.commit()
+        print("Índice do razão de estoque criado — rode 'flask estoque-snapshots --conciliar'.")
+    except Exception as e:
+        print(f"Erro ao criar índice do razão: {e}")
+        db.session.rollback()
+
+    try:
+        # Generated low-stock margin (see Insumo.folga_estoque)
+        db.session.execute(text("""
+        ALTER TABLE insumos ADD COLUMN IF NOT EXISTS folga_estoque NUMERIC(14, 4)
+          GENERATED ALWAYS AS (estoque_atual - CASE WHEN minimo_em_embalagem
+            THEN estoque_minimo * peso_por_embalagem ELSE estoque_minimo END) STORED
+        """))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_insumos_ativo_folga_estoque ON insumos (ativo, folga_estoque)"
+        ))
+        db.session.commit()
+        print("Coluna folga_estoque e índice de estoque baixo criados.")
+    except Exception as e:
+        print(f"Erro ao criar folga_estoque: {e}")
+        db.session.rollback()
+
+    try:
+        # Date-range filters of the streaming exports (see app/services/exportacao_service.py)
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_pedidos_data_pedido ON pedidos (data_pedido)"))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_movimentacoes_estoque_data ON movimentacoes_estoque (data)"
+        ))
+        db.session.commit()
+        print("Índices de data das exportações criados.")
+    except Exception as e:
+        print(f"Erro ao criar índices das exportações: {e}")
+        db.session.rollback()
+
+    try:
+        # Keyset order of the unfiltered cliente/produto lists (see busca_service.listar_pagina)
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_clientes_nome_id ON clientes (nome, id)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_produtos_nome_id ON produtos (nome, id)"))
+        db.session.commit()
+        print("Índices das listas de clientes e produtos criados.")
+    except Exception as e:
+        print(f"Erro ao criar índices das listas: {e}")
+        db.session.rollback()
+
+    try:
+        # Lease of in-progress idempotency claims (see app/services/idempotencia_service.py)
+        db.session.execute(text(
+            "ALTER TABLE IF EXISTS chaves_idempotencia ADD COLUMN IF NOT EXISTS em_andamento_ate TIMESTAMPTZ"
+        ))
+        db.session.commit()
+        print("Coluna em_andamento_ate adicionada em chaves_idempotencia.")
+    except Exception as e:
+        print(f"Erro ao adicionar em_andamento_ate: {e}")
+        db.session.rollback()
+
+    try:
+        # Trigram indexes for the typeahead search (see app/services/busca_service.py)
+        from app.services.busca_service import instalar
+        instalar(db.session.connection())
+        db.session.commit()
+        print("Extensões pg_trgm/unaccent e índices de busca criados.")
+    except Exception as e:
+        print(f"Erro ao criar índices de busca: {e}")
+        db.session.rollback()
+
 print("Migração concluída! 🚀")
@@ -20,6 +20,21 @@ def app():
         _db.drop_all()
 
 
+@pytest.fixture
+def app_arquivo(tmp_path, monkeypatch):
+    """Separate app on a SQLite file so several threads can share the database."""
+    from app.config import DevelopmentConfig
+    monkeypatch.setattr(DevelopmentConfig, "SQLALCHEMY_DATABASE_URI",
+                        f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app("default")
+    app.config["TESTING"] = True
+    with app.app_context():
+        _db.create_all()
+    yield app
+    with app.app_context():
+        _db.engine.dispose()
+
+
 def _seed_test_data():
     """Minimal seed for tests."""
     from app.models.usuario import Usuario
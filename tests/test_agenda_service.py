@@ -0,0 +1,43 @@
+"""test_agenda_service.py — range-based agenda and its JSON feed."""
+from datetime import date, datetime, timezone
+import pytest
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido
+from app.services.pedido_service import gerar_numero_pedido
+from app.services.agenda_service import intervalo_agenda, navegacao, pedidos_agenda, feed_agenda
+
+
+def test_ranges():
+    quarta = date(2031, 1, 1)
+    assert intervalo_agenda(quarta, "dia") == (quarta, date(2031, 1, 2))
+    assert intervalo_agenda(quarta, "semana") == (date(2030, 12, 30), date(2031, 1, 6))
+    assert intervalo_agenda(quarta, "mes") == (date(2031, 1, 1), date(2031, 2, 1))
+    assert navegacao(quarta, "mes") == (date(2030, 12, 1), date(2031, 2, 1))
+    assert navegacao(quarta, "semana") == (date(2030, 12, 23), date(2031, 1, 6))
+
+
+def test_half_open_window_includes_last_second(app):
+    with app.app_context():
+        cliente = Cliente(nome="Cliente Agenda")
+        db.session.add(cliente)
+        db.session.flush()
+        horarios = [datetime(2031, 1, 5, 23, 59, 59, 500000, tzinfo=timezone.utc),  # last second of Sunday
+                    datetime(2031, 1, 6, 0, 0, tzinfo=timezone.utc)]               # next week
+        for h in horarios:
+            db.session.add(Pedido(numero_pedido=gerar_numero_pedido(), cliente_id=cliente.id, canal="B2C",
+                                  data_pedido=date(2031, 1, 1), data_hora_agendada=h,
+                                  status_pedido="Agendado", desconto=0, taxa_entrega=0))
+        db.session.flush()
+        db.session.expunge_all()
+
+        semana = pedidos_agenda(*intervalo_agenda(date(2031, 1, 1), "semana"))
+        assert [p.data_hora_agendada.day for p in semana] == [5]
+        assert "cliente" in semana[0].__dict__  # eager-loaded
+
+        eventos = feed_agenda(date(2031, 1, 5), date(2031, 1, 7))
+        assert [e["inicio"][:10] for e in eventos] == ["2031-01-05", "2031-01-06"]
+        assert eventos[0]["cliente"] == "Cliente Agenda" and eventos[0]["total"] == "0.0000"
+        with pytest.raises(ValueError):
+            feed_agenda(date(2031, 1, 1), date(2031, 6, 1))
+        db.session.rollback()
@@ -0,0 +1,96 @@
+"""test_api.py — token-authenticated JSON API and bulk order creation."""
+from decimal import Decimal
+import pytest
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.pedido import Pedido, PedidoItem
+from app.models.token_api import TokenApi
+from app.models.usuario import Usuario
+from app.services.api_service import criar_token
+
+
+@pytest.fixture
+def api(app):
+    """(client, headers, cliente_id, produto_id) with a fresh token and B2B cliente."""
+    with app.app_context():
+        usuario = db.session.execute(db.select(Usuario).where(Usuario.email == "admin@test.com")).scalar_one()
+        cliente = Cliente(nome="Atacadista API", canal_preferencial="B2B", tabela_preco="Atacado")
+        produto = Produto(nome="Brownie API", sku="API-001", preco_varejo=12, preco_atacado=9)
+        db.session.add_all([cliente, produto])
+        db.session.flush()
+        token = criar_token(usuario, "teste")
+        db.session.commit()
+        cliente_id, produto_id = cliente.id, produto.id
+        yield app.test_client(), {"Authorization": f"Bearer {token}"}, cliente_id, produto_id
+
+        pedido_ids = db.select(Pedido.id).where(Pedido.cliente_id == cliente_id)
+        db.session.execute(db.delete(PedidoItem).where(PedidoItem.pedido_id.in_(pedido_ids)))
+        db.session.execute(db.delete(Pedido).where(Pedido.cliente_id == cliente_id))
+        db.session.execute(db.delete(TokenApi))
+        db.session.execute(db.delete(Produto).where(Produto.id == produto_id))
+        db.session.execute(db.delete(Cliente).where(Cliente.id == cliente_id))
+        db.session.commit()
+
+
+def test_requires_token(client):
+    assert client.get("/api/v1/pedidos").status_code == 401
+    resposta = client.get("/api/v1/pedidos", headers={"Authorization": "Bearer errado"})
+    assert resposta.status_code == 401 and "erro" in resposta.get_json()
+
+
+def test_bulk_create_and_read(app, api):
+    client, headers, cliente_id, produto_id = api
+    lote = [{"cliente_id": cliente_id, "itens": [{"produto_id": produto_id, "quantidade": n}]}
+            for n in range(1, 51)]
+    lote[0]["itens"].append({"produto_id": produto_id, "quantidade": "2", "preco_unitario": "10.50"})
+    lote[1]["data_hora_agendada"] = "2031-05-02T14:00:00"
+
+    resposta = client.post("/api/v1/pedidos/lote", json={"pedidos": lote}, headers=headers)
+    assert resposta.status_code == 201
+    criados = resposta.get_json()["pedidos"]
+    assert len(criados) == 50
+    numeros = [int(c["numero_pedido"].split("-")[1]) for c in criados]
+    assert numeros == list(range(numeros[0], numeros[0] + 50))  # one consecutive block
+    assert Decimal(criados[0]["total_pedido"]) == Decimal("9") + Decimal("21")  # Atacado price + override
+
+    detalhe = client.get(f"/api/v1/pedidos/{criados[1]['id']}", headers=headers).get_json()
+    assert detalhe["canal"] == "B2B" and detalhe["status_pedido"] == "Agendado"
+    assert detalhe["itens"] == [{"produto_id": produto_id, "quantidade": "2.00", "preco_unitario": "9.00"}]
+    assert detalhe["total_pedido"] == detalhe["subtotal"]
+    assert client.get("/api/v1/pagamentos?de=2031-01-01", headers=headers).get_json()["pagamentos"] == []
+
+
+def test_bulk_create_is_all_or_nothing(app, api):
+    client, headers, cliente_id, produto_id = api
+    with app.app_context():
+        antes = db.session.execute(db.select(db.func.count(Pedido.id))).scalar()
+    lote = [
+        {"cliente_id": cliente_id, "itens": [{"produto_id": produto_id, "quantidade": 1}]},
+        {"cliente_id": 999999, "itens": [{"produto_id": produto_id, "quantidade": 1}]},
+        {"cliente_id": cliente_id, "itens": [{"produto_id": produto_id, "quantidade": 0}]},
+    ]
+    resposta = client.post("/api/v1/pedidos/lote", json={"pedidos": lote}, headers=headers)
+    assert resposta.status_code == 422
+    assert [e["pedido"] for e in resposta.get_json()["erros"]] == [1, 2]
+    with app.app_context():
+        assert db.session.execute(db.select(db.func.count(Pedido.id))).scalar() == antes
+
+
+def test_bulk_create_rejects_out_of_range_and_bad_text(app, api):
+    client, headers, cliente_id, produto_id = api
+    item = {"produto_id": produto_id, "quantidade": 1}
+    lote = [
+        {"cliente_id": cliente_id, "itens": [{"produto_id": produto_id, "quantidade": "1e30"}]},
+        {"cliente_id": cliente_id, "itens": [dict(item, preco_unitario=1e12)]},
+        {"cliente_id": cliente_id, "itens": [item], "desconto": "NaN"},
+        {"cliente_id": cliente_id, "itens": [item], "canal": "Atacado"},
+        {"cliente_id": cliente_id, "itens": [item], "observacoes": {"x": 1}},
+        {"cliente_id": cliente_id, "itens": [item], "endereco_entrega": "R" * 501},
+        {"cliente_id": cliente_id, "itens": [item], "canal": "B2C", "observacoes": "ok"},
+    ]
+    resposta = client.post("/api/v1/pedidos/lote", json={"pedidos": lote}, headers=headers)
+    assert resposta.status_code == 422
+    erros = resposta.get_json()["erros"]
+    assert [e["pedido"] for e in erros] == [0, 1, 2, 3, 4, 5]
+    assert "fora do limite" in erros[0]["erro"] and "fora do limite" in erros[1]["erro"]
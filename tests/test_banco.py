@@ -0,0 +1,130 @@
+"""test_banco.py — engine profiles, SQLite pragmas and the SQLite single-writer mode."""
+import multiprocessing
+import pytest
+from sqlalchemy import text, select
+from sqlalchemy.pool import NullPool
+from app import create_app
+from app.banco import detectar_perfil, opcoes_engine
+from app.config import Config
+from app.extensions import db
+from app.models.pedido import Pedido
+
+CONFIG = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+
+
+def test_profile_detection():
+    assert detectar_perfil("sqlite:///x.db", {}) == "sqlite"
+    assert detectar_perfil("postgresql://u@db:5432/bdd", {}) == "servidor"
+    assert detectar_perfil("postgresql://u@aws-0.pooler.supabase.com:6543/postgres", {}) == "pooler"
+    assert detectar_perfil("postgresql://u@db:5432/bdd", {"VERCEL": "1"}) == "serverless"
+
+
+def test_profile_options():
+    assert opcoes_engine("serverless", "postgresql://u@h/b", CONFIG)["poolclass"] is NullPool
+    servidor = opcoes_engine("servidor", "postgresql://u@h/b", CONFIG)
+    assert servidor["pool_pre_ping"] and servidor["pool_size"] == CONFIG["DB_POOL_SIZE"]
+    assert opcoes_engine("pooler", "postgresql+psycopg://u@h:6543/b", CONFIG)["connect_args"]["prepare_threshold"] is None
+
+
+def test_explicit_options_win_and_pragmas_apply(tmp_path):
+    app = create_app("default", {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'p.db'}",
+                                 "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 3}}})
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] == {"timeout": 3}
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        db.engine.dispose()
+
+
+def test_invalid_profile_is_rejected():
+    with pytest.raises(ValueError):
+        create_app("default", {"DB_PERFIL": "servidor", "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+
+PROCESSOS, PEDIDOS_POR_PROCESSO = 4, 12
+
+
+def _config_concorrente(caminho) -> dict:
+    return {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{caminho}", "SQLITE_CONCORRENTE": True,
+            "TESTING": True, "WTF_CSRF_ENABLED": False, "SECRET_KEY": "test-secret"}
+
+
+def _criar_pedidos(caminho, n: int, fila) -> None:
+    """Child process: its own app and engine, logs in and posts orders as fast as it can."""
+    status = []
+    try:
+        app = create_app("default", _config_concorrente(caminho))
+        client = app.test_client()
+        status.append(client.post("/auth/login", data={"email": "admin@test.com", "password": "password"}).status_code)
+        for i in range(PEDIDOS_POR_PROCESSO):
+            status.append(client.post("/pedidos/novo", data={
+                "cliente_id": "1", "produto_id[]": ["1"], "quantidade[]": [str(i + 1)], "preco_unitario[]": ["12"],
+            }).status_code)
+            if i % 4 == 0:
+                status.append(client.get("/").status_code)  # reader that refreshes the rollup
+    except Exception as e:
+        status.append(repr(e))
+    fila.put((n, status))
+
+
+def test_several_processes_create_orders_without_lock_errors(tmp_path):
+    from app.models.usuario import Usuario
+    from app.models.cliente import Cliente
+    from app.models.produto import Produto
+
+    caminho = tmp_path / "concorrente.db"
+    app = create_app("default", _config_concorrente(caminho))
+    with app.app_context():
+        db.create_all()
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        admin = Usuario(nome="Admin", email="admin@test.com", role="Admin")
+        admin.set_password("password")
+        db.session.add_all([admin, Cliente(nome="Cliente Concorrente"),
+                            Produto(nome="Brownie", sku="CONC-1", preco_varejo=12, preco_atacado=9)])
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+    contexto = multiprocessing.get_context("fork")
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=_criar_pedidos, args=(caminho, n, fila)) for n in range(PROCESSOS)]
+    for p in processos:
+        p.start()
+    resultados = dict(fila.get(timeout=120) for _ in processos)
+    for p in processos:
+        p.join(timeout=30)
+
+    for status in resultados.values():
+        assert set(status) <= {200, 302}, status
+    with app.app_context():
+        numeros = db.session.execute(select(Pedido.numero_pedido)).scalars().all()
+        db.engine.dispose()
+    assert len(numeros) == len(set(numeros)) == PROCESSOS * PEDIDOS_POR_PROCESSO
+
+
+def test_dashboard_takes_the_write_gate_only_to_refresh_the_rollup(tmp_path):
+    from app.models.usuario import Usuario
+
+    app = create_app("default", _config_concorrente(tmp_path / "painel.db"))
+    with app.app_context():
+        db.create_all()
+        admin = Usuario(nome="Admin", email="admin@test.com", role="Admin")
+        admin.set_password("password")
+        db.session.add(admin)
+        db.session.commit()
+
+    portao = app.extensions["portao_escrita"]
+    adquirir, entradas = portao.adquirir, []
+    portao.adquirir = lambda: entradas.append(1) or adquirir()
+    client = app.test_client()
+    client.post("/auth/login", data={"email": "admin@test.com", "password": "password"})
+    entradas.clear()
+
+    assert client.get("/").status_code == 200  # missing row: created under the gate
+    assert client.get("/").status_code == 200  # dirty row: refreshed under the gate
+    assert len(entradas) == 2
+    assert client.get("/").status_code == 200
+    assert client.get("/financeiro/").status_code == 200
+    assert len(entradas) == 2  # fresh rollup: plain reads
+    with app.app_context():
+        db.engine.dispose()
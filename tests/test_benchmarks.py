@@ -0,0 +1,57 @@
+"""test_benchmarks.py — the benchmark scenarios and the load test keep running; regressions are flagged."""
+import threading
+from sqlalchemy import select, func
+from werkzeug.serving import make_server
+from app.extensions import db
+from app.models.pedido import Pedido
+from benchmarks.__main__ import comparar_resultados, medir
+from benchmarks.carga import executar_carga, interpretar_mix, percentil
+from benchmarks.cenarios import CENARIOS
+from benchmarks.dados import gerar, EMAIL_BENCH, SENHA_BENCH
+
+
+def test_every_scenario_runs_on_the_synthetic_dataset(app_arquivo):
+    app_arquivo.config["WTF_CSRF_ENABLED"] = False
+    with app_arquivo.app_context():
+        linhas = gerar(1)
+        assert linhas["pedidos"] == 1000
+        client = app_arquivo.test_client()
+        client.post("/auth/login", data={"email": EMAIL_BENCH, "password": SENHA_BENCH})
+        for nome, preparar in CENARIOS.items():
+            assert medir(preparar(app_arquivo, client), repeticoes=2, aquecimento=0)["n"] == 2, nome
+        db.session.remove()
+
+
+def test_compare_flags_only_real_slowdowns():
+    def rodada(**medianas):
+        return {"resultados": [{"cenario": c, "banco": "sqlite", "escala": 1, "mediana_ms": m}
+                               for c, m in medianas.items()]}
+
+    linhas = comparar_resultados(rodada(a=10.0, b=0.2, c=10.0), rodada(a=13.0, b=0.4, c=10.5),
+                                 tolerancia=0.15, minimo_ms=0.5)
+    assert {ln["cenario"]: ln["regressao"] for ln in linhas} == {"a": True, "b": False, "c": False}
+
+
+def test_load_test_drives_the_real_forms(app_arquivo):
+    with app_arquivo.app_context():
+        gerar(1)
+        db.session.remove()
+    servidor = make_server("127.0.0.1", 0, app_arquivo, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        relatorio = executar_carga({
+            "alvo": f"http://127.0.0.1:{servidor.server_port}", "usuarios": 2, "acoes": 15,
+            "semente": 1, "mix": interpretar_mix("novo_pedido=2,pagamento=1,status=1,dashboard=1"),
+            "email": EMAIL_BENCH, "senha": SENHA_BENCH,
+        })
+    finally:
+        servidor.shutdown()
+    rotas = {r["rota"]: r for r in relatorio["rotas"]}
+    assert relatorio["usuarios_com_falha"] == 0
+    assert {"POST /auth/login", "POST /pedidos/novo", "GET /"} <= set(rotas)
+    assert sum(r["erros"] for r in rotas.values()) == 0
+    with app_arquivo.app_context():  # the forms were accepted, not re-rendered
+        criados = db.session.execute(select(func.count()).where(Pedido.created_by.is_not(None))).scalar()
+        assert criados == rotas["POST /pedidos/novo"]["n"]
+        db.session.remove()
+    assert percentil([1.0, 2.0, 3.0, 4.0], 50) == 2.0 and percentil([1.0, 2.0, 3.0, 4.0], 99) == 4.0
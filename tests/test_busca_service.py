@@ -0,0 +1,63 @@
+"""test_busca_service.py — indexed typeahead over clientes, produtos and pedidos."""
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.services.busca_service import buscar, listar_pagina
+
+
+def test_clientes_accent_prefix_and_digits(app):
+    with app.app_context():
+        db.session.add_all([
+            Cliente(nome="José Antônio Busca", telefone="(11) 98765-4321", documento="123.456.789-00"),
+            Cliente(nome="Josefa Inativa Busca", ativo=False),
+        ])
+        db.session.flush()
+
+        nomes = lambda termo, **kw: [r["texto"] for r in buscar("clientes", termo, **kw)]  # noqa: E731
+        assert nomes("jose anton") == ["José Antônio Busca"]
+        assert nomes("98765-43") == ["José Antônio Busca"]  # local number, no area code
+        assert nomes("123.456") == ["José Antônio Busca"]
+        assert "Josefa Inativa Busca" in nomes("jos busca", somente_ativos=False)
+
+        cliente = db.session.execute(db.select(Cliente).where(Cliente.nome == "José Antônio Busca")).scalar()
+        cliente.nome = "Renomeado Busca"
+        db.session.flush()  # triggers keep the index in step with the table
+        assert nomes("jose anton") == []
+        assert nomes("renome") == ["Renomeado Busca"]
+        db.session.rollback()
+
+
+def test_produtos_search(app):
+    with app.app_context():
+        db.session.add(Produto(nome="Brownie Meio Amargo", sku="BUSCA-MA", preco_varejo=15, preco_atacado=11))
+        db.session.flush()
+        resultado = buscar("produtos", "meio amarg")
+        assert [r["sku"] for r in resultado] == ["BUSCA-MA"]
+        assert resultado[0]["preco_atacado"] == "11.00"
+        assert buscar("produtos", "busca-ma")[0]["texto"] == "Brownie Meio Amargo"
+        db.session.rollback()
+
+
+def test_search_endpoint(auth_client):
+    resposta = auth_client.get("/busca/produtos?q=test-001")
+    assert resposta.status_code == 200
+    assert [r["texto"] for r in resposta.get_json()] == ["Brownie Test"]
+    assert auth_client.get("/busca/usuarios?q=a").status_code == 404
+
+
+def test_unfiltered_list_is_paged_by_name(app):
+    with app.app_context():
+        db.session.add_all([Cliente(nome=nome) for nome in ("Zé", "Ana", "Bia", "Ana", "Caio", "Ana", "Bia")])
+        db.session.flush()
+        esperado = [c.id for c in db.session.execute(
+            db.select(Cliente).order_by(Cliente.nome, Cliente.id)).scalars()]
+
+        vistos, cursor = [], None
+        while True:
+            pagina, cursor = listar_pagina("clientes", cursor, limite=3)
+            assert len(pagina) <= 3
+            vistos.extend(c.id for c in pagina)
+            if not cursor:
+                break
+        assert vistos == esperado
+        db.session.rollback()
@@ -0,0 +1,115 @@
+"""test_custo_service.py — cached recipe costs and dependency-aware invalidation."""
+from decimal import Decimal
+from sqlalchemy import event
+from app.extensions import db
+from app.models.produto import Produto
+from app.models.insumo import Insumo
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+from app.services.custo_service import custos_por_produto
+
+
+def _contar_queries(fn):
+    statements = []
+    ouvinte = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", ouvinte)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", ouvinte)
+    return len(statements)
+
+
+def _ficha_com(insumo: Insumo, sku: str, quantidade) -> FichaTecnica:
+    produto = Produto(nome=f"Produto {sku}", sku=sku, preco_varejo=10, preco_atacado=8)
+    db.session.add(produto)
+    db.session.flush()
+    ficha = FichaTecnica(produto_id=produto.id, rendimento_unidades=Decimal("7"),
+                         mao_de_obra_total=Decimal("3.33"), perdas_percentual=Decimal("2.5"),
+                         margem_desejada_percentual=50)
+    db.session.add(ficha)
+    db.session.flush()
+    db.session.add(FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=insumo.id,
+                                    quantidade_por_receita=quantidade))
+    db.session.flush()
+    return ficha
+
+
+def test_engine_matches_direct_walk_and_caches(app):
+    with app.app_context():
+        insumo = Insumo(nome="Cacau Custo", unidade="g", preco_compra_embalagem=Decimal("47.90"),
+                        peso_por_embalagem=Decimal("333"))
+        db.session.add(insumo)
+        db.session.flush()
+        ficha = _ficha_com(insumo, "CUSTO-1", Decimal("123.4567"))
+
+        assert ficha.custo_unitario == ficha.calcular_custos()["custo_unitario"]
+        assert _contar_queries(lambda: ficha.custo_unitario) == 0
+        assert custos_por_produto(db.session, [ficha.produto_id])[ficha.produto_id] == ficha.calcular_custos()
+        db.session.rollback()
+
+
+def test_insumo_change_invalidates_only_dependent_fichas(app):
+    with app.app_context():
+        usado = Insumo(nome="Usado", unidade="g", preco_compra_embalagem=10, peso_por_embalagem=100)
+        outro = Insumo(nome="Outro", unidade="g", preco_compra_embalagem=10, peso_por_embalagem=100)
+        db.session.add_all([usado, outro])
+        db.session.flush()
+        afetada = _ficha_com(usado, "CUSTO-2", 50)
+        intacta = _ficha_com(outro, "CUSTO-3", 50)
+        antes = afetada.custo_unitario
+        versao_intacta = intacta.versao_custo
+
+        usado.preco_compra_embalagem = Decimal("20")
+        db.session.flush()
+
+        assert intacta.versao_custo == versao_intacta
+        assert afetada.custo_unitario > antes
+        assert afetada.custo_unitario == afetada.calcular_custos()["custo_unitario"]
+        db.session.rollback()
+
+
+def test_recipe_item_change_invalidates(app):
+    with app.app_context():
+        insumo = db.session.execute(db.select(Insumo)).scalar()
+        ficha = _ficha_com(insumo, "CUSTO-4", 10)
+        antes = ficha.custo_unitario
+
+        db.session.add(FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=insumo.id,
+                                        quantidade_por_receita=10))
+        db.session.flush()
+        db.session.expire(ficha, ["itens"])
+        assert ficha.custo_unitario > antes
+        assert ficha.custo_unitario == ficha.calcular_custos()["custo_unitario"]
+
+        ficha.rendimento_unidades = Decimal("14")  # pending header edit is picked up
+        assert ficha.custo_unitario == ficha.calcular_custos()["custo_unitario"]
+        db.session.rollback()
+
+
+def _receita(quantidade) -> FichaTecnica:
+    insumo = Insumo(nome="Farinha Recriada", unidade="g", preco_compra_embalagem=10, peso_por_embalagem=1000)
+    db.session.add(insumo)
+    db.session.flush()
+    ficha = _ficha_com(insumo, "RECRIADA", quantidade)
+    db.session.commit()
+    return ficha
+
+
+def test_cache_is_per_database_and_survives_recreation(app, app_arquivo):
+    with app.app_context():
+        original = db.session.execute(db.select(FichaTecnica)).scalars().first()
+        custo_original = original.custo_unitario
+
+    with app_arquivo.app_context():
+        ficha = _receita(10)
+        assert ficha.custo_unitario == ficha.calcular_custos()["custo_unitario"]
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        ficha = _receita(500)  # same ids and versao_custo, different recipe
+        assert ficha.custo_unitario == ficha.calcular_custos()["custo_unitario"]
+        db.session.remove()
+
+    with app.app_context():
+        original = db.session.execute(db.select(FichaTecnica)).scalars().first()
+        assert original.custo_unitario == custo_original
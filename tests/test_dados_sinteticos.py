@@ -0,0 +1,72 @@
+"""test_dados_sinteticos.py — `flask seed-scale` data is reproducible and internally consistent."""
+from datetime import date
+from sqlalchemy import select, func
+from app.extensions import db
+from app.models.pedido import Pedido, PedidoItem
+from app.models.insumo import Insumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.services.dados_sinteticos_service import gerar_dados
+from app.services.totais_service import recalcular_totais
+
+REFERENCIA = date(2026, 1, 31)
+
+
+def _carregar(semente: int):
+    primeiro = (db.session.execute(select(func.max(Pedido.id))).scalar() or 0) + 1
+    contagem = gerar_dados(semente, 1, REFERENCIA)
+    pedidos = db.session.execute(
+        select(Pedido.numero_pedido, Pedido.cliente_id, Pedido.data_hora_agendada, Pedido.status_pedido,
+               Pedido.total_pedido, Pedido.custo_estimado)
+        .where(Pedido.id >= primeiro).order_by(Pedido.id)
+    ).all()
+    itens = db.session.execute(
+        select(PedidoItem.pedido_id, PedidoItem.produto_id, PedidoItem.quantidade)
+        .where(PedidoItem.pedido_id >= primeiro).order_by(PedidoItem.id)
+    ).all()
+    return contagem, pedidos, itens, primeiro
+
+
+def test_same_seed_same_data_and_derived_columns_match(app):
+    with app.app_context():
+        primeiro_insumo = (db.session.execute(select(func.max(Insumo.id))).scalar() or 0) + 1
+        contagem, pedidos, itens, primeiro = _carregar(7)
+        assert contagem["pedidos"] == len(pedidos) == 1000
+
+        # Totals and stock written by the bulk load agree with the services
+        ids = db.session.execute(select(Pedido.id).where(Pedido.id >= primeiro)).scalars().all()
+        assert recalcular_totais(db.session, ids) == 0
+        razao = dict(db.session.execute(
+            select(MovimentacaoEstoque.insumo_id, func.sum(MovimentacaoEstoque.quantidade))
+            .where(MovimentacaoEstoque.insumo_id >= primeiro_insumo).group_by(MovimentacaoEstoque.insumo_id)
+        ).all())
+        for insumo in db.session.execute(select(Insumo).where(Insumo.id >= primeiro_insumo)).scalars():
+            assert abs(insumo.estoque_atual - razao[insumo.id]) < 0.01
+        db.session.rollback()
+
+        assert _carregar(7)[:3] == (contagem, pedidos, itens)
+        db.session.rollback()
+        assert _carregar(8)[1] != pedidos
+        db.session.rollback()
+
+
+def test_bulk_load_after_snapshots_keeps_history_consistent(app):
+    from datetime import datetime, time, timedelta, timezone
+    from app.services.estoque_service import gerar_snapshots, estoque_em
+    with app.app_context():
+        gerar_dados(7, 1, REFERENCIA)
+        assert gerar_snapshots(ate=REFERENCIA) > 0
+        primeiro_insumo = (db.session.execute(select(func.max(Insumo.id))).scalar() or 0) + 1
+        gerar_dados(8, 1, REFERENCIA)  # backdated movements for new insumos
+        depois = REFERENCIA + timedelta(days=45)
+        gerar_snapshots(ate=depois)  # continues from the latest snapshot
+
+        fim = datetime.combine(depois + timedelta(days=1), time(), tzinfo=timezone.utc)
+        razao = dict(db.session.execute(
+            select(MovimentacaoEstoque.insumo_id, func.sum(MovimentacaoEstoque.quantidade))
+            .where(MovimentacaoEstoque.insumo_id >= primeiro_insumo, MovimentacaoEstoque.data < fim)
+            .group_by(MovimentacaoEstoque.insumo_id)
+        ).all())
+        assert razao
+        for insumo_id, saldo in razao.items():
+            assert abs(estoque_em(insumo_id, depois) - saldo) < 0.01
+        db.session.rollback()
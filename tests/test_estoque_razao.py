@@ -0,0 +1,82 @@
+"""test_estoque_razao.py — stock ledger, snapshots and point-in-time balances."""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import event, select, func
+from app.extensions import db
+from app.models.insumo import Insumo
+from app.models.compra_insumo import CompraInsumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.models.saldo_estoque import SaldoEstoque
+from app.services.pedido_service import registrar_entrada_estoque
+from app.services.estoque_service import (
+    movimentar, estornar_compra, estoque_em, gerar_snapshots, divergencias,
+)
+
+
+def _soma_ate(insumo_id, dia: date) -> Decimal:
+    fim = datetime(dia.year, dia.month, dia.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return Decimal(str(db.session.execute(
+        select(func.coalesce(func.sum(MovimentacaoEstoque.quantidade), 0))
+        .where(MovimentacaoEstoque.insumo_id == insumo_id, MovimentacaoEstoque.data < fim)
+    ).scalar()))
+
+
+def test_point_in_time_stock_from_snapshots(app):
+    with app.app_context():
+        insumo = Insumo(nome="Cacau Razão", unidade="g")
+        db.session.add(insumo)
+        db.session.flush()
+        inicio = datetime(2024, 1, 10, 12, tzinfo=timezone.utc)
+        for n in range(40):  # one movement every 9 days over ~a year
+            movimentar(insumo, 100 if n % 3 else -40, "Ajuste", "Manual",
+                       data=inicio + timedelta(days=9 * n))
+        db.session.flush()
+        assert gerar_snapshots(ate=date(2025, 3, 1)) > 0
+        assert gerar_snapshots(ate=date(2025, 3, 1)) == 0  # already complete
+
+        dias = [date(2024, 1, 9), date(2024, 1, 10), date(2024, 6, 30), date(2024, 7, 1), date(2025, 1, 15)]
+        for dia in dias:
+            assert estoque_em(insumo.id, dia) == _soma_ate(insumo.id, dia)
+
+        statements = []
+        ouvinte = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", ouvinte)
+        try:
+            estoque_em(insumo.id, date(2024, 11, 20))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", ouvinte)
+        assert len(statements) == 2  # nearest snapshot + bounded range sum
+        assert "data >=" in statements[1]
+
+        # A backdated movement drops the later snapshots; answers stay right
+        movimentar(insumo, 7, "Ajuste", "Manual", data=datetime(2024, 5, 2, tzinfo=timezone.utc))
+        db.session.flush()
+        assert db.session.execute(
+            select(func.max(SaldoEstoque.data)).where(SaldoEstoque.insumo_id == insumo.id)
+        ).scalar() == date(2024, 5, 1)
+        assert estoque_em(insumo.id, date(2024, 12, 1)) == _soma_ate(insumo.id, date(2024, 12, 1))
+        db.session.rollback()
+
+
+def test_deleting_a_purchase_is_booked_in_the_ledger(app):
+    with app.app_context():
+        insumo = Insumo(nome="Açúcar Razão", unidade="g")
+        db.session.add(insumo)
+        db.session.flush()
+        compra = CompraInsumo(data_compra=date.today(), insumo_id=insumo.id,
+                              quantidade_comprada=1000, custo_total=10)
+        db.session.add(compra)
+        db.session.flush()
+        registrar_entrada_estoque(compra)
+        db.session.flush()
+
+        estornar_compra(compra)
+        db.session.delete(compra)
+        db.session.flush()
+
+        assert insumo.estoque_atual == 0
+        movs = insumo.movimentacoes.order_by(MovimentacaoEstoque.id).all()
+        assert [m.quantidade for m in movs] == [Decimal("1000"), Decimal("-1000")]
+        assert all(m.compra_id is None for m in movs)
+        assert insumo not in [ins for ins, _ in divergencias()]
+        db.session.rollback()
@@ -78,3 +78,145 @@ def test_negative_stock_raises(app):
         with pytest.raises(ValueError, match="Estoque insuficiente"):
             mudar_status_pedido(pedido, "Em produção", usuario_is_admin=False)
         db.session.rollback()
+
+
+def _cenario_producao(qtd_pedidos: int, itens_por_pedido: int = 1, estoque: int = 10000):
+    from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+    cliente = Cliente(nome="Cliente Produção")
+    insumo = Insumo(nome="Farinha Produção", unidade="g", estoque_atual=estoque)
+    db.session.add_all([cliente, insumo])
+    db.session.flush()
+    pedidos = []
+    for n in range(qtd_pedidos):
+        p = Pedido(numero_pedido=gerar_numero_pedido(), cliente_id=cliente.id, canal="B2C",
+                   data_pedido=date.today(), status_pedido="Agendado", desconto=0, taxa_entrega=0)
+        db.session.add(p)
+        pedidos.append(p)
+    db.session.flush()
+    for i in range(itens_por_pedido):
+        produto = Produto(nome=f"Produto Produção {i}", sku=f"PROD-{qtd_pedidos}-{itens_por_pedido}-{i}")
+        db.session.add(produto)
+        db.session.flush()
+        ficha = FichaTecnica(produto_id=produto.id, rendimento_unidades=4)
+        db.session.add(ficha)
+        db.session.flush()
+        db.session.add(FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=insumo.id,
+                                        quantidade_por_receita=100))
+        for p in pedidos:
+            db.session.add(PedidoItem(pedido_id=p.id, produto_id=produto.id,
+                                      quantidade=2, preco_unitario=10))
+    db.session.commit()
+    return insumo.id, [p.id for p in pedidos]
+
+
+def test_concurrent_production_starts_do_not_lose_updates(app_arquivo):
+    import threading
+    workers = 6
+    with app_arquivo.app_context():
+        insumo_id, pedido_ids = _cenario_producao(workers)
+    erros = []
+
+    def produzir(pedido_id):
+        try:
+            with app_arquivo.app_context():
+                pedido = db.session.get(Pedido, pedido_id)
+                mudar_status_pedido(pedido, "Em produção")
+                db.session.commit()
+        except Exception as e:  # pragma: no cover - surfaced below
+            erros.append(e)
+
+    threads = [threading.Thread(target=produzir, args=(pid,)) for pid in pedido_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erros
+    with app_arquivo.app_context():
+        # each order needs 100 / 4 * 2 = 50 g
+        assert db.session.get(Insumo, insumo_id).estoque_atual == Decimal("10000") - 50 * workers
+
+
+def test_concurrent_starts_cannot_push_stock_negative(app_arquivo):
+    import threading
+    from app.services.pedido_service import EstoqueInsuficiente
+    workers = 6
+    with app_arquivo.app_context():
+        insumo_id, pedido_ids = _cenario_producao(workers, estoque=120)  # enough for 2 orders
+    iniciados, recusados, erros = [], [], []
+    largada = threading.Barrier(workers)
+
+    def produzir(pedido_id):
+        try:
+            with app_arquivo.app_context():
+                pedido = db.session.get(Pedido, pedido_id)
+                largada.wait()
+                mudar_status_pedido(pedido, "Em produção")
+                db.session.commit()
+                iniciados.append(pedido_id)
+        except EstoqueInsuficiente:
+            recusados.append(pedido_id)
+        except Exception as e:  # pragma: no cover - surfaced below
+            erros.append(e)
+
+    threads = [threading.Thread(target=produzir, args=(pid,)) for pid in pedido_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erros
+    assert len(iniciados) == 2 and len(recusados) == workers - 2
+    with app_arquivo.app_context():
+        assert db.session.get(Insumo, insumo_id).estoque_atual == Decimal("20")
+
+
+def test_deduction_round_trips_do_not_grow_with_items(app_arquivo):
+    from sqlalchemy import event
+    from app.models.movimentacao_estoque import MovimentacaoEstoque
+    from app.services.pedido_service import iniciar_producao
+
+    def contar(itens: int) -> int:
+        with app_arquivo.app_context():
+            _, (pedido_id,) = _cenario_producao(1, itens)
+            pedido = db.session.get(Pedido, pedido_id)
+            statements = []
+            ouvinte = lambda *args: statements.append(args[2])  # noqa: E731
+            event.listen(db.engine, "before_cursor_execute", ouvinte)
+            try:
+                iniciar_producao(pedido)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", ouvinte)
+            movs = db.session.execute(
+                db.select(MovimentacaoEstoque).where(MovimentacaoEstoque.pedido_id == pedido_id)
+            ).scalars().all()
+            assert len(movs) == 1  # same insumo in every recipe → one aggregated movement
+            db.session.rollback()
+            return len(statements)
+
+    assert contar(1) == contar(5)
+
+
+def test_production_run_is_all_or_nothing(app_arquivo):
+    from app.services.pedido_service import iniciar_producao_lote, previa_producao
+    with app_arquivo.app_context():
+        insumo_id, pedido_ids = _cenario_producao(3)
+        pedidos = [db.session.get(Pedido, pid) for pid in pedido_ids]
+
+        db.session.get(Insumo, insumo_id).estoque_atual = 120  # enough for 2 of 3 orders
+        db.session.commit()
+        assert previa_producao(pedidos)["faltas"][0]["falta"] == Decimal("30")
+        resultado = iniciar_producao_lote(pedidos)
+        assert not resultado["iniciados"]
+        assert resultado["faltas"][0]["necessario"] == Decimal("150")
+        db.session.rollback()
+        assert {p.status_pedido for p in pedidos} == {"Agendado"}
+
+        db.session.get(Insumo, insumo_id).estoque_atual = 1000
+        pedidos[0].status_pedido = "Cancelado"
+        db.session.commit()
+        resultado = iniciar_producao_lote(pedidos)
+        db.session.commit()
+        assert len(resultado["iniciados"]) == 2
+        assert resultado["ignorados"] == [(pedidos[0].numero_pedido, "status 'Cancelado'")]
+        assert db.session.get(Insumo, insumo_id).estoque_atual == Decimal("900")
@@ -0,0 +1,40 @@
+"""test_exportacao_service.py — streaming CSV/JSONL exports."""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from app.extensions import db
+from app.models.despesa import Despesa
+from app.services.exportacao_service import exportar, linhas_exportacao
+
+
+def test_exports_stream_in_batches_and_filter_by_date(app):
+    with app.app_context():
+        for dia in range(1, 29):
+            db.session.add(Despesa(data=date(2031, 2, dia), categoria="Outros", descricao=f"Despesa {dia}",
+                                   valor=Decimal("10.05"), forma_pagamento="Pix"))
+        db.session.flush()
+
+        partes = list(exportar("despesas", "csv", date(2031, 2, 1), date(2031, 2, 28)))
+        linhas = list(csv.reader(io.StringIO("".join(partes))))
+        assert linhas[0][:2] == ["id", "data"] and len(linhas) == 29
+        assert {ln[4] for ln in linhas[1:]} == {"10.05"}
+
+        jsonl = "".join(exportar("despesas", "jsonl", date(2031, 2, 10), date(2031, 2, 11)))
+        objetos = [json.loads(ln) for ln in jsonl.splitlines()]
+        assert [o["data"] for o in objetos] == ["2031-02-10", "2031-02-11"]
+        assert objetos[0]["valor"] == "10.05"
+
+        _, linhas_pedidos = linhas_exportacao("pedidos")
+        assert not isinstance(linhas_pedidos, list)  # lazy: rows are pulled while writing
+        db.session.rollback()
+
+
+def test_export_endpoint_streams_csv(auth_client):
+    resposta = auth_client.get("/financeiro/exportar?nome=pagamentos&formato=csv&de=2026-01-01")
+    assert resposta.status_code == 200
+    assert resposta.is_streamed
+    assert resposta.headers["Content-Disposition"] == 'attachment; filename="pagamentos.csv"'
+    assert resposta.get_data(as_text=True).startswith("id,numero_pedido,data_recebimento")
+    assert auth_client.get("/financeiro/exportar?nome=usuarios").status_code == 404
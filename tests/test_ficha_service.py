@@ -36,3 +36,49 @@ def test_ficha_preco_sugerido(app):
         # margem = 60% => / 0.40
         expected = ficha.custo_unitario / Decimal("0.40")
         assert abs(ficha.preco_sugerido - expected) < Decimal("0.01")
+
+
+def test_lista_fichas_matches_properties_without_n_plus_one(app):
+    """The batched list costing equals the model properties, in O(1) queries."""
+    from sqlalchemy import event
+    from app.extensions import db
+    from app.models.produto import Produto
+    from app.models.insumo import Insumo
+    from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+    from app.services import custo_service
+    from app.services.ficha_service import resumo_lista_fichas
+    with app.app_context():
+        insumos = [Insumo(nome=f"Lista {n}", unidade="g", preco_compra_embalagem=Decimal("9.99") + n,
+                          peso_por_embalagem=Decimal("250") + n) for n in range(4)]
+        db.session.add_all(insumos)
+        db.session.flush()
+        for n in range(6):
+            produto = Produto(nome=f"Lista {n}", sku=f"LISTA-{n}")
+            db.session.add(produto)
+            db.session.flush()
+            ficha = FichaTecnica(produto_id=produto.id, rendimento_unidades=Decimal("3") + n,
+                                 mao_de_obra_total=Decimal("1.11") * n, perdas_percentual=n,
+                                 margem_desejada_percentual=Decimal("45.5"))
+            db.session.add(ficha)
+            db.session.flush()
+            for ins in insumos[: n % 4 + 1]:
+                db.session.add(FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=ins.id,
+                                                quantidade_por_receita=Decimal("12.345") * (n + 1)))
+        db.session.flush()
+        db.session.expire_all()
+        custo_service.invalidar()
+
+        fichas = db.session.execute(db.select(FichaTecnica)).scalars().all()
+        statements = []
+        ouvinte = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", ouvinte)
+        try:
+            lista = resumo_lista_fichas(fichas)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", ouvinte)
+        assert len(statements) == 1  # one itens ⋈ insumos query on a cold cache
+
+        for f in fichas:
+            assert lista[f.id]["custo_unitario"] == f.calcular_custos()["custo_unitario"]
+            assert lista[f.id]["preco_sugerido"] == f.preco_sugerido
+        db.session.rollback()
@@ -0,0 +1,104 @@
+"""test_idempotencia.py — retried writes with the same Idempotency-Key run once."""
+import threading
+from datetime import date, datetime, timedelta, timezone
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.pedido import Pedido, PedidoItem
+from app.models.usuario import Usuario
+from app.models.chave_idempotencia import ChaveIdempotencia
+from app.services import idempotencia_service
+from app.services.api_service import criar_token
+from app.services.pedido_service import gerar_numero_pedido
+
+
+def test_repeated_payment_form_is_recorded_once(app, auth_client):
+    with app.app_context():
+        cliente = Cliente(nome="Cliente Idempotência")
+        db.session.add(cliente)
+        db.session.flush()
+        pedido = Pedido(numero_pedido=gerar_numero_pedido(), cliente_id=cliente.id, data_pedido=date.today())
+        db.session.add(pedido)
+        db.session.flush()
+        db.session.add(PedidoItem(pedido_id=pedido.id, produto_id=1, quantidade=1, preco_unitario=100))
+        db.session.commit()
+        pedido_id = pedido.id
+
+    form = {"data_recebimento": "2031-03-01", "forma_pagamento": "PIX", "valor_recebido": "60",
+            "idempotency_key": "pagamento-1"}
+    primeira = auth_client.post(f"/pedidos/{pedido_id}/pagamento", data=form)
+    segunda = auth_client.post(f"/pedidos/{pedido_id}/pagamento", data=form)
+    assert primeira.status_code == segunda.status_code == 302
+    assert segunda.headers["Location"] == primeira.headers["Location"]
+    assert segunda.headers["Idempotent-Replayed"] == "true"
+    outra = auth_client.post(f"/pedidos/{pedido_id}/pagamento", data=dict(form, valor_recebido="40"))
+    assert outra.status_code == 422
+
+    with app.app_context():
+        pedido = db.session.get(Pedido, pedido_id)
+        assert len(pedido.pagamentos) == 1
+        assert pedido.soma_recebida == 60 and pedido.status_pagamento == "Parcial"
+        db.session.delete(pedido)  # cascades to itens and pagamentos
+        db.session.commit()
+
+
+def test_concurrent_api_retries_create_one_batch(app_arquivo):
+    with app_arquivo.app_context():
+        usuario = Usuario(nome="Integração", email="erp@test.com", role="Operador")
+        usuario.set_password("x")
+        cliente = Cliente(nome="Atacadista", canal_preferencial="B2B", tabela_preco="Atacado")
+        produto = Produto(nome="Brownie", sku="IDEM-1", preco_varejo=12, preco_atacado=9)
+        db.session.add_all([usuario, cliente, produto])
+        db.session.flush()
+        token = criar_token(usuario, "erp")
+        corpo = {"pedidos": [{"cliente_id": cliente.id, "itens": [{"produto_id": produto.id, "quantidade": 5}]}]}
+        db.session.commit()
+
+    cabecalhos = {"Authorization": f"Bearer {token}", "Idempotency-Key": "lote-2031-03-01"}
+    respostas, trava = [], threading.Lock()
+    largada = threading.Barrier(6)
+
+    def enviar():
+        cliente_http = app_arquivo.test_client()
+        largada.wait()
+        resposta = cliente_http.post("/api/v1/pedidos/lote", json=corpo, headers=cabecalhos)
+        with trava:
+            respostas.append((resposta.status_code, resposta.get_json()))
+
+    threads = [threading.Thread(target=enviar) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Retries either replay the stored order or get 409 while it is still running
+    codigos = [codigo for codigo, _ in respostas]
+    assert 201 in codigos and set(codigos) <= {201, 409}
+    assert len({str(json) for codigo, json in respostas if codigo == 201}) == 1
+    with app_arquivo.app_context():
+        assert db.session.execute(db.select(db.func.count(Pedido.id))).scalar() == 1
+
+
+def test_expired_claim_is_taken_over(app):
+    with app.app_context():
+        usuario_id = db.session.execute(db.select(Usuario.id).where(Usuario.email == "admin@test.com")).scalar_one()
+        estado, primeira = idempotencia_service.reservar(usuario_id, "lease-1", "abc")
+        assert estado == idempotencia_service.NOVA
+        assert idempotencia_service.reservar(usuario_id, "lease-1", "abc")[0] == idempotencia_service.EM_ANDAMENTO
+
+        # The first worker died: once its lease passes, a retry takes the key over
+        db.session.execute(
+            db.update(ChaveIdempotencia).where(ChaveIdempotencia.id == primeira[0])
+            .values(em_andamento_ate=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        db.session.commit()
+        estado, segunda = idempotencia_service.reservar(usuario_id, "lease-1", "abc")
+        assert estado == idempotencia_service.NOVA and segunda[0] == primeira[0]
+
+        idempotencia_service.liberar(primeira)  # a late failure of the old holder is ignored
+        idempotencia_service.concluir(primeira, 500, b"velho", {})
+        idempotencia_service.concluir(segunda, 201, b"novo", {})
+        estado, registro = idempotencia_service.reservar(usuario_id, "lease-1", "abc")
+        assert estado == idempotencia_service.REPETIDA and registro.corpo == b"novo"
+        db.session.delete(registro)
+        db.session.commit()
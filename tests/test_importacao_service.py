@@ -0,0 +1,67 @@
+"""test_importacao_service.py — streaming CSV import of compras."""
+import io
+from decimal import Decimal
+from sqlalchemy import select, func
+from app.extensions import db
+from app.models.insumo import Insumo
+from app.models.compra_insumo import CompraInsumo
+from app.models.movimentacao_estoque import MovimentacaoEstoque
+from app.services.importacao_service import importar_compras_csv
+
+
+def test_import_chunks_and_aggregates_stock(app):
+    with app.app_context():
+        cacau = Insumo(nome="Cacau Import", unidade="g", estoque_atual=100)
+        leite = Insumo(nome="Leite Import", unidade="ml", estoque_atual=0)
+        db.session.add_all([cacau, leite])
+        db.session.flush()
+        linhas = ["data_compra;insumo;quantidade_comprada;custo_total;fornecedor"]
+        for n in range(25):
+            ref = "cacau import" if n % 2 else str(leite.id)
+            linhas.append(f"0{1 + n % 9}/03/2026;{ref};1.000,5;12,30;Fornecedor {n}")
+        resultado = importar_compras_csv(io.StringIO("\n".join(linhas)), tamanho_lote=4)
+
+        assert resultado == {"importadas": 25, "linhas": 25, "insumos": 2, "erros": []}
+        assert cacau.estoque_atual == Decimal("100") + 12 * Decimal("1000.5")
+        assert leite.estoque_atual == 13 * Decimal("1000.5")
+        compras = db.session.execute(
+            select(func.count()).select_from(CompraInsumo).where(CompraInsumo.insumo_id == cacau.id)
+        ).scalar()
+        movs = db.session.execute(
+            select(func.count(), func.sum(MovimentacaoEstoque.quantidade))
+            .join(CompraInsumo, CompraInsumo.id == MovimentacaoEstoque.compra_id)
+            .where(MovimentacaoEstoque.insumo_id == cacau.id)
+        ).one()
+        assert compras == 12 and movs[0] == 12 and Decimal(str(movs[1])) == 12 * Decimal("1000.5")
+        db.session.rollback()
+
+
+def test_invalid_rows_are_reported(app):
+    with app.app_context():
+        csv_texto = ("data_compra,insumo,quantidade_comprada,custo_total\n"
+                     "2026-03-01,Inexistente,10,1\n"
+                     "2026-03-01,999999,10,1\n"
+                     "ontem,1,10,1\n")
+        parou = importar_compras_csv(io.StringIO(csv_texto))
+        assert parou["importadas"] == 0 and len(parou["erros"]) == 1
+        assert parou["erros"][0][0] == 2
+        db.session.rollback()
+
+        tudo = importar_compras_csv(io.StringIO(csv_texto), ignorar_invalidas=True)
+        assert [linha for linha, _ in tudo["erros"]] == [2, 3, 4]
+        db.session.rollback()
+
+
+def test_out_of_range_numbers_are_reported(app):
+    with app.app_context():
+        csv_texto = ("data_compra,insumo,quantidade_comprada,custo_total\n"
+                     "2026-03-01,1,10,-5\n"
+                     "2026-03-01,1,10,NaN\n"
+                     "2026-03-01,1,Infinity,1\n"
+                     "2026-03-01,1,1e20,1\n"
+                     "2026-03-01,1,10,1e9\n"
+                     "2026-03-01,1,99999999,99999999\n")
+        resultado = importar_compras_csv(io.StringIO(csv_texto), ignorar_invalidas=True)
+        assert [linha for linha, _ in resultado["erros"]] == [2, 3, 4, 5, 6]
+        assert resultado["importadas"] == 1
+        db.session.rollback()
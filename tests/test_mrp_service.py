@@ -0,0 +1,65 @@
+"""test_mrp_service.py — MRP explosion of scheduled orders."""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from app.extensions import db
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.insumo import Insumo
+from app.models.pedido import Pedido, PedidoItem
+from app.models.ficha_tecnica import FichaTecnica, FichaTecnicaItem
+from app.services.pedido_service import gerar_numero_pedido, necessidades_insumos
+from app.services.mrp_service import plano_necessidades
+
+
+def test_plan_matches_per_order_explosion_and_finds_first_short_day(app):
+    with app.app_context():
+        inicio = date(2031, 3, 1)
+        cliente = Cliente(nome="Cliente MRP")
+        farinha = Insumo(nome="Farinha MRP", unidade="g", estoque_atual=500)
+        ovo = Insumo(nome="Ovo MRP", unidade="un", estoque_atual=1000)
+        db.session.add_all([cliente, farinha, ovo])
+        db.session.flush()
+        produtos = []
+        for n, (qtd_farinha, rendimento) in enumerate([(300, 6), (200, 4)]):
+            produto = Produto(nome=f"Produto MRP {n}", sku=f"MRP-{n}")
+            db.session.add(produto)
+            db.session.flush()
+            ficha = FichaTecnica(produto_id=produto.id, rendimento_unidades=rendimento)
+            db.session.add(ficha)
+            db.session.flush()
+            db.session.add_all([
+                FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=farinha.id, quantidade_por_receita=qtd_farinha),
+                FichaTecnicaItem(ficha_tecnica_id=ficha.id, insumo_id=ovo.id, quantidade_por_receita=3),
+            ])
+            produtos.append(produto)
+
+        pedidos = []
+        for dia in range(5):
+            for status in ("Agendado", "Em produção"):  # already-deducted orders are ignored
+                p = Pedido(numero_pedido=gerar_numero_pedido(), cliente_id=cliente.id, canal="B2C",
+                           data_pedido=inicio, status_pedido=status, desconto=0, taxa_entrega=0,
+                           data_hora_agendada=datetime(2031, 3, 1 + dia, 15, tzinfo=timezone.utc))
+                db.session.add(p)
+                db.session.flush()
+                for produto in produtos:
+                    db.session.add(PedidoItem(pedido_id=p.id, produto_id=produto.id,
+                                              quantidade=dia + 1, preco_unitario=10))
+                if status == "Agendado":
+                    pedidos.append(p)
+        db.session.flush()
+
+        plano = plano_necessidades(inicio, 3)
+        assert plano["dias"] == [inicio + timedelta(days=d) for d in range(3)]
+
+        esperado: dict[int, Decimal] = {}
+        for (_, insumo_id), qtd in necessidades_insumos(p.id for p in pedidos[:3]).items():
+            esperado[insumo_id] = esperado.get(insumo_id, Decimal("0")) + qtd
+        linhas = {ln["insumo_id"]: ln for ln in plano["linhas"]}
+        assert {k: ln["total"] for k, ln in linhas.items()} == esperado
+
+        # farinha per day: 100 * d, stock 500 → 100, 200 (300) and 300 (600) → short on day 3
+        assert linhas[farinha.id]["por_dia"] == [Decimal("100"), Decimal("200"), Decimal("300")]
+        assert linhas[farinha.id]["primeiro_dia_falta"] == inicio + timedelta(days=2)
+        assert linhas[ovo.id]["primeiro_dia_falta"] is None
+        assert plano["linhas"][0]["insumo_id"] == farinha.id
+        db.session.rollback()
@@ -0,0 +1,95 @@
+"""test_pedido_paginacao.py — keyset pagination of the order list."""
+from datetime import date, datetime, timezone
+from sqlalchemy import event
+from app.extensions import db
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.services.pedido_service import listar_pedidos_pagina
+
+
+def _criar_pedidos(qtd: int) -> list[Pedido]:
+    cliente = Cliente(nome="Cliente Paginação")
+    db.session.add(cliente)
+    produto = db.session.execute(db.select(Produto)).scalar()
+    db.session.flush()
+    pedidos = []
+    for n in range(qtd):
+        # Repeated timestamps and a NULL tail exercise the (data, id) tie-break
+        agendado = None if n % 5 == 0 else datetime(2026, 3, 1 + n % 3, 10, 0, tzinfo=timezone.utc)
+        p = Pedido(numero_pedido=f"PG-{n:04d}", cliente_id=cliente.id, canal="B2C",
+                   data_pedido=date.today(), data_hora_agendada=agendado,
+                   status_pedido="Paginação", desconto=0, taxa_entrega=0)
+        db.session.add(p)
+        db.session.flush()
+        db.session.add(PedidoItem(pedido_id=p.id, produto_id=produto.id,
+                                  quantidade=1, preco_unitario=10))
+        db.session.add(Pagamento(pedido_id=p.id, data_recebimento=date.today(),
+                                 forma_pagamento="PIX", valor_recebido=5))
+        pedidos.append(p)
+    db.session.flush()
+    db.session.expire_all()
+    return pedidos
+
+
+def test_keyset_walk_covers_every_order_once(app):
+    with app.app_context():
+        criados = _criar_pedidos(23)
+        vistos, cursor = [], None
+        while True:
+            pagina, cursor = listar_pedidos_pagina("Paginação", cursor, limite=4)
+            vistos.extend(p.id for p in pagina)
+            if not cursor:
+                break
+
+        assert sorted(vistos) == sorted(p.id for p in criados)
+        assert len(vistos) == len(set(vistos))
+
+        esperado = sorted(
+            criados,
+            key=lambda p: (p.data_hora_agendada is not None, p.data_hora_agendada or datetime.min, p.id),
+            reverse=True,
+        )
+        assert vistos == [p.id for p in esperado]
+        db.session.rollback()
+
+
+def test_page_query_count_is_constant(app):
+    with app.app_context():
+        _criar_pedidos(12)
+        statements = []
+
+        def _contar(*args):
+            statements.append(args[2])
+
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", _contar)
+        try:
+            pagina, _ = listar_pedidos_pagina("Paginação", limite=10)
+            for p in pagina:
+                _ = (p.cliente.nome, p.total_pedido, p.soma_recebida)
+        finally:
+            event.remove(engine, "before_cursor_execute", _contar)
+
+        assert len(pagina) == 10
+        assert len(statements) <= 3  # pedidos+clientes, itens, pagamentos
+        db.session.rollback()
+
+
+def test_next_page_link_keeps_custom_limit(app, auth_client):
+    with app.app_context():
+        cliente = db.session.execute(db.select(Cliente)).scalar()
+        pedidos = [Pedido(numero_pedido=f"LM-{n}", cliente_id=cliente.id, canal="B2C",
+                          data_pedido=date.today(), status_pedido="Limite", desconto=0, taxa_entrega=0)
+                   for n in range(3)]
+        db.session.add_all(pedidos)
+        db.session.commit()
+        ids = [p.id for p in pedidos]
+
+    html = auth_client.get("/pedidos/?status=Limite&limite=2").get_data(as_text=True)
+    assert "cursor=" in html and "limite=2" in html
+
+    with app.app_context():
+        db.session.execute(db.delete(Pedido).where(Pedido.id.in_(ids)))
+        db.session.commit()
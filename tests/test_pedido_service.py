@@ -110,3 +110,63 @@ def test_totals_computation(app):
         # total = 24 - 5 + 10 = 29
         assert pedido.subtotal == Decimal("24.00")
         assert pedido.total_pedido == Decimal("29.00")
+
+
+def test_persisted_totals_follow_item_and_payment_changes(app):
+    """Stored totals are refreshed on every flush touching itens/pagamentos."""
+    from app.services.totais_service import recalcular_totais
+    with app.app_context():
+        cliente = Cliente(nome="Cliente Totais")
+        db.session.add(cliente)
+        produto = db.session.execute(db.select(Produto)).scalar()
+        db.session.flush()
+
+        pedido = Pedido(numero_pedido="TOT-1", cliente_id=cliente.id, canal="B2C",
+                        data_pedido=date.today(), desconto=Decimal("2.00"),
+                        taxa_entrega=Decimal("5.00"))
+        db.session.add(pedido)
+        db.session.flush()
+        assert pedido.total_pedido == Decimal("3.00")
+
+        item = PedidoItem(pedido_id=pedido.id, produto_id=produto.id,
+                          quantidade=Decimal("3"), preco_unitario=Decimal("10.00"))
+        pag = Pagamento(pedido_id=pedido.id, data_recebimento=date.today(),
+                        forma_pagamento="Cartão", valor_recebido=Decimal("20.00"),
+                        taxa_cartao=Decimal("1.50"))
+        db.session.add_all([item, pag])
+        db.session.flush()
+        assert pedido.subtotal == Decimal("30.00")
+        assert pedido.total_pedido == Decimal("33.00")
+        assert pedido.soma_recebida == Decimal("20.00")
+        custo_itens = produto.ficha_tecnica.custo_unitario * 3
+        assert abs(pedido.custo_estimado - (custo_itens + Decimal("1.50"))) < Decimal("0.0001")
+
+        item.quantidade = Decimal("1")
+        db.session.delete(pag)
+        db.session.flush()
+        assert pedido.total_pedido == Decimal("13.00")
+        assert pedido.soma_recebida == Decimal("0")
+
+        # Drift introduced behind the ORM's back is repaired by the rebuild
+        db.session.execute(
+            db.update(Pedido).where(Pedido.id == pedido.id).values(total_pedido=999)
+        )
+        assert recalcular_totais(db.session, [pedido.id]) == 1
+        db.session.expire(pedido)
+        assert pedido.total_pedido == Decimal("13.00")
+
+        # custo_estimado is a snapshot: the rebuild keeps it unless repricing
+        snapshot = pedido.custo_estimado
+        db.session.execute(
+            db.update(Pedido).where(Pedido.id == pedido.id).values(custo_estimado=1)
+        )
+        assert recalcular_totais(db.session, [pedido.id]) == 0
+        assert recalcular_totais(db.session, [pedido.id], recustear=True) == 1
+        db.session.expire(pedido)
+        assert pedido.custo_estimado == snapshot
+        db.session.rollback()
+
+
+def test_production_form_rejects_malformed_ids(auth_client):
+    resposta = auth_client.post("/pedidos/producao", data={"data": "2031-01-01", "pedido_id[]": ["1", "abc"]})
+    assert resposta.status_code == 302 and "/pedidos/producao" in resposta.headers["Location"]
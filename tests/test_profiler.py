@@ -0,0 +1,51 @@
+"""test_profiler.py — opt-in request profiler and N+1 signatures."""
+from app import profiler
+from app.extensions import db
+from app.models.usuario import Usuario
+from app.models.cliente import Cliente
+
+
+def test_signature_collapses_literals_and_in_lists():
+    assert (profiler.assinatura("SELECT * FROM t WHERE id IN (?, ?, ?) LIMIT 10")
+            == profiler.assinatura("SELECT *\n FROM t WHERE id IN (?)  LIMIT 50"))
+
+
+def test_records_samples_and_flags_repeated_statements(tmp_path, monkeypatch):
+    from app import create_app
+    from app.config import DevelopmentConfig
+    monkeypatch.setattr(DevelopmentConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'perfil.db'}")
+    monkeypatch.setattr(DevelopmentConfig, "PROFILER_ATIVO", True)
+    monkeypatch.setattr(DevelopmentConfig, "PROFILER_AMOSTRAGEM", 1.0)
+    app = create_app("default")
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+    @app.route("/_n_mais_1")
+    def n_mais_1():
+        for cliente_id in range(1, 8):  # one query per row: the classic N+1
+            db.session.get(Cliente, cliente_id)
+        return "ok"
+
+    with app.app_context():
+        db.create_all()
+        admin = Usuario(nome="Admin", email="admin@perfil.com", role="Admin")
+        admin.set_password("password")
+        db.session.add_all([admin] + [Cliente(nome=f"Cliente {n}") for n in range(7)])
+        db.session.commit()
+    profiler.limpar()
+
+    client = app.test_client()
+    client.post("/auth/login", data={"email": "admin@perfil.com", "password": "password"})
+    client.get("/_n_mais_1")
+    client.get("/clientes/")
+
+    ranking = {r["rota"]: r for r in profiler.ranking()}
+    assert ranking["GET /_n_mais_1"]["queries_max"] >= 7
+    assert ranking["GET /_n_mais_1"]["n_mais_1"][0][1] == 7
+    assert ranking["GET /clientes/"]["ms_render_medio"] > 0
+    assert ranking["GET /clientes/"]["n_mais_1"] == []
+
+    pagina = client.get("/admin/perfil")
+    assert pagina.status_code == 200 and "/_n_mais_1" in pagina.get_data(as_text=True)
+    with app.app_context():
+        db.engine.dispose()
+    profiler.limpar()
@@ -0,0 +1,161 @@
+"""
+test_relatorio_service.py
+=========================
+The SQL aggregates in dashboard_mes must match the original per-order
+Python walk (itens → ficha → insumo, pagamentos) on seeded data; the
+SQL low-stock filter must match the Insumo.estoque_baixo property.
+"""
+from decimal import Decimal
+from datetime import date
+from app.extensions import db
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.despesa import Despesa
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.insumo import Insumo
+from app.services.relatorio_service import (
+    dashboard_mes, insumos_estoque_baixo, contar_insumos_estoque_baixo,
+)
+
+CENTAVO = Decimal("0.01")
+
+
+def _total(p: Pedido) -> Decimal:
+    subtotal = sum((Decimal(str(i.quantidade)) * Decimal(str(i.preco_unitario)) for i in p.itens),
+                   Decimal("0"))
+    return subtotal - Decimal(str(p.desconto)) + Decimal(str(p.taxa_entrega))
+
+
+def _lucro(p: Pedido) -> Decimal:
+    custo = Decimal("0")
+    for i in p.itens:
+        ficha = i.produto.ficha_tecnica
+        if ficha:
+            custo += ficha.custo_unitario * Decimal(str(i.quantidade))
+    custo += sum((Decimal(str(pg.taxa_cartao)) for pg in p.pagamentos), Decimal("0"))
+    return _total(p) - custo
+
+
+def _recebido(p: Pedido) -> Decimal:
+    return sum((Decimal(str(pg.valor_recebido)) for pg in p.pagamentos), Decimal("0"))
+
+
+def _dashboard_mes_python(ano: int, mes: int) -> dict:
+    """Reference: the original ORM-walking implementation."""
+    pedidos = db.session.execute(db.select(Pedido)).scalars().all()
+    no_mes = lambda d: d.year == ano and d.month == mes  # noqa: E731
+
+    recebido_mes = sum((Decimal(str(pg.valor_recebido))
+                        for pg in db.session.execute(db.select(Pagamento)).scalars()
+                        if no_mes(pg.data_recebimento)), Decimal("0"))
+    faturamento = lucro = a_receber = Decimal("0")
+    for p in pedidos:
+        if p.status_pagamento == "Pago" and p.pagamentos and \
+                no_mes(max(pg.data_recebimento for pg in p.pagamentos)):
+            faturamento += _total(p)
+            lucro += _lucro(p)
+        if p.status_pagamento == "Parcial" and p.status_pedido != "Cancelado" and _total(p) > 0:
+            faturamento += _recebido(p)
+            lucro += _lucro(p) * (_recebido(p) / _total(p))
+        if p.status_pagamento in ("Não pago", "Parcial") and p.status_pedido != "Cancelado":
+            a_receber += _total(p) - _recebido(p)
+    despesas = sum((Decimal(str(d.valor))
+                    for d in db.session.execute(db.select(Despesa)).scalars()
+                    if no_mes(d.data)), Decimal("0"))
+    return {
+        "recebido_mes": recebido_mes,
+        "faturamento_realizado": faturamento,
+        "lucro_realizado": lucro,
+        "a_receber": a_receber,
+        "despesas_mes": despesas,
+        "resultado_mes": recebido_mes - despesas,
+    }
+
+
+def _seed_meses():
+    cliente = Cliente(nome="Cliente Relatório")
+    db.session.add(cliente)
+    produto = db.session.execute(db.select(Produto)).scalar()
+    db.session.flush()
+    # (status_pedido, desconto, [(data_recebimento, valor, taxa)])
+    cenarios = [
+        ("Entregue", 0, [(date(2026, 1, 31), 50, 0), (date(2026, 2, 1), 70, 2)]),
+        ("Entregue", 5, [(date(2026, 2, 10), 115, 0)]),
+        ("Pronto", 0, [(date(2026, 2, 28), 30, 1)]),
+        ("Cancelado", 0, [(date(2026, 2, 15), 10, 0)]),
+        ("Agendado", 0, []),
+        ("Entregue", 0, [(date(2026, 3, 1), 120, 0)]),
+        ("Agendado", 120, [(date(2026, 2, 5), 10, 0)]),
+    ]
+    for n, (status, desconto, pagamentos) in enumerate(cenarios):
+        p = Pedido(numero_pedido=f"REL-{n}", cliente_id=cliente.id, canal="B2C",
+                   data_pedido=date(2026, 1, 15), status_pedido=status,
+                   desconto=desconto, taxa_entrega=0)
+        db.session.add(p)
+        db.session.flush()
+        db.session.add(PedidoItem(pedido_id=p.id, produto_id=produto.id,
+                                  quantidade=Decimal("10"), preco_unitario=Decimal("12.00")))
+        for data, valor, taxa in pagamentos:
+            db.session.add(Pagamento(pedido_id=p.id, data_recebimento=data,
+                                     forma_pagamento="PIX", valor_recebido=valor, taxa_cartao=taxa))
+        db.session.flush()
+        recebido = sum(Decimal(str(v)) for _, v, _ in pagamentos)
+        total = Decimal("120") - desconto
+        p.status_pagamento = ("Não pago" if recebido <= 0 else
+                              "Parcial" if recebido < total else "Pago")
+    db.session.add_all([
+        Despesa(data=date(2026, 2, 1), categoria="Outros", descricao="a",
+                valor=40, forma_pagamento="PIX"),
+        Despesa(data=date(2026, 2, 28), categoria="Outros", descricao="b",
+                valor=Decimal("12.35"), forma_pagamento="PIX"),
+        Despesa(data=date(2026, 3, 1), categoria="Outros", descricao="c",
+                valor=99, forma_pagamento="PIX"),
+    ])
+    db.session.flush()
+
+
+def test_dashboard_mes_matches_python_reference(app):
+    with app.app_context():
+        _seed_meses()
+        for ano, mes in [(2026, 1), (2026, 2), (2026, 3), (2025, 12)]:
+            sql = dashboard_mes(ano, mes)
+            ref = _dashboard_mes_python(ano, mes)
+            for chave, esperado in ref.items():
+                assert abs(sql[chave] - esperado) < CENTAVO, (ano, mes, chave, sql[chave], esperado)
+        db.session.rollback()
+
+
+def test_month_range_includes_last_day(app):
+    with app.app_context():
+        _seed_meses()
+        kpis = dashboard_mes(2026, 2)
+        # 28/02 receipt and expense must be inside February
+        assert kpis["despesas_mes"] == Decimal("52.35")
+        assert kpis["recebido_mes"] == Decimal("235.00")
+        db.session.rollback()
+
+
+def test_low_stock_query_matches_property(app):
+    with app.app_context():
+        db.session.add_all([
+            Insumo(nome="Baixo Emb", unidade="g", peso_por_embalagem=500, estoque_minimo=2,
+                   minimo_em_embalagem=True, estoque_atual=999),       # 999 <= 1000
+            Insumo(nome="Ok Emb", unidade="g", peso_por_embalagem=500, estoque_minimo=2,
+                   minimo_em_embalagem=True, estoque_atual=1001),
+            Insumo(nome="No Limite", unidade="un", estoque_minimo=12,
+                   minimo_em_embalagem=False, estoque_atual=12),
+            Insumo(nome="Inativo", unidade="un", estoque_minimo=12,
+                   minimo_em_embalagem=False, estoque_atual=0, ativo=False),
+        ])
+        db.session.flush()
+        ativos = db.session.execute(db.select(Insumo).where(Insumo.ativo == True)).scalars().all()  # noqa: E712
+        esperado = {i.id for i in ativos if i.estoque_baixo}
+        assert {i.id for i in insumos_estoque_baixo()} == esperado
+        assert contar_insumos_estoque_baixo() == len(esperado)
+
+        ok = db.session.execute(db.select(Insumo).where(Insumo.nome == "Ok Emb")).scalar_one()
+        ok.estoque_atual = 10  # the generated margin follows updates
+        db.session.flush()
+        assert ok in insumos_estoque_baixo()
+        db.session.rollback()
@@ -0,0 +1,130 @@
+"""test_replica.py — read-replica routing with two SQLite files standing in for primary and replica."""
+import pytest
+from sqlalchemy import select, func
+from app import create_app, profiler, replica
+from app.extensions import db
+from app.models.usuario import Usuario
+from app.models.cliente import Cliente
+from app.replica import somente_leitura
+
+
+def _contar_clientes() -> int:
+    return db.session.execute(select(func.count(Cliente.id))).scalar()
+
+
+@pytest.fixture(params=[{}])
+def app_replica(request, tmp_path):
+    app = create_app("default", {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primario.db'}",
+        "REPLICA_URL": f"sqlite:///{tmp_path / 'replica.db'}",
+        "TESTING": True, "WTF_CSRF_ENABLED": False, "SECRET_KEY": "test-secret",
+        **request.param,
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions[replica.REPLICA])
+        # Same user on both; clientes only each side has (replication lag): 2 vs 1
+        lados = ((db.engine, ["Só no primário", "Também só no primário"]),
+                 (app.extensions[replica.REPLICA], ["Só na réplica"]))
+        for engine, nomes in lados:
+            with engine.begin() as conn:
+                admin = Usuario(nome="Admin", email="admin@test.com", role="Admin")
+                admin.set_password("password")
+                conn.execute(Usuario.__table__.insert(), [{"nome": admin.nome, "email": admin.email,
+                                                           "role": admin.role, "ativo": True,
+                                                           "password_hash": admin.password_hash}])
+                conn.execute(Cliente.__table__.insert(), [{"nome": nome, "tipo": "Pessoa",
+                                                           "canal_preferencial": "B2C",
+                                                           "tabela_preco": "Varejo", "ativo": True}
+                                                          for nome in nomes])
+    yield app
+    replica._estado["pausa_ate"] = 0.0
+    with app.app_context():
+        db.engine.dispose()
+        app.extensions[replica.REPLICA].dispose()
+
+
+def test_get_views_read_the_replica_until_the_browser_writes(app_replica):
+    client = app_replica.test_client()
+    client.post("/auth/login", data={"email": "admin@test.com", "password": "password"})
+    pagina = client.get("/clientes/").get_data(as_text=True)
+    assert "Só na réplica" in pagina and "Só no primário" not in pagina
+
+    assert client.post("/clientes/novo", data={"nome": "Recém-criado"}).status_code == 302
+    pagina = client.get("/clientes/").get_data(as_text=True)  # right after a write: primary
+    assert "Recém-criado" in pagina and "Só no primário" in pagina
+
+
+def test_reads_after_a_write_in_the_same_request_use_the_primary(app_replica):
+    with app_replica.test_request_context("/clientes/"):
+        app_replica.preprocess_request()
+        assert _contar_clientes() == 1  # replica
+        db.session.add(Cliente(nome="Novo"))
+        db.session.commit()
+        assert _contar_clientes() == 3  # primary: its own clientes plus the new one
+        db.session.remove()
+
+
+def test_read_only_services_use_the_replica_outside_requests(app_replica):
+    with app_replica.app_context():
+        db.session.add(Cliente(nome="Outro no primário"))
+        db.session.flush()
+        assert somente_leitura(_contar_clientes)() == 3  # wrote first: stays on the primary
+        db.session.rollback()
+        db.session.remove()
+        assert somente_leitura(_contar_clientes)() == 1
+        assert _contar_clientes() == 2  # outside requests and services: primary
+        db.session.remove()
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path):
+    app = create_app("default", {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primario.db'}",
+        "REPLICA_URL": f"sqlite:///{tmp_path / 'nao-existe' / 'replica.db'}",
+    })
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.add(Cliente(nome="Primário"))
+            db.session.commit()
+            db.session.remove()
+            assert somente_leitura(_contar_clientes)() == 1
+            db.session.remove()
+    finally:
+        replica._estado["pausa_ate"] = 0.0
+
+
+def test_replica_failing_mid_request_reruns_on_the_primary(app_replica):
+    with app_replica.test_request_context("/clientes/"):
+        app_replica.preprocess_request()
+        assert _contar_clientes() == 1  # replica
+        with app_replica.extensions[replica.REPLICA].begin() as conn:
+            conn.exec_driver_sql("DROP TABLE clientes")  # e.g. a query cancelled on the replica
+        assert _contar_clientes() == 2  # re-run on the primary
+        assert replica._estado["pausa_ate"] > 0
+        db.session.add(Cliente(nome="Depois da falha"))
+        db.session.commit()
+        assert _contar_clientes() == 3
+        db.session.remove()
+
+
+@pytest.mark.parametrize("app_replica", [{"PROFILER_ATIVO": True, "PROFILER_AMOSTRAGEM": 1.0}], indirect=True)
+def test_profiler_counts_replica_queries(app_replica):
+    profiler.limpar()
+    client = app_replica.test_client()
+    client.post("/auth/login", data={"email": "admin@test.com", "password": "password"})
+    assert "Só na réplica" in client.get("/clientes/").get_data(as_text=True)
+    ranking = {r["rota"]: r for r in profiler.ranking()}
+    assert ranking["GET /clientes/"]["queries_max"] > 0
+    profiler.limpar()
+
+
+def test_search_reads_the_replica_without_pinning_the_browser(app_replica):
+    client = app_replica.test_client()
+    client.post("/auth/login", data={"email": "admin@test.com", "password": "password"})
+    with client.session_transaction() as sessao:
+        sessao.pop("_primario_ate", None)  # the login wrote: skip its window
+    nomes = [c["texto"] for c in client.get("/busca/clientes?q=só").get_json()]
+    assert nomes == ["Só na réplica"]
+    with client.session_transaction() as sessao:
+        assert "_primario_ate" not in sessao
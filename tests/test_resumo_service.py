@@ -0,0 +1,107 @@
+"""test_resumo_service.py — monthly rollup maintenance and frozen closed months."""
+from decimal import Decimal
+from datetime import date
+from app.extensions import db
+from app.models.pedido import Pedido, PedidoItem
+from app.models.pagamento import Pagamento
+from app.models.despesa import Despesa
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.models.resumo_mensal import ResumoMensal
+from app.services.relatorio_service import dashboard_mes
+from app.services import resumo_service
+from app.services.resumo_service import kpis_mes
+
+
+def _pedido(numero: str) -> Pedido:
+    cliente = Cliente(nome=f"Cliente {numero}")
+    db.session.add(cliente)
+    produto = db.session.execute(db.select(Produto)).scalar()
+    db.session.flush()
+    p = Pedido(numero_pedido=numero, cliente_id=cliente.id, canal="B2C",
+               data_pedido=date.today(), desconto=0, taxa_entrega=0)
+    db.session.add(p)
+    db.session.flush()
+    db.session.add(PedidoItem(pedido_id=p.id, produto_id=produto.id,
+                              quantidade=10, preco_unitario=Decimal("10.00")))
+    db.session.flush()
+    return p
+
+
+def _resumo(ano: int, mes: int) -> ResumoMensal:
+    return db.session.execute(
+        db.select(ResumoMensal).where(ResumoMensal.ano == ano, ResumoMensal.mes == mes)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+
+def test_open_month_follows_changes(app):
+    with app.app_context():
+        hoje = date.today()
+        kpis_mes(hoje.year, hoje.month)  # a missing row is created dirty
+        antes, _ = kpis_mes(hoje.year, hoje.month)
+        assert _resumo(hoje.year, hoje.month).sujo is False
+        assert kpis_mes(hoje.year, hoje.month)[1] is False  # clean: nothing to commit
+
+        p = _pedido("RES-1")
+        db.session.add(Pagamento(pedido_id=p.id, data_recebimento=hoje,
+                                 forma_pagamento="PIX", valor_recebido=Decimal("40.00")))
+        db.session.add(Despesa(data=hoje, categoria="Outros", descricao="x",
+                               valor=Decimal("15.00"), forma_pagamento="PIX"))
+        db.session.flush()
+        assert _resumo(hoje.year, hoje.month).sujo is True
+
+        depois, _ = kpis_mes(hoje.year, hoje.month)
+        assert depois["recebido_mes"] - antes["recebido_mes"] == Decimal("40.00")
+        assert depois["despesas_mes"] - antes["despesas_mes"] == Decimal("15.00")
+        ao_vivo = dashboard_mes(hoje.year, hoje.month)
+        for chave, valor in ao_vivo.items():
+            assert abs(depois[chave] - valor) < Decimal("0.01"), chave
+        db.session.rollback()
+
+
+def test_closed_month_is_frozen(app):
+    with app.app_context():
+        kpis_mes(2025, 1)
+        kpis_mes(2025, 1)
+        fechado = _resumo(2025, 1)
+        assert fechado.fechado is True
+
+        # Activity elsewhere does not touch a closed month...
+        p = _pedido("RES-2")
+        db.session.add(Pagamento(pedido_id=p.id, data_recebimento=date.today(),
+                                 forma_pagamento="PIX", valor_recebido=Decimal("10.00")))
+        p.status_pagamento = "Parcial"
+        db.session.flush()
+        assert _resumo(2025, 1).sujo is False
+
+        # ...but a back-dated receipt inside it does
+        db.session.add(Pagamento(pedido_id=p.id, data_recebimento=date(2025, 1, 20),
+                                 forma_pagamento="PIX", valor_recebido=Decimal("5.00")))
+        db.session.flush()
+        assert _resumo(2025, 1).sujo is True
+        assert kpis_mes(2025, 1)[0]["recebido_mes"] == Decimal("5.00")
+        db.session.rollback()
+
+
+def test_refresh_racing_a_write_leaves_the_month_dirty(app, monkeypatch):
+    with app.app_context():
+        kpis_mes(2025, 2)
+        kpis_mes(2025, 2)
+        original = resumo_service.dashboard_mes
+
+        def _pagamento_concorrente(ano, mes):
+            # Another transaction marks the month while the totals are computed
+            kpis = original(ano, mes)
+            tabela = ResumoMensal.__table__
+            db.session.execute(db.update(tabela).where(tabela.c.ano == 2025, tabela.c.mes == 2)
+                               .values(sujo=True, geracao=tabela.c.geracao + 1))
+            return kpis
+
+        monkeypatch.setattr(resumo_service, "dashboard_mes", _pagamento_concorrente)
+        _, alterado = resumo_service.atualizar_resumo(2025, 2)
+        assert alterado is False and _resumo(2025, 2).sujo is True
+
+        monkeypatch.setattr(resumo_service, "dashboard_mes", original)
+        assert kpis_mes(2025, 2)[1] is True and _resumo(2025, 2).sujo is False
+        db.session.rollback()
@@ -0,0 +1,71 @@
+"""
+test_sequencia_service.py
+=========================
+Stress test for the gap-free allocator: many concurrent allocators, each
+with its own connection, must never share or skip a number. Runs on a
+SQLite file and, when TEST_POSTGRES_URL is set, on PostgreSQL too.
+"""
+import os
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.models.sequencia import Sequencia
+from app.services.sequencia_service import reservar
+
+URLS = ["sqlite"] + ([os.environ["TEST_POSTGRES_URL"]] if os.environ.get("TEST_POSTGRES_URL") else [])
+
+
+@pytest.fixture(params=URLS)
+def engine(request, tmp_path):
+    if request.param == "sqlite":
+        url = f"sqlite:///{tmp_path / 'seq.db'}"
+        engine = create_engine(url, connect_args={"timeout": 30})
+    else:
+        engine = create_engine(request.param, pool_size=16)
+    Sequencia.__table__.create(engine, checkfirst=True)
+    with Session(engine) as s:
+        s.query(Sequencia).filter(Sequencia.nome == "stress").delete()
+        s.commit()
+    yield engine
+    engine.dispose()
+
+
+def test_concurrent_allocators_are_unique_and_gap_free(app, engine):
+    workers, rodadas = 8, 25
+    obtidos: list[int] = []
+    erros: list[Exception] = []
+    trava = threading.Lock()
+    largada = threading.Barrier(workers)
+
+    def alocar(n: int):
+        try:
+            largada.wait()
+            with Session(engine) as session:
+                for r in range(rodadas):
+                    bloco = reservar("stress", 3 if (n + r) % 5 == 0 else 1, session=session)
+                    session.commit()
+                    with trava:
+                        obtidos.extend(bloco)
+        except Exception as e:  # pragma: no cover - surfaced below
+            erros.append(e)
+
+    threads = [threading.Thread(target=alocar, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erros
+    assert len(obtidos) == len(set(obtidos))
+    assert sorted(obtidos) == list(range(1, len(obtidos) + 1))
+
+
+def test_rolled_back_reservation_is_reused(app, engine):
+    with Session(engine) as session:
+        primeiro = reservar("stress", session=session)
+        session.rollback()
+        assert reservar("stress", session=session) == primeiro
+        session.commit()
+        assert list(reservar("stress", 4, session=session)) == [primeiro[0] + n for n in range(1, 5)]
+        session.commit()
@@ -1,6 +1,11 @@
+import os
+import sys
 from app import create_app
+from app.banco import relatorio
 
 app = create_app()
+if os.environ.get("FLASK_RUN_FROM_CLI") != "true":  # flask commands: see `flask perfil-banco`
+    print(relatorio(app), file=sys.stderr, flush=True)  # startup report, once per worker
 
 if __name__ == "__main__":
     app.run()